@@ -1,12 +1,23 @@
-import requests
+import os
+import sys
+import json
+import time
+import random
 import argparse
 import asyncio
 import aiohttp
 import itertools as it
 from datetime import datetime
-from typing import TypedDict, Callable, Any
+from typing import TypedDict, Callable, Any, Optional
 from tabulate import tabulate
 
+try:
+    from .http_cache import DEFAULT_TTL, ResponseCache, cache_from_env
+    from .activity_store import ActivityStore, store_from_env
+except ImportError:
+    from http_cache import DEFAULT_TTL, ResponseCache, cache_from_env
+    from activity_store import ActivityStore, store_from_env
+
 EVENT_DICT = {
     "CommitCommentEvent": "commit comment",
     "CreateEvent": "create",
@@ -26,8 +37,21 @@ EVENT_DICT = {
     "WatchEvent": "watch"
 }
 
-API_ENDPOINT = 'https://api.github.com/users/{username}/events?per_page=100&page={page}'
-API_RATE_LIMIT = 'https://api.github.com/rate_limit'
+# Pointing GITHUB_API_URL at a local server lets the fetching run without touching github.
+API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+PER_PAGE = 100
+API_ENDPOINT = API_URL + '/users/{username}/events?per_page=%d&page={page}' % PER_PAGE
+API_RATE_LIMIT = API_URL + '/rate_limit'
+RATE_LIMIT_KEY = 'rate_limit'
+RATE_LIMIT_WARNING = 10
+CONNECTION_LIMIT = 32
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_SECONDS = 300
+DEFAULT_WORKERS = 8
+PAGE_WINDOW = 3
+PAGE_RETRIES = 3
+RETRY_DELAY = 0.5
+BATCH_FORMATS = ('table', 'jsonl')
 
 class SupportedQueryArgs(TypedDict, total=False):
     name_or_flags: list[str]
@@ -45,6 +69,60 @@ class SupportedQueryProperties(TypedDict):
 class RequestLimit(Exception):
     pass
 
+class ServerError(ConnectionError):
+    """A 5xx answer, worth asking again unlike the other failed statuses."""
+
+class RateLimit:
+    """Calls left and their reset time, as reported by the X-RateLimit headers of the last response."""
+
+    def __init__(self, remaining: Optional[int]=None, reset: Optional[int]=None) -> None:
+        self.remaining = remaining
+        self.reset = reset
+
+    def update(self, headers: Any) -> None:
+        remaining, reset = headers.get('X-RateLimit-Remaining'), headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            self.remaining, self.reset = int(remaining), int(reset)
+
+    def exhausted(self) -> bool:
+        return self.remaining is not None and self.remaining <= 1 and self.reset is not None and self.reset > time.time()
+
+    def check(self) -> None:
+        if self.exhausted():
+            raise RequestLimit(f"You have run out of api calls. Try after {datetime.fromtimestamp(self.reset)}")
+
+    async def acquire(self) -> None:
+        """Called before every request that goes to github."""
+        self.check()
+
+class PacedRateLimit(RateLimit):
+    """Rate limit shared by the workers of a batch, spacing their requests once the budget runs short.
+
+    While more calls are left than ``planned`` requests still to come, requests go out at once.
+    Past that point the calls left are spread evenly until the reset, so a long batch slows down
+    instead of failing halfway through.
+    """
+
+    def __init__(self, planned: int, remaining: Optional[int]=None, reset: Optional[int]=None) -> None:
+        super().__init__(remaining, reset)
+        self.planned = planned
+        self.next_request = 0.0
+        self.lock = asyncio.Lock()
+
+    def interval(self) -> float:
+        if self.remaining is None or self.reset is None or self.remaining >= self.planned:
+            return 0.0
+        return max(self.reset - time.time(), 0) / max(self.remaining, 1)
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            self.check()
+            delay = self.next_request - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.planned = max(self.planned - 1, 0)
+            self.next_request = time.monotonic() + self.interval()
+
 def _queries() -> dict[str, SupportedQueryProperties]:
     return{
         'hub-activity':{
@@ -61,15 +139,89 @@ def _queries() -> dict[str, SupportedQueryProperties]:
                     'type': int,
                     'default': 1
                 },
-                *({
-                    'name_or_flags': [f'--{name.replace(" ", "_")}'],
-                    'help': f'filter by {flag} event',
+                {
+                    'name_or_flags': ['--cache-ttl'],
+                    'help': 'Seconds a cached page is used without asking github again',
+                    'type': float,
+                    'default': DEFAULT_TTL
+                },
+                {
+                    'name_or_flags': ['--no-cache'],
+                    'help': 'Fetch every page and leave the response cache alone',
+                    'action': 'store_true'
+                },
+                {
+                    'name_or_flags': ['--sync'],
+                    'help': 'Fetch only events newer than the last sync and add them to the stored counts',
                     'action': 'store_true'
-                } for flag, name in EVENT_DICT.items())
+                },
+                *_event_filter_args()
+            ]
+        },
+        'hub-batch':{
+            'target': print_batch_activity,
+            'help': 'gets activity of many users, printing each one as soon as it is fetched',
+            'args':[
+                {
+                    'name_or_flags': ['usernames'],
+                    'help': 'Usernames of users on github',
+                    'nargs': '*'
+                },
+                {
+                    'name_or_flags': ['--file'],
+                    'help': 'File with one username per line, - reads them from stdin'
+                },
+                {
+                    'name_or_flags': ['--p'],
+                    'help': 'Number of pages to fetch per user',
+                    'type': int,
+                    'default': 1
+                },
+                {
+                    'name_or_flags': ['--workers'],
+                    'help': 'Users fetched at the same time',
+                    'type': int,
+                    'default': DEFAULT_WORKERS
+                },
+                {
+                    'name_or_flags': ['--connections'],
+                    'help': 'Open connections allowed to the api host',
+                    'type': int,
+                    'default': CONNECTION_LIMIT_PER_HOST
+                },
+                {
+                    'name_or_flags': ['--format'],
+                    'help': f'Output format, one of {BATCH_FORMATS}',
+                    'default': 'table'
+                },
+                {
+                    'name_or_flags': ['--cache-ttl'],
+                    'help': 'Seconds a cached page is used without asking github again',
+                    'type': float,
+                    'default': DEFAULT_TTL
+                },
+                {
+                    'name_or_flags': ['--no-cache'],
+                    'help': 'Fetch every page and leave the response cache alone',
+                    'action': 'store_true'
+                },
+                {
+                    'name_or_flags': ['--sync'],
+                    'help': 'Fetch only events newer than the last sync and add them to the stored counts',
+                    'action': 'store_true'
+                },
+                *_event_filter_args()
             ]
         }
     }
 
+def _event_filter_args() -> list[SupportedQueryArgs]:
+    return [{
+        'name_or_flags': [f'--{name.replace(" ", "_")}'],
+        'help': f'filter by {flag} event',
+        'action': 'store_true'
+    } for flag, name in EVENT_DICT.items()]
+
 def get_supported_queries() -> tuple[dict[str, Any], Callable]:
     parser = argparse.ArgumentParser(
         prog='hub-parser',
@@ -98,32 +250,113 @@ def get_supported_queries() -> tuple[dict[str, Any], Callable]:
 
     return args, queries
 
-def get_remaining_api_calls() -> tuple[int, int]:
-    rate_limit = requests.get(API_RATE_LIMIT, timeout=10)
-    if rate_limit.status_code == 200:
-        rate_limit = rate_limit.json()
-        calls_remaining = rate_limit['rate']['remaining']
-        reset_time = rate_limit['rate']['reset']
-        return (int(calls_remaining), int(reset_time))
-    else:
-        raise requests.exceptions.ConnectionError(f'Exited with status {rate_limit.status_code}')
-
-async def _get_page(session: aiohttp.client.ClientSession, username: str, page: int) -> Any:
+def _open_session(limit_per_host: int=0) -> aiohttp.ClientSession:
+    # One pooled connector per run: connections, TLS sessions and dns answers are reused by every page.
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, limit_per_host=limit_per_host, ttl_dns_cache=DNS_CACHE_SECONDS)
+    return aiohttp.ClientSession(connector=connector, headers={'Accept': 'application/vnd.github+json'})
+
+async def get_remaining_api_calls(session: aiohttp.client.ClientSession) -> tuple[int, int]:
+    async with session.get(API_RATE_LIMIT) as rate_limit:
+        if rate_limit.status != 200:
+            raise ConnectionError(f'Exited with status {rate_limit.status}')
+        rate = (await rate_limit.json())['rate']
+        return (int(rate['remaining']), int(rate['reset']))
+
+def load_rate_limit(cache: Optional[ResponseCache]) -> RateLimit:
+    """Returns the rate limit seen by the last run, so an exhausted quota fails before any request."""
+    entry = cache.get(RATE_LIMIT_KEY) if cache else None
+    return RateLimit(**entry['body']) if entry else RateLimit()
+
+def save_rate_limit(cache: Optional[ResponseCache], rate: RateLimit) -> None:
+    if cache and rate.remaining is not None:
+        cache.put(RATE_LIMIT_KEY, {'remaining': rate.remaining, 'reset': rate.reset}, {})
+
+async def _get_page(session: aiohttp.client.ClientSession, username: str, page: int, cache: Optional[ResponseCache]=None, rate: Optional[RateLimit]=None) -> tuple[Any, Optional[bool]]:
+    """Returns the events of a page and whether the Link header points to a next one, None when it was not seen."""
     url = API_ENDPOINT.format(username=username, page=page)
-    async with session.get(url) as page_resp:
+    key = f'{username}/{page}'
+    entry = cache.get(key) if cache else None
+    if entry is not None and cache.is_fresh(entry):
+        return entry['body'], None
+
+    rate = rate or RateLimit()
+    await rate.acquire()
+    headers = cache.conditional_headers(entry) if cache else {}
+    async with session.get(url, headers=headers) as page_resp:
+        rate.update(page_resp.headers)
+        if page_resp.status == 304 and entry is not None:
+            # Not modified answers are free, the cached body is still current.
+            cache.refresh(entry)
+            return entry['body'], None
         if page_resp.status == 403:
-            raise requests.exceptions.ConnectionError('You have exceeded the API limit')
+            rate.check()
+            raise ConnectionError('You have exceeded the API limit')
+        if page_resp.status >= 500:
+            raise ServerError(f'Exited with status {page_resp.status}')
         if page_resp.status != 200:
-            raise requests.exceptions.ConnectionError(f'Exited with status {page_resp.status}')
+            raise ConnectionError(f'Exited with status {page_resp.status}')
         else:
-            return await page_resp.json()
+            body = await page_resp.json()
+            if cache:
+                cache.put(key, body, page_resp.headers)
+            return body, 'rel="next"' in page_resp.headers.get('Link', '')
 
-async def _get_activity(username: str, n_pages: int) -> dict[str, dict[str, str]]:
-    async with aiohttp.ClientSession() as session:
-        content = await asyncio.gather(*(_get_page(session, username, curr_page) for curr_page in range(1, n_pages+1)))
+async def _get_page_retrying(session: aiohttp.client.ClientSession, username: str, page: int, cache: Optional[ResponseCache]=None, rate: Optional[RateLimit]=None) -> tuple[Any, Optional[bool]]:
+    for attempt in range(PAGE_RETRIES + 1):
+        try:
+            return await _get_page(session, username, page, cache, rate)
+        except (ServerError, aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == PAGE_RETRIES:
+                raise
+        # Jittered backoff keeps the workers of a batch from retrying in lockstep.
+        await asyncio.sleep(RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
 
-    activity: dict = {}
-    for event in it.chain.from_iterable(content):
+def _event_id(event: dict[str, Any]) -> int:
+    # Event ids grow with time, so they also order events the feed no longer lists.
+    return int(event['id'])
+
+async def _get_pages(session: aiohttp.client.ClientSession, username: str, n_pages: int, cache: Optional[ResponseCache]=None, rate: Optional[RateLimit]=None, since: Optional[str]=None, partial: bool=True) -> list[Any]:
+    """Fetches up to ``n_pages`` pages of events, stopping at the last page github has.
+
+    Pages are requested in windows that start at one page and grow to ``PAGE_WINDOW``. The end is
+    a page without a next Link or shorter than ``PER_PAGE``, or holding the event ``since`` or an
+    older one; requests past it are cancelled. A page that still fails after its retries is left
+    out when ``partial`` is set, unless no page could be fetched at all.
+    """
+    content = []
+    failed: list[tuple[int, Exception]] = []
+    page, last, window = 1, n_pages, 1
+    while page <= last:
+        pages = range(page, min(page + window, last + 1))
+        fetches = {curr_page: asyncio.ensure_future(_get_page_retrying(session, username, curr_page, cache, rate)) for curr_page in pages}
+        try:
+            for curr_page in pages:
+                try:
+                    body, has_next = await fetches[curr_page]
+                except (ServerError, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    if not partial:
+                        raise
+                    failed.append((curr_page, exc))
+                    continue
+                content.append(body)
+                known = since is not None and any(_event_id(event) <= int(since) for event in body)
+                if known or has_next is False or len(body) < PER_PAGE:
+                    last = curr_page
+                    break
+        finally:
+            for fetch in fetches.values():
+                fetch.cancel()
+            await asyncio.gather(*fetches.values(), return_exceptions=True)
+        page, window = pages[-1] + 1, min(window * 2, PAGE_WINDOW)
+
+    if failed and not content:
+        raise failed[-1][1]
+    if failed:
+        print(f"{username}: page {', '.join(str(curr_page) for curr_page, _ in failed)} failed, the counts are partial", file=sys.stderr)
+    return content
+
+def _count_events(events: list[dict[str, Any]], activity: dict) -> dict[str, dict[str, int]]:
+    for event in events:
         event_type = event['type']
         repo_name = event['repo']['name']
         if event_type not in EVENT_DICT:
@@ -134,19 +367,52 @@ async def _get_activity(username: str, n_pages: int) -> dict[str, dict[str, str]
 
     return activity
 
-async def print_activity(username: str, p: int=1, **kwargs) -> None:
+async def _get_activity(username: str, n_pages: int, cache: Optional[ResponseCache]=None, session: Optional[aiohttp.client.ClientSession]=None, rate: Optional[RateLimit]=None, store: Optional[ActivityStore]=None) -> dict[str, dict[str, int]]:
+    if session is None:
+        async with _open_session() as session:
+            return await _get_activity(username, n_pages, cache, session, rate, store)
+
+    if store is None:
+        content = await _get_pages(session, username, n_pages, cache, rate)
+        return _count_events(list(it.chain.from_iterable(content)), {})
+
+    return await _sync_activity(session, username, n_pages, cache, rate, store)
+
+async def _sync_activity(session: aiohttp.client.ClientSession, username: str, n_pages: int, cache: Optional[ResponseCache], rate: Optional[RateLimit], store: ActivityStore) -> dict[str, dict[str, int]]:
+    """Adds the events newer than the last sync of ``username`` to its stored counts and returns them.
+
+    Once synced, a poll usually stops at the first page. Any failed page fails the whole sync,
+    since moving the newest event past it would lose its events for good.
+    """
+    state = store.get(username)
+    since = state['newest_id'] if state else None
+    content = await _get_pages(session, username, n_pages, cache, rate, since, partial=False)
+    events = list(it.chain.from_iterable(content))
+    new_events = [event for event in events if since is None or _event_id(event) > int(since)]
+    if since is not None and len(new_events) == len(events) and events:
+        print(f'{username}: the last synced event was not reached in {n_pages} pages, events in between are missing', file=sys.stderr)
+
+    activity = _count_events(new_events, state['activity'] if state else {})
+    newest = max(new_events, key=_event_id, default=None)
+    if newest is not None:
+        store.put(username, newest['id'], newest.get('created_at'), activity)
+    elif state is None:
+        store.put(username, None, None, activity)
+    return activity
+
+def _check_pages(p: int) -> None:
     if p <= 0 or not isinstance(p, int):
         raise ValueError(f'Number of pages should be a positive int got: {type(p)}')
-    if not username or not isinstance(username, str):
-        raise ValueError(f'Username should be str got: {type(username)}')
 
+def _active_event_types(kwargs: dict[str, Any]) -> list[str]:
     active_event_types = []
     for event, name in EVENT_DICT.items():
         arg_name = name.replace(' ', '_')
         if kwargs.get(arg_name, False):
             active_event_types.append(event)
+    return active_event_types
 
-    activity_dct = await _get_activity(username, p)
+def _activity_rows(activity_dct: dict[str, dict[str, int]], active_event_types: list[str]) -> list[list[Any]]:
     activity_display = []
     for project, _ in activity_dct.items():
         for activity, activity_count in activity_dct[project].items():
@@ -157,23 +423,101 @@ async def print_activity(username: str, p: int=1, **kwargs) -> None:
                 activity_count,
                 project
             ])
+    return activity_display
+
+def _print_rate_warning(rate: RateLimit) -> None:
+    if rate.remaining is not None and rate.remaining <= RATE_LIMIT_WARNING:
+        print(f"Warning you have {rate.remaining} calls left")
+
+async def print_activity(username: str, p: int=1, cache_ttl: float=DEFAULT_TTL, no_cache: bool=False, sync: bool=False, **kwargs) -> None:
+    _check_pages(p)
+    if not username or not isinstance(username, str):
+        raise ValueError(f'Username should be str got: {type(username)}')
+
+    active_event_types = _active_event_types(kwargs)
+    cache = None if no_cache else cache_from_env(cache_ttl)
+    rate = load_rate_limit(cache)
+    try:
+        activity_dct = await _get_activity(username, p, cache, rate=rate, store=store_from_env() if sync else None)
+    finally:
+        save_rate_limit(cache, rate)
+        if cache:
+            cache.prune()
 
     print(tabulate(
-        activity_display,
+        _activity_rows(activity_dct, active_event_types),
         headers=['Activity', 'Activity Count', 'Project name']
     ))
 
-def main():
+    _print_rate_warning(rate)
+
+def read_usernames(usernames: list[str], file: Optional[str]=None) -> list[str]:
+    """Returns the usernames given as arguments and in ``file``, without blank lines, # comments and repeats."""
+    names = list(usernames)
+    if file is not None:
+        if file == '-':
+            names.extend(sys.stdin.read().splitlines())
+        else:
+            with open(file, 'r', encoding='utf-8') as users_file:
+                names.extend(users_file.read().splitlines())
+    names = [name.split('#', 1)[0].strip() for name in names]
+    return list(dict.fromkeys(name for name in names if name))
+
+async def _get_batch(usernames: list[str], p: int, workers: int, connections: int, cache: Optional[ResponseCache], rate: RateLimit, store: Optional[ActivityStore]=None):
+    """Yields ``(username, activity, error)`` for every user in the order their fetches complete."""
+    semaphore = asyncio.Semaphore(workers)
+
+    async def _fetch(username: str) -> tuple[str, Optional[dict], Optional[Exception]]:
+        async with semaphore:
+            try:
+                return username, await _get_activity(username, p, cache, session, rate, store), None
+            except (ConnectionError, RequestLimit, KeyError, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                # One unknown or failing user must not lose the results of the others.
+                return username, None, exc
+
+    async with _open_session(limit_per_host=connections) as session:
+        for fetched in asyncio.as_completed([_fetch(username) for username in usernames]):
+            yield await fetched
+
+async def print_batch_activity(usernames: list[str], file: Optional[str]=None, p: int=1, workers: int=DEFAULT_WORKERS, connections: int=CONNECTION_LIMIT_PER_HOST, format: str='table', cache_ttl: float=DEFAULT_TTL, no_cache: bool=False, sync: bool=False, **kwargs) -> None:
+    _check_pages(p)
+    if workers <= 0 or connections <= 0:
+        raise ValueError(f'Workers and connections should be positive got: {workers}, {connections}')
+    if format not in BATCH_FORMATS:
+        raise ValueError(f"Format only accepts following args -> {BATCH_FORMATS}")
+    usernames = read_usernames(usernames, file)
+    if not usernames:
+        raise ValueError('No usernames given')
 
-    api_limit, reset_time = get_remaining_api_calls()
-    if api_limit and api_limit <= 1:
-            raise RequestLimit(f"You have run out of api calls. Try after {datetime.fromtimestamp(reset_time)}")
+    active_event_types = _active_event_types(kwargs)
+    cache = None if no_cache else cache_from_env(cache_ttl)
+    saved = load_rate_limit(cache)
+    rate = PacedRateLimit(len(usernames) * p, saved.remaining, saved.reset)
+    failed = 0
+    try:
+        async for username, activity_dct, error in _get_batch(usernames, p, workers, connections, cache, rate, store_from_env() if sync else None):
+            if error is not None:
+                failed += 1
+                print(f'{username}: {type(error).__name__}: {error}', file=sys.stderr)
+                continue
+            rows = _activity_rows(activity_dct, active_event_types)
+            if format == 'jsonl':
+                print(json.dumps({'username': username, 'activity': [dict(zip(('activity', 'count', 'project'), row)) for row in rows]}), flush=True)
+            else:
+                print(f'{username}\n' + tabulate(rows, headers=['Activity', 'Activity Count', 'Project name']) + '\n', flush=True)
+    finally:
+        save_rate_limit(cache, rate)
+        if cache:
+            cache.prune()
+
+    if failed:
+        print(f'{failed} of {len(usernames)} users failed', file=sys.stderr)
+    _print_rate_warning(rate)
+
+def main():
 
     args, queries = get_supported_queries()
     asyncio.run(queries(**args))
-
-    if api_limit and api_limit <= 10:
-        print(f"Warning you have {api_limit} calls left")
     
 
 if __name__ == '__main__':
@@ -0,0 +1,54 @@
+import os
+import json
+from datetime import datetime
+from urllib.parse import quote
+from typing import Optional, TypedDict
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.local', 'state', 'hub-activity')
+
+class SyncState(TypedDict):
+    username: str
+    newest_id: Optional[str]
+    newest_at: Optional[str]
+    synced_at: str
+    activity: dict[str, dict[str, int]]
+
+class ActivityStore:
+    """Per repository event counts of every synced user, with the newest event they include.
+
+    Unlike the response cache nothing here is ever evicted: dropping a file loses the counts of
+    events github no longer lists.
+    """
+
+    def __init__(self, folder: str = DEFAULT_STATE_DIR) -> None:
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, username: str) -> str:
+        # Usernames are case insensitive on github.
+        return os.path.join(self.folder, quote(username.lower(), safe='') + '.json')
+
+    def get(self, username: str) -> Optional[SyncState]:
+        try:
+            with open(self._path(username), 'r', encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return None
+
+    def put(self, username: str, newest_id: Optional[str], newest_at: Optional[str], activity: dict[str, dict[str, int]]) -> None:
+        state: SyncState = {
+            'username': username,
+            'newest_id': newest_id,
+            'newest_at': newest_at,
+            'synced_at': datetime.now().isoformat(),
+            'activity': activity
+        }
+        path = self._path(username)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+
+def store_from_env() -> ActivityStore:
+    return ActivityStore(os.environ.get('HUB_ACTIVITY_STATE_DIR') or DEFAULT_STATE_DIR)
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import hashlib
+from typing import Any, Mapping, Optional, TypedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hub-activity')
+DEFAULT_TTL = 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+class CacheEntry(TypedDict):
+    key: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    body: Any
+
+class ResponseCache:
+    """Responses of the events API kept on disk, one file per username and page.
+
+    Entries younger than ``ttl`` seconds are served without a request. Older ones are revalidated
+    with their ETag and Last-Modified values, which GitHub answers with a 304 that does not count
+    against the rate limit. ``prune`` evicts the least recently used files past ``max_bytes``.
+    """
+
+    def __init__(self, folder: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.folder = folder
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry.get('key') != key:
+            return None
+        # Reading an entry counts as using it for the eviction order.
+        os.utime(path)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, key: str, body: Any, headers: Mapping[str, str]) -> None:
+        self._write({
+            'key': key,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'body': body
+        })
+
+    def refresh(self, entry: CacheEntry) -> None:
+        """Restarts the ttl of an entry the server confirmed unchanged."""
+        self._write({**entry, 'stored_at': time.time()})
+
+    def _write(self, entry: CacheEntry) -> None:
+        path = self._path(entry['key'])
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as entry_file:
+            json.dump(entry, entry_file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def prune(self) -> None:
+        entries = []
+        with os.scandir(self.folder) as scan:
+            for item in scan:
+                if item.name.endswith('.json') and item.is_file():
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+def cache_from_env(ttl: Optional[float] = None) -> ResponseCache:
+    return ResponseCache(
+        os.environ.get('HUB_ACTIVITY_CACHE_DIR') or DEFAULT_CACHE_DIR,
+        DEFAULT_TTL if ttl is None else ttl,
+        int(os.environ.get('HUB_ACTIVITY_CACHE_BYTES') or DEFAULT_MAX_BYTES)
+    )
@@ -0,0 +1,95 @@
+"""Cold-start benchmark for taski.
+
+Runs each command in a fresh interpreter against a scratch database and reports the median and
+worst wall time, plus the modules that took longest to import according to ``-X importtime``.
+
+    python "Task Tracker/benchmarks/startup.py" --runs 30 --entry taski_cli.py --max-ms 80
+"""
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+from time import perf_counter
+from argparse import ArgumentParser
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+COMMANDS = {
+    'help': ['--help'],
+    'delete-help': ['delete', '--help'],
+    'add': ['add', 'benchmark task'],
+    'update': ['update', '1', '--description', 'benchmark task', '--status', 'done'],
+    'list': ['list', '--limit', '1'],
+    'stats': ['stats']
+}
+
+TOP_IMPORTS = 10
+
+
+def _env(db_path: str) -> dict[str, str]:
+    return {**os.environ, 'TASKI_DB_PATH': db_path, 'TASKI_NO_DAEMON': '1'}
+
+
+def time_command(entry: str, args: list[str], db_path: str, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, entry), *args], env=_env(db_path), capture_output=True, check=False)
+        timings.append((perf_counter() - start) * 1000)
+    return timings
+
+
+def import_times(entry: str, args: list[str], db_path: str) -> dict[str, float]:
+    """Returns the cumulative import time in milliseconds of every module imported directly by the run."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.join(SRC_DIR, entry), *args],
+        env=_env(db_path), capture_output=True, text=True, check=False
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def main() -> None:
+    parser = ArgumentParser(description='Measure taski cold-start latency')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per command')
+    parser.add_argument('--entry', default='taski.py', help='Script to start, e.g. taski.py or taski_cli.py')
+    parser.add_argument('--commands', default=','.join(COMMANDS), help=f'Comma separated commands, any of {",".join(COMMANDS)}')
+    parser.add_argument('--json', action='store_true', help='Print the report as json')
+    parser.add_argument('--max-ms', type=float, help='Exit with 1 when a median exceeds this many milliseconds')
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as db_path:
+        # Every command but help needs a task to work on.
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, 'taski.py'), 'add', 'seed'], env=_env(db_path), capture_output=True, check=True)
+        for name in args.commands.split(','):
+            timings = time_command(args.entry, COMMANDS[name], db_path, args.runs)
+            imports = import_times(args.entry, COMMANDS[name], db_path)
+            report[name] = {
+                'median_ms': round(statistics.median(timings), 2),
+                'max_ms': round(max(timings), 2),
+                'import_ms': round(sum(imports.values()), 2),
+                'slowest_imports': dict(sorted(imports.items(), key=lambda item: -item[1])[:TOP_IMPORTS])
+            }
+
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        for name, result in report.items():
+            slowest = ', '.join(f'{module} {ms:.1f}' for module, ms in list(result['slowest_imports'].items())[:5])
+            print(f"{name:<12} median {result['median_ms']:>7.1f} ms  max {result['max_ms']:>7.1f} ms  imports {result['import_ms']:>6.1f} ms  ({slowest})")
+
+    if args.max_ms is not None and any(result['median_ms'] > args.max_ms for result in report.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
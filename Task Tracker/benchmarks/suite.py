@@ -0,0 +1,176 @@
+"""Benchmark suite for the task tracker.
+
+Generates synthetic stores of each size and, in a fresh process per size, times opening and saving
+the store, the task functions, listing and end-to-end CLI calls. Every result records the wall time
+and the peak RSS of the process that ran it. Everything runs locally, no network needed.
+
+    python "Task Tracker/benchmarks/suite.py" --sizes 1000,100000 --output results.json
+    python "Task Tracker/benchmarks/suite.py" --baseline results.json --threshold 0.25
+"""
+import os
+import sys
+import json
+import random
+import platform
+import resource
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+from time import perf_counter
+from argparse import SUPPRESS, ArgumentParser
+from contextlib import redirect_stdout
+from typing import Callable, Optional
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.2
+OPS_PER_RUN = 100
+STATUSES = ('todo', 'in-progress', 'done')
+SEED = 1234
+
+
+def generate_store(folder: str, size: int) -> None:
+    """Writes ``size`` tasks to ``folder/tasks.json`` one at a time, so the generator stays small in memory."""
+    rng = random.Random(SEED)
+    start = datetime(2024, 1, 1)
+    with open(os.path.join(folder, 'tasks.json'), 'w', encoding='utf-8') as js_file:
+        js_file.write('{')
+        for task_id in range(1, size + 1):
+            created = start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            task = {
+                'task_id': str(task_id),
+                'description': f'synthetic task {task_id} for topic{rng.randrange(1000)}',
+                'status': rng.choice(STATUSES),
+                'createdAt': created.isoformat(),
+                'updatedAt': (created + timedelta(seconds=rng.randrange(30 * 24 * 3600))).isoformat()
+            }
+            js_file.write(f'{"," if task_id > 1 else ""}\n    {json.dumps(str(task_id))}: {json.dumps(task)}')
+        js_file.write('\n}')
+    with open(os.path.join(folder, 'tasks.json.meta'), 'w', encoding='utf-8') as meta_file:
+        json.dump({'last_id': size}, meta_file)
+
+
+def _peak_rss_kb(who: int = resource.RUSAGE_SELF) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _measure(runs: int, action: Callable[[], None], per: int = 1, setup: Optional[Callable[[], None]] = None) -> dict:
+    timings = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        action()
+        timings.append((perf_counter() - start) / per)
+    return {'seconds': statistics.median(timings), 'peak_rss_kb': _peak_rss_kb()}
+
+
+def run_size(size: int, backend: str, runs: int) -> dict[str, dict]:
+    """Runs every benchmark against a store of ``size`` tasks; meant to run in its own process."""
+    sys.path.insert(0, SRC_DIR)
+    from taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        generate_store(folder, size)
+        if backend != 'json':
+            # Migrates the generated json store into the backend outside of the measurements.
+            save_to_task_db(open_task_db(folder_name=folder, backend=backend), folder_name=folder, backend=backend)
+
+        results['open'] = _measure(runs, lambda: open_task_db(folder_name=folder, backend=backend))
+        task_tracker = open_task_db(folder_name=folder, backend=backend)
+        # An unchanged tracker is not written at all, so every run flags its meta as changed.
+        results['save'] = _measure(
+            runs, lambda: save_to_task_db(task_tracker, folder_name=folder, backend=backend),
+            setup=lambda: setattr(task_tracker, 'meta_dirty', True)
+        )
+
+        rng = random.Random(SEED)
+        results['add'] = _measure(runs, lambda: [add_task(task_tracker, 'benchmark task') for _ in range(OPS_PER_RUN)], OPS_PER_RUN)
+        task_ids = [str(rng.randrange(1, size + 1)) for _ in range(OPS_PER_RUN)]
+        results['update'] = _measure(runs, lambda: [update_task(task_tracker, task_id, 'updated task', 'done') for task_id in task_ids], OPS_PER_RUN)
+
+        def _pick_deleted() -> None:
+            task_ids[:] = rng.sample(list(task_tracker.keys()), OPS_PER_RUN)
+
+        results['delete'] = _measure(runs, lambda: [delete_task(task_tracker, task_id) for task_id in task_ids], OPS_PER_RUN, setup=_pick_deleted)
+        save_to_task_db(task_tracker, folder_name=folder, backend=backend)
+
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            results['list'] = _measure(runs, lambda: list_tasks(task_tracker))
+            results['list_status'] = _measure(runs, lambda: list_tasks(task_tracker, status='done'))
+            results['list_page'] = _measure(runs, lambda: list_tasks(task_tracker, limit=10, sort_by='updatedAt'))
+
+        env = {**os.environ, 'TASKI_DB_PATH': folder, 'TASKI_BACKEND': backend, 'TASKI_NO_DAEMON': '1'}
+        for name, args in (('cli_add', ['add', 'cli task']), ('cli_list_status', ['list', '--status', 'todo', '--limit', '10'])):
+            timings = []
+            for _ in range(runs):
+                start = perf_counter()
+                subprocess.run([sys.executable, os.path.join(SRC_DIR, 'taski_cli.py'), *args], env=env, stdout=subprocess.DEVNULL, check=True)
+                timings.append(perf_counter() - start)
+            results[name] = {'seconds': statistics.median(timings), 'peak_rss_kb': _peak_rss_kb(resource.RUSAGE_CHILDREN)}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a line for every benchmark slower than its baseline by more than ``threshold``."""
+    regressions = []
+    for key, benchmarks in results['benchmarks'].items():
+        for name, result in benchmarks.items():
+            base = baseline.get('benchmarks', {}).get(key, {}).get(name)
+            if base and result['seconds'] > base['seconds'] * (1 + threshold):
+                regressions.append(f"{key} {name}: {result['seconds']:.6f}s vs {base['seconds']:.6f}s baseline")
+    return regressions
+
+
+def main() -> None:
+    parser = ArgumentParser(description='Benchmark the task tracker across database sizes')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='Comma separated store sizes')
+    parser.add_argument('--backend', default='json', help='Storage backend to benchmark')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per benchmark, the median is kept')
+    parser.add_argument('--output', help='Write the results to this json file instead of stdout')
+    parser.add_argument('--baseline', help='Compare against results stored by an earlier run')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed slowdown over the baseline, 0.2 is 20%%')
+    parser.add_argument('--worker', type=int, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.backend, args.runs)))
+        return
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'benchmarks': {}
+    }
+    for size in map(int, args.sizes.split(',')):
+        # A fresh process per size keeps the peak RSS of one size out of the next.
+        worker = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', str(size), '--backend', args.backend, '--runs', str(args.runs)],
+            capture_output=True, text=True, check=True
+        )
+        results['benchmarks'][f'{args.backend}/{size}'] = json.loads(worker.stdout)
+
+    report = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(report)
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        for regression in regressions:
+            print(f'Regression {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+import os
+import mmap
+import struct
+from typing import Iterator, Optional
+
+try:
+    from .models import STATUS, STATUS_CODES, STATUS_NAMES, TaskProperties, LazyTaskTracker, iso_to_micros, micros_to_iso
+except ImportError:
+    from models import STATUS, STATUS_CODES, STATUS_NAMES, TaskProperties, LazyTaskTracker, iso_to_micros, micros_to_iso
+
+BINARY_SUFFIX = '.bin'
+
+MAGIC = b'TASKIDB1'
+VERSION = 1
+
+# magic, version, record size, records used, record capacity, end of the string heap
+HEADER = struct.Struct('<8sIIQQQ')
+HEADER_SIZE = 64
+
+# id, status code, flags, createdAt and updatedAt in microseconds since epoch, description offset and length
+RECORD = struct.Struct('<QBB6xqqQI4x')
+
+FLAG_DELETED = 1
+FLAG_NO_DESCRIPTION = 2
+
+INITIAL_CAPACITY = 1024
+SCAN_CHUNK_RECORDS = 4096
+
+
+def _encode_description(description: Optional[str]) -> tuple[bytes, int]:
+    if description is None:
+        return b'', FLAG_NO_DESCRIPTION
+    return description.encode('utf-8'), 0
+
+
+def _pack_record(task_id: str, task: TaskProperties, offset: int, length: int, flags: int) -> bytes:
+    return RECORD.pack(
+        int(task_id),
+        STATUS_CODES[task['status']],
+        flags,
+        iso_to_micros(task['createdAt']),
+        iso_to_micros(task['updatedAt']),
+        offset,
+        length
+    )
+
+
+def binary_path(path: str) -> str:
+    return os.path.splitext(path)[0] + BINARY_SUFFIX
+
+
+def write_binary(task_tracker: Optional[dict[str, TaskProperties]], bin_path: str, capacity: int = INITIAL_CAPACITY) -> None:
+    """Writes a fresh binary database holding every task and renames it over ``bin_path``."""
+    tasks = list((task_tracker or {}).items())
+    capacity = max(capacity, INITIAL_CAPACITY, len(tasks))
+    heap_start = HEADER_SIZE + capacity * RECORD.size
+
+    records = bytearray()
+    heap = bytearray()
+    for task_id, task in tasks:
+        description, flags = _encode_description(task['description'])
+        records += _pack_record(task_id, task, heap_start + len(heap), len(description), flags)
+        heap += description
+
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, len(tasks), capacity, heap_start + len(heap))
+    tmp_path = f'{bin_path}.tmp'
+    with open(tmp_path, 'wb') as bin_file:
+        bin_file.write(header.ljust(HEADER_SIZE, b'\0'))
+        bin_file.write(records)
+        bin_file.write(bytes((capacity - len(tasks)) * RECORD.size))
+        bin_file.write(heap)
+        bin_file.flush()
+        os.fsync(bin_file.fileno())
+    os.replace(tmp_path, bin_path)
+
+
+class BinaryTaskTracker(LazyTaskTracker):
+    """TaskTracker over a memory-mapped file of fixed-width records and an append-only string heap.
+
+    Listing scans the record table and only decodes the descriptions it returns. Saving patches the
+    records of changed tasks in place and appends new descriptions to the heap; the file is only
+    rewritten when the record table is full.
+    """
+
+    def __init__(self, bin_path: str) -> None:
+        super().__init__()
+        self.bin_path = bin_path
+        self.removed: set[str] = set()
+        self._open_map()
+
+    def _open_map(self) -> None:
+        self._file = open(self.bin_path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, record_size, self.count, self.capacity, self.heap_end = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f'{self.bin_path} is not a task database')
+        self.slots: dict[str, int] = {}
+        for slot, record in self._records():
+            if not record[2] & FLAG_DELETED:
+                self.slots[str(record[0])] = slot
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _records(self) -> Iterator[tuple[int, tuple]]:
+        for chunk_start in range(0, self.count, SCAN_CHUNK_RECORDS):
+            chunk_end = min(self.count, chunk_start + SCAN_CHUNK_RECORDS)
+            chunk = self._map[HEADER_SIZE + chunk_start * RECORD.size:HEADER_SIZE + chunk_end * RECORD.size]
+            yield from enumerate(RECORD.iter_unpack(chunk), start=chunk_start)
+
+    def _record(self, slot: int) -> tuple:
+        return RECORD.unpack_from(self._map, HEADER_SIZE + slot * RECORD.size)
+
+    def _description(self, record: tuple) -> Optional[str]:
+        if record[2] & FLAG_NO_DESCRIPTION:
+            return None
+        return self._map[record[5]:record[5] + record[6]].decode('utf-8')
+
+    def _record_task(self, record: tuple) -> TaskProperties:
+        return {
+            'task_id': str(record[0]),
+            'description': self._description(record),
+            'status': STATUS_NAMES[record[1]],
+            'createdAt': micros_to_iso(record[3]),
+            'updatedAt': micros_to_iso(record[4])
+        }
+
+    def __getitem__(self, task_id: str) -> TaskProperties:
+        if dict.__contains__(self, task_id):
+            return dict.__getitem__(self, task_id)
+        slot = self.slots.get(task_id)
+        if slot is None or task_id in self.removed:
+            raise KeyError(task_id)
+        task = self._record_task(self._record(slot))
+        dict.__setitem__(self, task_id, task)
+        return task
+
+    def __setitem__(self, task_id: str, task: TaskProperties) -> None:
+        dict.__setitem__(self, task_id, task)
+        self.removed.discard(task_id)
+
+    def __delitem__(self, task_id: str) -> None:
+        if task_id not in self:
+            raise KeyError(task_id)
+        dict.pop(self, task_id, None)
+        if task_id in self.slots:
+            self.removed.add(task_id)
+
+    def __contains__(self, task_id: object) -> bool:
+        return dict.__contains__(self, task_id) or (task_id in self.slots and task_id not in self.removed)
+
+    def __len__(self) -> int:
+        added = sum(1 for task_id in dict.keys(self) if task_id not in self.slots)
+        return len(self.slots) - len(self.removed) + added
+
+    def __iter__(self) -> Iterator[str]:
+        for task_id in self.slots:
+            if task_id not in self.removed:
+                yield task_id
+        for task_id in dict.keys(self):
+            if task_id not in self.slots:
+                yield task_id
+
+    def items(self) -> Iterator[tuple[str, TaskProperties]]:
+        return self._scan()
+
+    def tasks(self, status: Optional[STATUS] = None) -> Iterator[TaskProperties]:
+        for _, task in self._scan(status):
+            yield task
+
+    def _scan(self, status: Optional[STATUS] = None) -> Iterator[tuple[str, TaskProperties]]:
+        status_code = STATUS_CODES[status] if status else None
+        for _, record in self._records():
+            if record[2] & FLAG_DELETED:
+                continue
+            task_id = str(record[0])
+            if task_id in self.removed:
+                continue
+            if dict.__contains__(self, task_id):
+                task = dict.__getitem__(self, task_id)
+                if not status or task['status'] == status:
+                    yield task_id, task
+            elif status_code is None or record[1] == status_code:
+                yield task_id, self._record_task(record)
+        for task_id, task in dict.items(self):
+            if task_id not in self.slots and (not status or task['status'] == status):
+                yield task_id, task
+
+    def _rebuild(self, capacity: int) -> None:
+        tasks = dict(self.items())
+        self.close()
+        write_binary(tasks, self.bin_path, capacity)
+        dict.clear(self)
+        self.removed.clear()
+        self._open_map()
+
+    def _ensure_heap(self, size: int) -> None:
+        if self.heap_end + size <= len(self._map):
+            return
+        new_size = max(2 * len(self._map), self.heap_end + size)
+        self._map.close()
+        self._file.truncate(new_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _append_description(self, description: bytes) -> int:
+        offset = self.heap_end
+        self._map[offset:offset + len(description)] = description
+        self.heap_end += len(description)
+        return offset
+
+    def flush(self) -> None:
+        added = [task_id for task_id in self.dirty if dict.__contains__(self, task_id) and task_id not in self.slots]
+        if self.count + len(added) > self.capacity:
+            self._rebuild(2 * max(self.capacity, len(self) + 1))
+            self.dirty.clear()
+            return
+
+        # Walking the cache rather than the dirty set keeps new tasks in the order they were added.
+        descriptions = {
+            task_id: _encode_description(task['description'])
+            for task_id, task in dict.items(self) if task_id in self.dirty
+        }
+        self._ensure_heap(sum(len(description) for description, _ in descriptions.values()))
+
+        for task_id in self.removed & self.dirty:
+            slot = self.slots.pop(task_id)
+            record = list(self._record(slot))
+            record[2] |= FLAG_DELETED
+            RECORD.pack_into(self._map, HEADER_SIZE + slot * RECORD.size, *record)
+            self.removed.discard(task_id)
+
+        # Descriptions go to the heap before the records pointing at them, and the header is written last.
+        for task_id, (description, flags) in descriptions.items():
+            slot = self.slots.get(task_id)
+            if slot is None:
+                slot = self.count
+                self.count += 1
+                self.slots[task_id] = slot
+                offset = self._append_description(description)
+            else:
+                record = self._record(slot)
+                offset = record[5]
+                if record[6] != len(description) or self._map[offset:offset + record[6]] != description:
+                    offset = self._append_description(description)
+            self._map[HEADER_SIZE + slot * RECORD.size:HEADER_SIZE + (slot + 1) * RECORD.size] = _pack_record(
+                task_id, dict.__getitem__(self, task_id), offset, len(description), flags
+            )
+
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD.size, self.count, self.capacity, self.heap_end)
+        self._map.flush()
+        self.dirty.clear()
+
+
+def open_binary(path: str) -> BinaryTaskTracker:
+    try:
+        from .storage import open_json, read_meta, write_meta
+    except ImportError:
+        from storage import open_json, read_meta, write_meta
+
+    bin_path = binary_path(path)
+    if not os.path.exists(bin_path):
+        # The first open migrates an existing json database, ids sequence included.
+        task_tracker = open_json(path)
+        write_meta(task_tracker, bin_path)
+        write_binary(task_tracker, bin_path)
+    task_tracker = BinaryTaskTracker(bin_path)
+    task_tracker.meta = read_meta(bin_path)
+    return task_tracker
+
+
+def save_binary(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    try:
+        from .storage import write_meta
+    except ImportError:
+        from storage import write_meta
+
+    bin_path = binary_path(path)
+    write_meta(task_tracker, bin_path)
+    if isinstance(task_tracker, BinaryTaskTracker):
+        task_tracker.flush()
+    else:
+        write_binary(task_tracker, bin_path)
@@ -0,0 +1,3 @@
+import os
+
+JSON_DB_PATH = os.environ.get('TASKI_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'task_tracker_db')
@@ -0,0 +1,300 @@
+import os
+from heapq import merge
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    from .models import STATUS, TaskProperties, TaskTracker, iso_to_micros
+    from .locking import lock_store
+    from .serializer import decode, encode
+    from .search_index import SearchIndex, build_index, tokenize
+    from .time_index import TimeIndex, build_time_index
+except ImportError:
+    from models import STATUS, TaskProperties, TaskTracker, iso_to_micros
+    from locking import lock_store
+    from serializer import decode, encode
+    from search_index import SearchIndex, build_index, tokenize
+    from time_index import TimeIndex, build_time_index
+
+# sqlite3 is imported by the commands reading the indexes: writers only append to the log.
+
+INDEX_DB_SUFFIX = '.index.db'
+INDEX_LOG_SUFFIX = '.index.log'
+INDEX_SCHEMA = 2
+INDEX_LOG_MIN_BYTES = 1 << 20
+SQLITE_TIMEOUT = 60
+QUERY_CHUNK = 500
+
+TASK_COLUMNS = ('task_id', 'description', 'status', 'createdAt', 'updatedAt')
+# The timestamps again as microseconds, which sort and compare like the time index entries.
+TIME_COLUMNS = {'createdAt': 'created', 'updatedAt': 'updated'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    description TEXT,
+    status TEXT NOT NULL,
+    createdAt TEXT NOT NULL,
+    updatedAt TEXT NOT NULL,
+    created INTEGER NOT NULL,
+    updated INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks (updated, task_id);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    PRIMARY KEY (token, task_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+UPSERT_META = 'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)'
+
+
+def index_db_path(path: str) -> str:
+    return path + INDEX_DB_SUFFIX
+
+
+def index_log_path(path: str) -> str:
+    return path + INDEX_LOG_SUFFIX
+
+
+def log_changes(task_tracker: TaskTracker, path: str, version: int) -> None:
+    """Appends the tasks changed since the last save to the index log, as one line for store version ``version``.
+
+    Nothing is logged while no index database exists, the first search builds it from the store anyway.
+    """
+    changes, task_tracker.index_changes = task_tracker.index_changes, {}
+    try:
+        db_size = os.path.getsize(index_db_path(path))
+    except FileNotFoundError:
+        return
+    line = encode({'version': version, 'tasks': changes}, compact=True) + b'\n'
+    with open(index_log_path(path), 'ab') as log_file:
+        log_file.write(line)
+        log_size = log_file.tell()
+    if log_size > max(INDEX_LOG_MIN_BYTES, db_size):
+        # Replaying more than the database holds costs more than rebuilding it, which the gap left here triggers.
+        os.remove(index_log_path(path))
+
+
+def _insert(connection: Any, task_id: str, task: TaskProperties) -> None:
+    connection.execute(
+        f'INSERT INTO tasks ({", ".join(TASK_COLUMNS)}, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+            task_id, task['description'], task['status'], task['createdAt'], task['updatedAt'],
+            iso_to_micros(task['createdAt']), iso_to_micros(task['updatedAt'])
+        )
+    )
+    connection.executemany('INSERT INTO postings (token, task_id) VALUES (?, ?)', ((token, task_id) for token in tokenize(task['description'])))
+
+
+def _apply(connection: Any, task_id: str, task: Optional[TaskProperties]) -> None:
+    row = connection.execute('SELECT description FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+    if row is not None:
+        connection.executemany('DELETE FROM postings WHERE token = ? AND task_id = ?', ((token, task_id) for token in tokenize(row[0])))
+        connection.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+    if task is not None:
+        _insert(connection, task_id, task)
+
+
+def _rebuild(connection: Any, task_tracker: dict[str, TaskProperties]) -> None:
+    connection.execute('DELETE FROM tasks')
+    connection.execute('DELETE FROM postings')
+    for task_id, task in task_tracker.items():
+        _insert(connection, task_id, task)
+
+
+def _replay(connection: Any, path: str, version: Optional[int], offset: int, target: int) -> tuple[Optional[int], int]:
+    """Applies the log lines following ``version`` up to ``target``; stops at a gap or a torn line."""
+    try:
+        log_file = open(index_log_path(path), 'rb')
+    except FileNotFoundError:
+        return version, 0
+    with log_file:
+        log_file.seek(offset)
+        for line in log_file:
+            if version is None or version == target or not line.endswith(b'\n'):
+                break
+            try:
+                record = decode(line)
+            except ValueError:
+                break
+            if record['version'] == version + 1:
+                for task_id, task in record['tasks'].items():
+                    _apply(connection, task_id, task)
+                version += 1
+            elif record['version'] > version:
+                break
+            offset += len(line)
+    return version, offset
+
+
+def _connect(path: str) -> Any:
+    import sqlite3
+    connection = sqlite3.connect(index_db_path(path), timeout=SQLITE_TIMEOUT, isolation_level=None)
+    schema = connection.execute('PRAGMA user_version').fetchone()[0]
+    if schema not in (0, INDEX_SCHEMA):
+        connection.close()
+        os.remove(index_db_path(path))
+        connection = sqlite3.connect(index_db_path(path), timeout=SQLITE_TIMEOUT, isolation_level=None)
+        schema = 0
+    # The database only mirrors the store: losing it to a crash costs a rebuild, not data.
+    connection.execute('PRAGMA synchronous = OFF')
+    if schema == 0:
+        connection.executescript(SCHEMA)
+        connection.execute(f'PRAGMA user_version = {INDEX_SCHEMA}')
+    return connection
+
+
+def sync_index(path: str, task_tracker: TaskTracker) -> Any:
+    """Opens the index database of the store at ``path``, shared by the search and timestamp indexes, and brings it to the version of the tracker.
+
+    The lines the writers logged since the last sync are applied, which costs in proportion to the
+    changes; a database that can not be caught up that way is rebuilt from the tracker.
+    """
+    with lock_store(path, exclusive=False):
+        connection = _connect(path)
+        if connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone() == (task_tracker.version,):
+            # Writers wait for the store lock held here, so an index at the version of the tracker stays there.
+            return connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            meta = dict(connection.execute('SELECT key, value FROM meta'))
+            version, offset = meta.get('version'), meta.get('offset', 0)
+            target = task_tracker.version
+            if version != target:
+                version, offset = _replay(connection, path, version, offset, target)
+            stored_version = version
+            if version != target:
+                _rebuild(connection, task_tracker)
+                version, offset = target, _log_size(path)
+                # A rebuild takes in the changes the tracker has not saved yet, so it matches no store version
+                # and the next sync starts over, unless the tracker had none.
+                stored_version = -1 if task_tracker.index_changes else target
+            consumed = offset > 0 and offset == _log_size(path)
+            connection.executemany(UPSERT_META, (('version', stored_version), ('offset', 0 if consumed else offset)))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            connection.close()
+            raise
+        if consumed:
+            # Nothing can be appended while the log is emptied either.
+            os.truncate(index_log_path(path), 0)
+    return connection
+
+
+def _log_size(path: str) -> int:
+    try:
+        return os.path.getsize(index_log_path(path))
+    except FileNotFoundError:
+        return 0
+
+
+class StoredIndex:
+    """Index read from the index database, with the changes the tracker has not saved yet laid over it."""
+
+    def __init__(self, connection: Any, pending: dict[str, Optional[TaskProperties]]) -> None:
+        self.connection = connection
+        self.pending = pending
+
+    def _chunks(self, task_ids: Iterable[str]) -> Iterator[list[str]]:
+        task_ids = list(task_ids)
+        for start in range(0, len(task_ids), QUERY_CHUNK):
+            yield task_ids[start:start + QUERY_CHUNK]
+
+    def tasks_by_id(self, task_ids: Iterable[str]) -> Iterator[TaskProperties]:
+        for chunk in self._chunks(task_ids):
+            stored = {
+                row[0]: dict(zip(TASK_COLUMNS, row)) for row in self.connection.execute(
+                    f'SELECT {", ".join(TASK_COLUMNS)} FROM tasks WHERE task_id IN ({", ".join("?" * len(chunk))})', chunk
+                )
+            }
+            for task_id in chunk:
+                task = self.pending[task_id] if task_id in self.pending else stored.get(task_id)
+                if task is not None:
+                    yield task
+
+
+class StoredSearchIndex(StoredIndex, SearchIndex):
+
+    def __init__(self, connection: Any, pending: dict[str, Optional[TaskProperties]]) -> None:
+        StoredIndex.__init__(self, connection, pending)
+        SearchIndex.__init__(self)
+
+    def _match(self, token: str, prefix: bool) -> set[str]:
+        if not prefix:
+            rows = self.connection.execute('SELECT task_id FROM postings WHERE token = ?', (token,))
+        else:
+            # Every token starting with ``token`` sorts between it and the same string with its last character bumped.
+            rows = self.connection.execute(
+                'SELECT task_id FROM postings WHERE token >= ? AND token < ?', (token, token[:-1] + chr(ord(token[-1]) + 1))
+            )
+        return {task_id for (task_id,) in rows}
+
+    def _all(self) -> set[str]:
+        return {task_id for (task_id,) in self.connection.execute('SELECT task_id FROM tasks')}
+
+    def _with_status(self, task_ids: set[str], status: STATUS) -> set[str]:
+        matched: set[str] = set()
+        for chunk in self._chunks(task_ids):
+            matched.update(task_id for (task_id,) in self.connection.execute(
+                f'SELECT task_id FROM tasks WHERE status = ? AND task_id IN ({", ".join("?" * len(chunk))})', (status, *chunk)
+            ))
+        return matched
+
+    def search(self, terms: Iterable[str], status: Optional[STATUS] = None) -> set[str]:
+        terms = list(terms)
+        task_ids = super().search(terms, status) - self.pending.keys()
+        unsaved = {task_id: task for task_id, task in self.pending.items() if task is not None}
+        return task_ids | build_index(unsaved).search(terms, status)
+
+
+class StoredTimeIndex(StoredIndex, TimeIndex):
+
+    def __init__(self, connection: Any, pending: dict[str, Optional[TaskProperties]]) -> None:
+        StoredIndex.__init__(self, connection, pending)
+        TimeIndex.__init__(self)
+        self.unsaved = build_time_index({task_id: task for task_id, task in pending.items() if task is not None})
+
+    def _range(self, field: str, after: Optional[int], before: Optional[int], include_after: bool) -> Iterator[tuple[int, str]]:
+        column = TIME_COLUMNS[field]
+        conditions, parameters = [], []
+        if after is not None:
+            conditions.append(f'{column} >= ?' if include_after else f'{column} > ?')
+            parameters.append(after)
+        if before is not None:
+            conditions.append(f'{column} < ?')
+            parameters.append(before)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        rows = self.connection.execute(f'SELECT {column}, task_id FROM tasks {where} ORDER BY {column}, task_id', parameters)
+        stored = ((micros, task_id) for micros, task_id in rows if task_id not in self.pending)
+        return merge(stored, self.unsaved._range(field, after, before, include_after))
+
+
+def load_index(path: str, task_tracker: dict[str, TaskProperties]) -> SearchIndex:
+    """Returns the search index of the store at ``path``, or one built in memory for a tracker that was not opened from a store."""
+    if getattr(task_tracker, 'version', None) is None:
+        return build_index(task_tracker)
+    return StoredSearchIndex(sync_index(path, task_tracker), task_tracker.index_changes)
+
+
+def fetch_tasks(index: Any, task_tracker: dict[str, TaskProperties], task_ids: Iterable[str]) -> Iterator[TaskProperties]:
+    """Yields the tasks of ``task_ids`` from the index database when ``index`` is stored, from the tracker otherwise."""
+    if isinstance(index, StoredIndex):
+        return index.tasks_by_id(task_ids)
+    if isinstance(task_tracker, TaskTracker):
+        return task_tracker.tasks_by_id(task_ids)
+    return (task_tracker[task_id] for task_id in task_ids if task_id in task_tracker)
+
+
+def load_time_index(path: str, task_tracker: dict[str, TaskProperties]) -> TimeIndex:
+    """Returns the timestamp index of the store at ``path``, or one built in memory for a tracker that was not opened from a store."""
+    if getattr(task_tracker, 'version', None) is None:
+        return build_time_index(task_tracker)
+    return StoredTimeIndex(sync_index(path, task_tracker), task_tracker.index_changes)
@@ -0,0 +1,161 @@
+import os
+from datetime import datetime
+from typing import Iterator, Mapping, NotRequired, Optional, TypedDict
+
+try:
+    from .models import TASK_FIELDS, TaskProperties, TaskTracker, iso_to_micros
+    from .storage import _fsync_write, _write_atomic
+    from .serializer import decode, decode_tasks, encode
+except ImportError:
+    from models import TASK_FIELDS, TaskProperties, TaskTracker, iso_to_micros
+    from storage import _fsync_write, _write_atomic
+    from serializer import decode, decode_tasks, encode
+
+JOURNAL_SUFFIX = '.journal'
+SNAPSHOTS_SUFFIX = '.snapshots'
+SNAPSHOT_BYTES = 1 << 20
+
+class JournalRecord(TypedDict):
+    """One task change: the whole task when it was added or deleted, only the changed fields when updated."""
+    txn: NotRequired[int]
+    at: NotRequired[str]
+    id: str
+    before: Optional[dict]
+    after: Optional[dict]
+    undoes: NotRequired[int]
+
+
+def journal_enabled() -> bool:
+    return os.environ.get('TASKI_JOURNAL', 'on') != 'off'
+
+
+def journal_path(path: str) -> str:
+    return path + JOURNAL_SUFFIX
+
+
+def snapshots_path(path: str) -> str:
+    return path + SNAPSHOTS_SUFFIX
+
+
+def _snapshot_bytes() -> int:
+    return int(os.environ.get('TASKI_SNAPSHOT_BYTES') or SNAPSHOT_BYTES)
+
+
+def diff(before: Optional[Mapping], after: Optional[Mapping]) -> tuple[Optional[dict], Optional[dict]]:
+    if before is None or after is None:
+        return (None if before is None else dict(before)), (None if after is None else dict(after))
+    changed = [field for field in TASK_FIELDS if before.get(field) != after.get(field)]
+    return {field: before.get(field) for field in changed}, {field: after.get(field) for field in changed}
+
+
+def record_change(task_tracker: TaskTracker, task_id: str, before: Optional[Mapping], after: Optional[Mapping], undoes: Optional[int] = None) -> None:
+    """Queues the change on the tracker; ``write_journal`` appends the queue when the tracker is saved."""
+    if not journal_enabled():
+        return
+    old, new = diff(before, after)
+    record: JournalRecord = {'id': task_id, 'before': old, 'after': new}
+    if undoes is not None:
+        record['undoes'] = undoes
+    task_tracker.changes.append(record)
+
+
+def apply_record(tasks: dict[str, TaskProperties], record: JournalRecord, reverse: bool = False) -> None:
+    """Applies a change to plain task dicts, or takes it back when ``reverse`` is set."""
+    old, new = (record['after'], record['before']) if reverse else (record['before'], record['after'])
+    task_id = record['id']
+    if new is None:
+        tasks.pop(task_id, None)
+    elif old is None:
+        tasks[task_id] = dict(new)
+    elif task_id in tasks:
+        tasks[task_id] = {**tasks[task_id], **new}
+
+
+def _snapshot_files(path: str) -> list[tuple[int, int, str]]:
+    """Returns ``(journal offset, micros, file)`` of every snapshot, oldest first."""
+    folder = snapshots_path(path)
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for name in names:
+        offset, _, micros = name.removesuffix('.json').partition('-')
+        if name.endswith('.json') and offset.isdigit() and micros.isdigit():
+            snapshots.append((int(offset), int(micros), os.path.join(folder, name)))
+    return sorted(snapshots)
+
+
+def save_snapshot(path: str, tasks: Mapping[str, TaskProperties], offset: int, micros: int) -> None:
+    # Named by journal offset and time, so picking one never needs to open it.
+    os.makedirs(snapshots_path(path), exist_ok=True)
+    _write_atomic(encode(dict(tasks), compact=True), os.path.join(snapshots_path(path), f'{offset:015}-{micros:020}.json'))
+
+
+def write_journal(task_tracker: TaskTracker, path: str, txn: int) -> None:
+    """Appends the queued changes as transaction ``txn``, taking a snapshot first and then every ``SNAPSHOT_BYTES``."""
+    if not task_tracker.changes:
+        return
+    now = datetime.now().isoformat()
+    records = task_tracker.changes
+    task_tracker.changes = []
+    snapshots = _snapshot_files(path)
+    if not snapshots:
+        # The state before the first journaled change is the base every reconstruction starts from.
+        tasks = {task_id: dict(task) for task_id, task in task_tracker.items()}
+        for record in reversed(records):
+            apply_record(tasks, record, reverse=True)
+        save_snapshot(path, tasks, 0, 0)
+        snapshots = [(0, 0, '')]
+    data = b''.join(encode({'txn': txn, 'at': now, **record}, compact=True) + b'\n' for record in records)
+    _fsync_write(journal_path(path), data, 'a')
+    offset = os.path.getsize(journal_path(path))
+    if offset - snapshots[-1][0] >= _snapshot_bytes():
+        save_snapshot(path, task_tracker, offset, iso_to_micros(now))
+
+
+def read_journal(path: str, offset: int = 0, task_id: Optional[str] = None) -> Iterator[JournalRecord]:
+    try:
+        journal = open(journal_path(path), 'rb')
+    except FileNotFoundError:
+        return
+    # Lines of other tasks are skipped before being decoded.
+    needle = encode({'id': task_id}, compact=True)[1:-1] if task_id is not None else b''
+    with journal:
+        journal.seek(offset)
+        for line in journal:
+            if line.endswith(b'\n') and needle in line:
+                record = decode(line)
+                if task_id is None or record['id'] == task_id:
+                    yield record
+
+
+def state_at(path: str, timestamp: str) -> dict[str, TaskProperties]:
+    """Rebuilds the tasks as they were at ``timestamp`` from the last snapshot before it and the journal after that."""
+    micros = iso_to_micros(timestamp)
+    snapshots = [snapshot for snapshot in _snapshot_files(path) if snapshot[1] <= micros]
+    if not snapshots:
+        return {}
+    offset, _, snapshot_file = snapshots[-1]
+    with open(snapshot_file, 'rb') as snapshot:
+        tasks = decode_tasks(snapshot.read())
+    for record in read_journal(path, offset):
+        if iso_to_micros(record['at']) > micros:
+            break
+        apply_record(tasks, record)
+    return tasks
+
+
+def last_undoable(path: str) -> tuple[Optional[int], list[JournalRecord]]:
+    """Returns the newest transaction that is neither an undo nor undone yet, with its records."""
+    transactions: dict[int, list[JournalRecord]] = {}
+    undone: set[int] = set()
+    for record in read_journal(path):
+        if 'undoes' in record:
+            undone.add(record['undoes'])
+        else:
+            transactions.setdefault(record['txn'], []).append(record)
+    for txn in sorted(transactions, reverse=True):
+        if txn not in undone:
+            return txn, transactions[txn]
+    return None, []
@@ -0,0 +1,73 @@
+import os
+from _thread import allocate_lock
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    # Advisory locks are posix only; elsewhere the version stamp alone guards against lost updates.
+    fcntl = None
+
+LOCK_SUFFIX = '.lock'
+
+class ConflictError(RuntimeError):
+    """Raised when a tracker is saved over changes another writer made since it was opened."""
+
+
+_held: dict[str, list] = {}
+# The low level lock spares every command the import of threading.
+_held_guard = allocate_lock()
+
+
+def lock_path(path: str) -> str:
+    return path + LOCK_SUFFIX
+
+
+@contextmanager
+def lock_store(path: str, exclusive: bool = True) -> Iterator[None]:
+    """Holds an advisory lock on the store at ``path`` for the duration of the block.
+
+    Writers take it exclusively and readers shared. The lock is reentrant within a process, so a
+    shared request inside an exclusive block is a no-op and an exclusive one upgrades the held lock.
+    """
+    with _held_guard:
+        entry = _held.get(path)
+        if entry is None:
+            fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+            entry = _held[path] = [fd, False, 0]
+    fd, was_exclusive, _ = entry
+    upgrade = exclusive and not was_exclusive
+    if fcntl is not None and (entry[2] == 0 or upgrade):
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    entry[1] = was_exclusive or exclusive
+    entry[2] += 1
+    try:
+        yield
+    finally:
+        entry[2] -= 1
+        if entry[2] == 0:
+            with _held_guard:
+                del _held[path]
+            os.close(fd)
+        elif upgrade:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            entry[1] = False
+
+
+def read_version(path: str) -> int:
+    """Returns the number of saves made to the store at ``path``, kept in its lock file."""
+    try:
+        with open(lock_path(path), 'r', encoding='utf-8') as lock_file:
+            return int(lock_file.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def write_version(path: str, version: int) -> None:
+    # Rewritten in place: replacing the lock file would hand later writers a different inode to lock.
+    with open(lock_path(path), 'r+', encoding='utf-8') as lock_file:
+        lock_file.write(f'{version:<20}\n')
+        lock_file.flush()
+        os.fsync(lock_file.fileno())
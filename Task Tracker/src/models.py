@@ -0,0 +1,235 @@
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, Optional, Literal, TypedDict, get_args
+
+STATUS = Literal['todo', 'in-progress', 'done']
+
+STATUS_NAMES: tuple[STATUS, ...] = get_args(STATUS)
+STATUS_CODES: dict[str, int] = {status: code for code, status in enumerate(STATUS_NAMES)}
+
+TASK_FIELDS = ('task_id', 'description', 'status', 'createdAt', 'updatedAt')
+REQUIRED_FIELDS = frozenset(TASK_FIELDS)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+class TaskProperties(TypedDict):
+    task_id: str
+    description: Optional[str]
+    status: STATUS
+    createdAt: str
+    updatedAt: str
+
+
+class TaskTracker(dict):
+    """Tasks keyed by id that remembers which ids were touched since it was loaded.
+
+    ``meta`` holds store-wide values persisted next to the tasks, such as the last allocated id.
+    ``version`` is the store version it was loaded at, checked when it is saved back.
+    ``index_changes`` maps the ids changed since it was last saved to their task, or None once deleted.
+    ``meta_dirty`` flags a change of ``meta`` alone, which no task id in ``dirty`` would account for.
+    ``source`` is the store path and backend it was opened from, where saving it unchanged is a no-op.
+    ``changes`` queues the journal records of its changes until it is saved.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.dirty: set[str] = set()
+        self.meta: dict[str, Any] = {}
+        self.version: Optional[int] = None
+        self.index_changes: dict[str, Any] = {}
+        self.meta_dirty = False
+        self.source: Optional[tuple[str, str]] = None
+        self.changes: list[dict] = []
+
+    def changed(self) -> bool:
+        return bool(self.dirty) or self.meta_dirty
+
+    def mark_dirty(self, task_id: str) -> None:
+        self.dirty.add(task_id)
+
+    def allocate_id(self) -> str:
+        last_id = self.meta.get('last_id')
+        if last_id is None:
+            # Stores written before the id sequence existed pay for one scan, then never again.
+            last_id = max(map(int, self.keys()), default=0)
+        last_id += 1
+        while str(last_id) in self:
+            last_id += 1
+        self.meta['last_id'] = last_id
+        return str(last_id)
+
+    def tasks(self, status: Optional[STATUS] = None) -> Iterator[TaskProperties]:
+        for task in self.values():
+            if not status or task['status'] == status:
+                yield task
+
+    def tasks_by_id(self, task_ids: Iterable[str]) -> Iterator[TaskProperties]:
+        for task_id in task_ids:
+            task = self.get(task_id)
+            if task is not None:
+                yield task
+
+
+def iso_to_micros(timestamp: str) -> int:
+    return (datetime.fromisoformat(timestamp).replace(tzinfo=None) - EPOCH) // MICROSECOND
+
+
+def micros_to_iso(micros: int) -> str:
+    return (EPOCH + micros * MICROSECOND).isoformat()
+
+
+def validate_task(task: Mapping) -> None:
+    if not isinstance(task, Mapping) or not REQUIRED_FIELDS.issubset(task):
+        raise ValueError(f"Missing required fields in task: {task}")
+
+
+class Task(MutableMapping):
+    """Slotted task holding its status as a small int and its timestamps as microseconds since epoch.
+
+    It reads and writes like a ``TaskProperties`` dict, so the task functions work on it unchanged.
+    """
+
+    __slots__ = ('task_id', 'description', 'status_code', 'created', 'updated')
+
+    def __init__(self, task_id: str, description: Optional[str], status_code: int, created: int, updated: int) -> None:
+        self.task_id = task_id
+        self.description = description
+        self.status_code = status_code
+        self.created = created
+        self.updated = updated
+
+    @classmethod
+    def from_dict(cls, task: Mapping, task_id: Optional[str] = None) -> 'Task':
+        if task['status'] not in STATUS_CODES:
+            raise ValueError(f"Status only accepts following args -> {STATUS_NAMES}")
+        return cls(
+            task_id if task_id is not None else task['task_id'],
+            task['description'],
+            STATUS_CODES[task['status']],
+            iso_to_micros(task['createdAt']),
+            iso_to_micros(task['updatedAt'])
+        )
+
+    def __getitem__(self, field: str) -> Any:
+        if field == 'task_id':
+            return self.task_id
+        if field == 'description':
+            return self.description
+        if field == 'status':
+            return STATUS_NAMES[self.status_code]
+        if field == 'createdAt':
+            return micros_to_iso(self.created)
+        if field == 'updatedAt':
+            return micros_to_iso(self.updated)
+        raise KeyError(field)
+
+    def __setitem__(self, field: str, value: Any) -> None:
+        if field == 'task_id':
+            self.task_id = value
+        elif field == 'description':
+            self.description = value
+        elif field == 'status':
+            self.status_code = STATUS_CODES[value]
+        elif field == 'createdAt':
+            self.created = iso_to_micros(value)
+        elif field == 'updatedAt':
+            self.updated = iso_to_micros(value)
+        else:
+            raise KeyError(field)
+
+    def __delitem__(self, field: str) -> None:
+        raise TypeError('Task fields can not be deleted')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(TASK_FIELDS)
+
+    def __len__(self) -> int:
+        return len(TASK_FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def copy(self) -> TaskProperties:
+        return dict(self)
+
+
+class CompactTaskTracker(TaskTracker):
+    """TaskTracker that stores every task as a ``Task`` instead of a dict, using a fraction of the memory."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, task_id: str, task: Mapping) -> None:
+        if not isinstance(task, Task):
+            task = Task.from_dict(task, task_id)
+        elif task.task_id == task_id:
+            # Share the key string instead of keeping an equal copy inside the task.
+            task.task_id = task_id
+        super().__setitem__(task_id, task)
+
+    def update(self, *args, **kwargs) -> None:
+        for task_id, task in dict(*args, **kwargs).items():
+            self[task_id] = task
+
+    def tasks(self, status: Optional[STATUS] = None) -> Iterator[TaskProperties]:
+        if not status:
+            yield from self.values()
+            return
+        status_code = STATUS_CODES[status]
+        for task in self.values():
+            if task.status_code == status_code:
+                yield task
+
+
+_MISSING = object()
+
+
+class LazyTaskTracker(TaskTracker):
+    """TaskTracker whose tasks live in a backing store.
+
+    Subclasses provide ``items``, lookups and mutations; the dict itself only caches the tasks they touch.
+    """
+
+    __hash__ = None
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        try:
+            return self[task_id]
+        except KeyError:
+            return default
+
+    def pop(self, task_id: str, default: Any = _MISSING) -> Any:
+        try:
+            task = self[task_id]
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+        del self[task_id]
+        return task
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def values(self) -> Iterator[TaskProperties]:
+        return self.tasks()
+
+    def tasks(self, status: Optional[STATUS] = None) -> Iterator[TaskProperties]:
+        for _, task in self.items():
+            if not status or task['status'] == status:
+                yield task
+
+    def __iter__(self) -> Iterator[str]:
+        for task_id, _ in self.items():
+            yield task_id
+
+    def __eq__(self, other: object) -> bool:
+        return dict(self.items()) == other
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self.items())!r})'
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+from time import perf_counter
+from datetime import datetime
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Iterator, Optional
+
+TRACE_ENV = 'TASKI_TRACE'
+TRACE_FILE_ENV = 'TASKI_TRACE_FILE'
+PROFILE_DUMP_ENV = 'TASKI_PROFILE_DUMP'
+
+PROFILE_FLAG = '--profile'
+OUTPUT_FLAG = '--profile-output'
+DUMP_FLAG = '--profile-dump'
+
+STORE_PREFIX = 'tasks'
+
+_NO_PHASE = nullcontext()
+
+
+class Trace:
+    """Timings of the phases of one taski command, and the sizes of the store files around it.
+
+    ``report`` prints them to stderr, ``output`` appends them as a json line to a metrics file and
+    ``dump`` writes a cProfile dump of the whole command.
+    """
+
+    def __init__(self, argv: list[str], folder_name: str, report: bool = True, output: Optional[str] = None, dump: Optional[str] = None) -> None:
+        self.argv = argv
+        self.folder_name = folder_name
+        self.report = report
+        self.output = output
+        self.dump = dump
+        self.phases: dict[str, float] = {}
+        self.files_before = self.file_sizes()
+        self.profiler: Any = None
+        if dump:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.started = datetime.now()
+        self.start = perf_counter()
+
+    def file_sizes(self) -> dict[str, int]:
+        try:
+            entries = os.scandir(self.folder_name)
+        except FileNotFoundError:
+            return {}
+        with entries:
+            return {entry.name: entry.stat().st_size for entry in entries if entry.name.startswith(STORE_PREFIX) and entry.is_file()}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            # A phase entered more than once, like the saves of a retried update, adds up.
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    def record(self, error: Optional[BaseException] = None) -> dict[str, Any]:
+        return {
+            'timestamp': self.started.isoformat(),
+            'command': self.argv[0] if self.argv else None,
+            'argv': self.argv,
+            'backend': os.environ.get('TASKI_BACKEND') or 'json',
+            'total_seconds': perf_counter() - self.start,
+            'phases': self.phases,
+            'files': {'before': self.files_before, 'after': self.file_sizes()},
+            'error': None if error is None else f'{type(error).__name__}: {error}'
+        }
+
+    def finish(self, error: Optional[BaseException] = None) -> dict[str, Any]:
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.dump)
+        record = self.record(error)
+        if self.report:
+            print(format_record(record), file=sys.stderr)
+        if self.output:
+            # One write per record keeps lines from concurrent commands whole in the shared file.
+            with open(self.output, 'a', encoding='utf-8') as metrics_file:
+                metrics_file.write(json.dumps(record) + '\n')
+        return record
+
+
+_active: Optional[Trace] = None
+
+
+def phase(name: str) -> ContextManager:
+    """Times the block as ``name`` when a trace is running; a shared no-op context otherwise."""
+    if _active is None:
+        return _NO_PHASE
+    return _active.phase(name)
+
+
+def requested(argv: list[str]) -> bool:
+    return any(arg.startswith(PROFILE_FLAG) for arg in argv) or any(
+        os.environ.get(env) for env in (TRACE_ENV, TRACE_FILE_ENV, PROFILE_DUMP_ENV)
+    )
+
+
+def _take_option(argv: list[str], flag: str) -> Optional[str]:
+    for position, arg in enumerate(argv):
+        if arg.startswith(flag + '='):
+            del argv[position]
+            return arg[len(flag) + 1:]
+        if arg == flag and position + 1 < len(argv):
+            value = argv[position + 1]
+            del argv[position:position + 2]
+            return value
+    return None
+
+
+def start(argv: list[str], folder_name: str) -> tuple[Optional[Trace], list[str]]:
+    """Starts a trace when ``--profile`` options or the trace variables ask for one.
+
+    Returns it with ``argv`` stripped of the profiling options, or None and ``argv`` untouched.
+    """
+    global _active
+    if not requested(argv):
+        return None, argv
+    argv = list(argv)
+    output = _take_option(argv, OUTPUT_FLAG) or os.environ.get(TRACE_FILE_ENV)
+    dump = _take_option(argv, DUMP_FLAG) or os.environ.get(PROFILE_DUMP_ENV)
+    report = PROFILE_FLAG in argv or bool(os.environ.get(TRACE_ENV))
+    argv = [arg for arg in argv if arg != PROFILE_FLAG]
+    _active = Trace(argv, folder_name, report=report, output=output, dump=dump)
+    return _active, argv
+
+
+def finish(error: Optional[BaseException] = None) -> Optional[dict[str, Any]]:
+    global _active
+    if _active is None:
+        return None
+    trace, _active = _active, None
+    return trace.finish(error)
+
+
+def format_record(record: dict[str, Any]) -> str:
+    lines = [f"taski profile: {' '.join(record['argv'])}  total {record['total_seconds'] * 1000:.2f} ms"]
+    for name, seconds in record['phases'].items():
+        lines.append(f'  {name:<20}{seconds * 1000:>10.2f} ms')
+    before, after = record['files']['before'], record['files']['after']
+    for name in sorted(set(before) | set(after)):
+        lines.append(f'  {name:<20}{before.get(name, 0):>10} -> {after.get(name, 0)} bytes')
+    if record['error']:
+        lines.append(f"  failed with {record['error']}")
+    return '\n'.join(lines)
@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+try:
+    from .models import STATUS, STATUS_NAMES, TaskProperties
+except ImportError:
+    from models import STATUS, STATUS_NAMES, TaskProperties
+
+TOKEN_PATTERN = re.compile(r'\w+')
+OR_OPERATOR = 'OR'
+AND_OPERATOR = 'AND'
+PREFIX_WILDCARD = '*'
+
+
+def tokenize(text: Optional[str]) -> set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower())) if text else set()
+
+
+class SearchIndex:
+    """Inverted index from description tokens, and from statuses, to the ids of the tasks holding them.
+
+    ``index_store`` persists it; this in-memory one serves trackers that were not opened from a store.
+    """
+
+    def __init__(self, postings: Optional[dict[str, set[str]]] = None, statuses: Optional[dict[str, set[str]]] = None) -> None:
+        self.postings = postings if postings is not None else {}
+        self.statuses = statuses if statuses is not None else {status: set() for status in STATUS_NAMES}
+        # Sorted tokens for prefix lookups, rebuilt only after a token appears or disappears.
+        self._tokens: Optional[list[str]] = None
+
+    def add(self, task_id: str, task: TaskProperties) -> None:
+        for token in tokenize(task['description']):
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = set()
+                self._tokens = None
+            posting.add(task_id)
+        self.statuses[task['status']].add(task_id)
+
+    def remove(self, task_id: str, task: TaskProperties) -> None:
+        for token in tokenize(task['description']):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(task_id)
+            if not posting:
+                del self.postings[token]
+                self._tokens = None
+        self.statuses[task['status']].discard(task_id)
+
+    def _match(self, token: str, prefix: bool) -> set[str]:
+        if not prefix:
+            return self.postings.get(token, set())
+        if self._tokens is None:
+            self._tokens = sorted(self.postings)
+        matched: set[str] = set()
+        for position in range(bisect_left(self._tokens, token), len(self._tokens)):
+            if not self._tokens[position].startswith(token):
+                break
+            matched |= self.postings[self._tokens[position]]
+        return matched
+
+    def _all(self) -> set[str]:
+        return set().union(*self.statuses.values())
+
+    def _with_status(self, task_ids: set[str], status: STATUS) -> set[str]:
+        return task_ids & self.statuses[status]
+
+    def _match_group(self, terms: list[str]) -> set[str]:
+        matches = []
+        for term in terms:
+            prefix = term.endswith(PREFIX_WILDCARD)
+            tokens = TOKEN_PATTERN.findall(term.lower())
+            if not tokens:
+                if prefix:
+                    matches.append(self._all())
+                continue
+            # Only the last token of a term like "buy-gro*" is a prefix, the others must match exactly.
+            for position, token in enumerate(tokens):
+                matches.append(self._match(token, prefix and position == len(tokens) - 1))
+        if not matches:
+            return set()
+        matches.sort(key=len)
+        return matches[0].intersection(*matches[1:])
+
+    def search(self, terms: Iterable[str], status: Optional[STATUS] = None) -> set[str]:
+        """Returns the ids of tasks matching every term of any ``OR`` separated group.
+
+        A term ending with ``*`` matches every token it prefixes.
+        """
+        groups: list[list[str]] = [[]]
+        for term in terms:
+            if term == OR_OPERATOR:
+                groups.append([])
+            elif term != AND_OPERATOR:
+                groups[-1].append(term)
+        task_ids = set().union(*(self._match_group(group) for group in groups))
+        if status:
+            task_ids = self._with_status(task_ids, status)
+        return task_ids
+
+
+def build_index(task_tracker: dict[str, TaskProperties]) -> SearchIndex:
+    index = SearchIndex()
+    for task_id, task in task_tracker.items():
+        index.add(task_id, task)
+    return index
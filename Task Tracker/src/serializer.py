@@ -0,0 +1,180 @@
+import os
+import json
+import importlib
+from typing import Any, Callable, Optional, TypedDict
+
+try:
+    from .models import REQUIRED_FIELDS, Task, TaskProperties, validate_task
+except ImportError:
+    from models import REQUIRED_FIELDS, Task, TaskProperties, validate_task
+
+DEFAULT_SERIALIZER = 'auto'
+DEFAULT_STYLE = 'pretty'
+STYLES = ('pretty', 'compact')
+
+class SerializerProperties(TypedDict):
+    module: Optional[str]
+    dumps: Callable[[Any, bool], bytes]
+    loads: Callable[[str | bytes], Any]
+    load_tasks: Callable[[bytes, bool], dict[str, TaskProperties]]
+    help: str
+
+
+def serializers() -> dict[str, SerializerProperties]:
+    # Listed fastest first, which is the order ``auto`` tries them in.
+    return {
+        'msgspec': {
+            'module': 'msgspec',
+            'dumps': _msgspec_dumps,
+            'loads': _msgspec_loads,
+            'load_tasks': _msgspec_load_tasks,
+            'help': 'msgspec, decoding tasks straight into validated TaskProperties'
+        },
+        'orjson': {
+            'module': 'orjson',
+            'dumps': _orjson_dumps,
+            'loads': _orjson_loads,
+            'load_tasks': _orjson_load_tasks,
+            'help': 'orjson, a native encoder and decoder'
+        },
+        'json': {
+            'module': None,
+            'dumps': _json_dumps,
+            'loads': json.loads,
+            'load_tasks': _json_load_tasks,
+            'help': 'The json module of the standard library, always available'
+        }
+    }
+
+
+_modules: dict[str, Any] = {}
+
+
+def _module(name: str) -> Any:
+    """Imports an optional serializer library on first use; returns None when it is not installed."""
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+
+def get_serializer(serializer: Optional[str] = None) -> SerializerProperties:
+    available = serializers()
+    name = serializer or os.environ.get('TASKI_SERIALIZER') or DEFAULT_SERIALIZER
+    if name == DEFAULT_SERIALIZER:
+        return next(props for props in available.values() if props['module'] is None or _module(props['module']) is not None)
+    if name not in available:
+        raise ValueError(f"Serializer only accepts following args -> {(DEFAULT_SERIALIZER, *available)}")
+    props = available[name]
+    if props['module'] is not None and _module(props['module']) is None:
+        raise ValueError(f"Serializer {name} is not installed")
+    return props
+
+
+def get_style(style: Optional[str] = None) -> str:
+    style = style or os.environ.get('TASKI_JSON_STYLE') or DEFAULT_STYLE
+    if style not in STYLES:
+        raise ValueError(f"Json style only accepts following args -> {STYLES}")
+    return style
+
+
+def encode(obj: Any, compact: Optional[bool] = None, serializer: Optional[str] = None) -> bytes:
+    """Encodes ``obj`` as utf-8 json, indented unless ``compact`` or the ``compact`` style is set."""
+    if compact is None:
+        compact = get_style() == 'compact'
+    return get_serializer(serializer)['dumps'](obj, compact)
+
+
+def decode(data: str | bytes, serializer: Optional[str] = None) -> Any:
+    return get_serializer(serializer)['loads'](data)
+
+
+def decode_tasks(data: bytes, compact_model: bool = False, serializer: Optional[str] = None) -> dict[str, TaskProperties]:
+    """Decodes a json database, validating every task and, for the compact model, turning it into a ``Task``.
+
+    Corrupt data raises ``json.JSONDecodeError`` and a task missing required fields ``ValueError``,
+    whichever serializer decodes it.
+    """
+    if not data.strip():
+        # The libraries disagree on the message for an empty file, keep the one of the json module.
+        json.loads(data)
+    return get_serializer(serializer)['load_tasks'](data, compact_model)
+
+
+def _validated(tasks: Any, compact_model: bool) -> dict[str, TaskProperties]:
+    if not isinstance(tasks, dict):
+        raise ValueError(f"Expected an object of tasks, got {type(tasks).__name__}")
+    for task in tasks.values():
+        validate_task(task)
+    if compact_model:
+        return {task_id: Task.from_dict(task) for task_id, task in tasks.items()}
+    return tasks
+
+
+def _json_dumps(obj: Any, compact: bool) -> bytes:
+    if compact:
+        return json.dumps(obj, separators=(',', ':'), default=dict).encode('utf-8')
+    return json.dumps(obj, indent=4, default=dict).encode('utf-8')
+
+
+def _json_load_tasks(data: bytes, compact_model: bool) -> dict[str, TaskProperties]:
+    validated = 0
+
+    def _task_hook(obj: dict) -> Any:
+        # Validates tasks while the decoder builds them; the object of tasks itself comes last.
+        nonlocal validated
+        if obj.keys() >= REQUIRED_FIELDS:
+            validated += 1
+            return Task.from_dict(obj) if compact_model else obj
+        return obj
+
+    tasks = json.loads(data, object_hook=_task_hook)
+    if isinstance(tasks, dict) and validated == len(tasks):
+        return tasks
+    # Something did not decode into a task, the slow pass finds which one.
+    return _validated(tasks, False)
+
+
+def _orjson_dumps(obj: Any, compact: bool) -> bytes:
+    orjson = _module('orjson')
+    return orjson.dumps(obj, default=dict, option=0 if compact else orjson.OPT_INDENT_2)
+
+
+def _orjson_loads(data: str | bytes) -> Any:
+    # orjson.JSONDecodeError already subclasses json.JSONDecodeError.
+    return _module('orjson').loads(data)
+
+
+def _orjson_load_tasks(data: bytes, compact_model: bool) -> dict[str, TaskProperties]:
+    # orjson has no typed decoding, but parses fast enough to leave room for the validation pass.
+    return _validated(_orjson_loads(data), compact_model)
+
+
+def _msgspec_dumps(obj: Any, compact: bool) -> bytes:
+    msgspec = _module('msgspec')
+    data = msgspec.json.encode(obj, enc_hook=dict)
+    return data if compact else msgspec.json.format(data, indent=4)
+
+
+def _msgspec_decode(data: str | bytes, decoded_type: Any = Any) -> Any:
+    msgspec = _module('msgspec')
+    try:
+        return msgspec.json.decode(data, type=decoded_type)
+    except msgspec.ValidationError as exc:
+        raise ValueError(f"Missing required fields in task: {exc}") from exc
+    except msgspec.DecodeError as exc:
+        document = data if isinstance(data, str) else data.decode('utf-8', 'replace')
+        raise json.JSONDecodeError(str(exc), document, 0) from exc
+
+
+def _msgspec_loads(data: str | bytes) -> Any:
+    return _msgspec_decode(data)
+
+
+def _msgspec_load_tasks(data: bytes, compact_model: bool) -> dict[str, TaskProperties]:
+    tasks = _msgspec_decode(data, dict[str, TaskProperties])
+    if compact_model:
+        return {task_id: Task.from_dict(task) for task_id, task in tasks.items()}
+    return tasks
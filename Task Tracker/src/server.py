@@ -0,0 +1,182 @@
+import io
+import os
+import sys
+import json
+from typing import Any, Callable, Optional, TextIO, TypedDict
+
+try:
+    from .profiling import requested
+except ImportError:
+    from profiling import requested
+
+SOCKET_NAME = 'taski.sock'
+SAVE_INTERVAL = 0.5
+CLIENT_TIMEOUT = 30
+
+class DaemonResponse(TypedDict):
+    stdout: str
+    stderr: str
+    code: int
+
+
+class ClientStdin(io.TextIOBase):
+    """Stdin of a forwarded command, fetched from the client the first time the command reads it.
+
+    Commands that never read stdin leave the client's alone, as they would when run locally.
+    """
+
+    def __init__(self, fetch: Callable[[], str]) -> None:
+        super().__init__()
+        self._fetch = fetch
+        self._buffer: Optional[io.StringIO] = None
+
+    def _data(self) -> io.StringIO:
+        if self._buffer is None:
+            self._buffer = io.StringIO(self._fetch())
+        return self._buffer
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        return self._data().read(size)
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        return self._data().readline(size)
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message).encode('utf-8') + b'\n'
+
+
+def daemon_supported() -> bool:
+    return os.name == 'posix'
+
+
+def socket_path(folder_name: str) -> str:
+    return os.environ.get('TASKI_SOCKET') or os.path.join(folder_name, SOCKET_NAME)
+
+
+def _send(path: str, message: dict[str, Any], timeout: float = CLIENT_TIMEOUT) -> Optional[dict]:
+    if not daemon_supported() or not os.path.exists(path):
+        return None
+    # Only imported once a daemon socket exists, so plain runs do not pay for it.
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall(_encode(message))
+            with client.makefile('rb') as reply:
+                line = reply.readline()
+                while line and json.loads(line).get('op') == 'stdin':
+                    # The command reads stdin, which only this side has.
+                    client.sendall(_encode({'stdin': sys.stdin.read() if sys.stdin else ''}))
+                    line = reply.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    return json.loads(line) if line else None
+
+
+def request_daemon(path: str, argv: list[str]) -> Optional[DaemonResponse]:
+    """Runs a command on the daemon listening at ``path``, or returns None when none is running.
+
+    The daemon resolves relative paths against the working directory sent along, and asks for stdin
+    when the command reads it.
+    """
+    return _send(path, {'op': 'run', 'argv': argv, 'cwd': os.getcwd()})
+
+
+def daemon_running(path: str) -> bool:
+    return _send(path, {'op': 'run', 'argv': ['--help']}, timeout=1) is not None
+
+
+def stop_daemon(path: str) -> bool:
+    return _send(path, {'op': 'shutdown'}) is not None
+
+
+def forward(folder_name: str, argv: list[str]) -> bool:
+    """Runs ``argv`` on the daemon serving ``folder_name`` and relays its output, or returns False when there is none."""
+    # Profiled commands run locally, where their phases can be timed.
+    if argv[:1] == ['serve'] or os.environ.get('TASKI_NO_DAEMON') or requested(argv):
+        return False
+    response = request_daemon(socket_path(folder_name), argv)
+    if response is None:
+        return False
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    if response['code']:
+        sys.exit(response['code'])
+    return True
+
+
+def serve(path: str, run_command: Callable[[list[str], TextIO, Optional[str]], DaemonResponse], save: Callable[[], None], is_dirty: Callable[[], bool]) -> None:
+    """Serves commands on a unix socket until a shutdown request, SIGINT or SIGTERM.
+
+    Commands run one at a time. Their changes are saved by a background thread every
+    ``SAVE_INTERVAL`` seconds and once more when the daemon stops.
+    """
+    import signal
+    import threading
+    import socketserver
+
+    if not daemon_supported():
+        raise OSError('taski serve needs unix domain sockets, which this platform does not support')
+    if os.path.exists(path):
+        if daemon_running(path):
+            raise OSError(f'A taski daemon is already listening on {path}')
+        os.remove(path)
+
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def _locked_run(argv: list[str], stdin: TextIO, cwd: Optional[str]) -> DaemonResponse:
+        with lock:
+            return run_command(argv, stdin, cwd)
+
+    def _terminate(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            line = self.rfile.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message.get('op') == 'shutdown':
+                response = {'stdout': '', 'stderr': '', 'code': 0}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = self.server.run_command(message['argv'], ClientStdin(self._read_stdin), message.get('cwd'))
+            self.wfile.write(_encode(response))
+
+        def _read_stdin(self) -> str:
+            self.wfile.write(_encode({'op': 'stdin'}))
+            line = self.rfile.readline()
+            return json.loads(line)['stdin'] if line else ''
+
+    def _persist() -> None:
+        while not stopped.wait(SAVE_INTERVAL):
+            with lock:
+                if is_dirty():
+                    save()
+
+    server = socketserver.ThreadingUnixStreamServer(path, _Handler)
+    server.daemon_threads = True
+    server.run_command = _locked_run
+    persister = threading.Thread(target=_persist, daemon=True)
+    persister.start()
+    previous_handler = signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.server_close()
+        stopped.set()
+        persister.join()
+        if os.path.exists(path):
+            os.remove(path)
+        with lock:
+            save()
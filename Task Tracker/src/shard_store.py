@@ -0,0 +1,227 @@
+import os
+import zlib
+import heapq
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, TypedDict
+
+try:
+    from .models import TaskProperties, TaskTracker, LazyTaskTracker
+    from .storage import _write_atomic, read_meta, write_meta, open_json
+    from .serializer import decode, decode_tasks, encode
+except ImportError:
+    from models import TaskProperties, TaskTracker, LazyTaskTracker
+    from storage import _write_atomic, read_meta, write_meta, open_json
+    from serializer import decode, decode_tasks, encode
+
+SHARDS_SUFFIX = '.shards'
+MANIFEST_FILE = 'manifest.json'
+
+SHARD_SCHEMES = ('hash', 'range')
+SHARD_POOLS = ('thread', 'process')
+DEFAULT_SHARDS = 8
+DEFAULT_SCHEME = 'hash'
+DEFAULT_RANGE_SIZE = 10_000
+DEFAULT_POOL = 'thread'
+
+class ShardLayout(TypedDict):
+    scheme: str
+    count: int
+    range_size: int
+    generation: int
+    sizes: dict[str, int]
+
+
+def shards_path(path: str) -> str:
+    return path + SHARDS_SUFFIX
+
+
+def shard_file(folder: str, layout: ShardLayout, shard: int) -> str:
+    # The generation changes with every rebalance, so the files of two layouts never share a name.
+    return os.path.join(folder, f"{layout['generation']}-{shard:05}.json")
+
+
+def get_layout(shards: Optional[int] = None, scheme: Optional[str] = None, range_size: Optional[int] = None) -> ShardLayout:
+    scheme = scheme or os.environ.get('TASKI_SHARD_SCHEME') or DEFAULT_SCHEME
+    if scheme not in SHARD_SCHEMES:
+        raise ValueError(f"Shard scheme only accepts following args -> {SHARD_SCHEMES}")
+    count = shards or int(os.environ.get('TASKI_SHARDS') or DEFAULT_SHARDS)
+    range_size = range_size or int(os.environ.get('TASKI_SHARD_RANGE') or DEFAULT_RANGE_SIZE)
+    if count < 1 or range_size < 1:
+        raise ValueError('Shard count and range size must be positive')
+    return {'scheme': scheme, 'count': count, 'range_size': range_size, 'generation': 0, 'sizes': {}}
+
+
+def shard_of(task_id: str, layout: ShardLayout) -> int:
+    """Returns the shard holding ``task_id``: a stable hash of it, or its block of ``range_size`` ids."""
+    if layout['scheme'] == 'range' and task_id.isdigit():
+        return min(int(task_id) // layout['range_size'], layout['count'] - 1)
+    return zlib.crc32(task_id.encode('utf-8')) % layout['count']
+
+
+def _read_shard(path: str) -> dict[str, TaskProperties]:
+    try:
+        with open(path, 'rb') as shard_file:
+            return decode_tasks(shard_file.read())
+    except FileNotFoundError:
+        return {}
+
+
+def _pool(workers: int) -> Executor:
+    pool = os.environ.get('TASKI_SHARD_POOL') or DEFAULT_POOL
+    if pool not in SHARD_POOLS:
+        raise ValueError(f"Shard pool only accepts following args -> {SHARD_POOLS}")
+    # Threads overlap the reads; processes also decode in parallel, at the cost of sending the tasks back.
+    return ProcessPoolExecutor(workers) if pool == 'process' else ThreadPoolExecutor(workers)
+
+
+def _task_key(item: tuple[str, TaskProperties]) -> tuple[int, str]:
+    task_id = item[0]
+    return (int(task_id), task_id) if task_id.isdigit() else (-1, task_id)
+
+
+class ShardedTaskTracker(LazyTaskTracker):
+    """TaskTracker spread over shard files, each loaded the first time one of its tasks is touched.
+
+    A lookup, update or delete reads and rewrites only the shard of its task, while iterating
+    the tracker loads the remaining shards through a pool.
+    """
+
+    def __init__(self, folder: str, layout: ShardLayout) -> None:
+        super().__init__()
+        self.folder = folder
+        self.layout = layout
+        self.shards: dict[int, dict[str, TaskProperties]] = {}
+        self.dirty_shards: set[int] = set()
+        self.stale_files: list[str] = []
+
+    def _shard(self, task_id: str) -> dict[str, TaskProperties]:
+        shard = shard_of(task_id, self.layout)
+        if shard not in self.shards:
+            self.shards[shard] = _read_shard(shard_file(self.folder, self.layout, shard))
+        return self.shards[shard]
+
+    def load_all(self) -> None:
+        missing = [shard for shard in range(self.layout['count']) if shard not in self.shards]
+        if len(missing) < 2:
+            for shard in missing:
+                self.shards[shard] = _read_shard(shard_file(self.folder, self.layout, shard))
+            return
+        paths = [shard_file(self.folder, self.layout, shard) for shard in missing]
+        with _pool(min(len(missing), os.cpu_count() or 1)) as pool:
+            for shard, tasks in zip(missing, pool.map(_read_shard, paths)):
+                self.shards[shard] = tasks
+
+    def __getitem__(self, task_id: str) -> TaskProperties:
+        return self._shard(task_id)[task_id]
+
+    def __setitem__(self, task_id: str, task: TaskProperties) -> None:
+        self._shard(task_id)[task_id] = task
+        self.dirty_shards.add(shard_of(task_id, self.layout))
+
+    def __delitem__(self, task_id: str) -> None:
+        del self._shard(task_id)[task_id]
+        self.dirty_shards.add(shard_of(task_id, self.layout))
+
+    def __contains__(self, task_id: object) -> bool:
+        return isinstance(task_id, str) and task_id in self._shard(task_id)
+
+    def __len__(self) -> int:
+        sizes = self.layout['sizes']
+        return sum(
+            len(self.shards[shard]) if shard in self.shards else sizes.get(str(shard), 0)
+            for shard in range(self.layout['count'])
+        )
+
+    def changed(self) -> bool:
+        return super().changed() or bool(self.dirty_shards)
+
+    def mark_dirty(self, task_id: str) -> None:
+        super().mark_dirty(task_id)
+        self.dirty_shards.add(shard_of(task_id, self.layout))
+
+    def items(self) -> Iterator[tuple[str, TaskProperties]]:
+        self.load_all()
+        # Each shard keeps its tasks in id order, merging them gives the order of a single file.
+        shards = [self.shards[shard].items() for shard in range(self.layout['count'])]
+        return heapq.merge(*shards, key=_task_key)
+
+    def rebalance(self, layout: ShardLayout) -> None:
+        """Moves every task to its shard under ``layout``, written as a new generation by the next save."""
+        tasks = list(self.items())
+        stale_files = [shard_file(self.folder, self.layout, shard) for shard in range(self.layout['count'])]
+        rebalanced = split_tasks(self.folder, {**layout, 'generation': self.layout['generation'] + 1, 'sizes': {}}, tasks)
+        self.layout, self.shards, self.dirty_shards = rebalanced.layout, rebalanced.shards, rebalanced.dirty_shards
+        self.stale_files.extend(stale_files)
+
+
+def read_layout(folder: str) -> Optional[ShardLayout]:
+    try:
+        with open(os.path.join(folder, MANIFEST_FILE), 'rb') as manifest_file:
+            return decode(manifest_file.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_layout(folder: str, layout: ShardLayout) -> None:
+    _write_atomic(encode(layout), os.path.join(folder, MANIFEST_FILE))
+
+
+def write_shards(task_tracker: ShardedTaskTracker) -> None:
+    layout = task_tracker.layout
+    for shard in sorted(task_tracker.dirty_shards):
+        tasks = task_tracker.shards[shard]
+        _write_atomic(encode(tasks), shard_file(task_tracker.folder, layout, shard))
+        layout['sizes'][str(shard)] = len(tasks)
+    # The manifest switches readers to a new generation in one rename, only then are the old files dropped.
+    write_layout(task_tracker.folder, layout)
+    for path in task_tracker.stale_files:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    task_tracker.stale_files.clear()
+    task_tracker.dirty_shards.clear()
+    task_tracker.dirty.clear()
+
+
+def split_tasks(folder: str, layout: ShardLayout, tasks: Iterable[tuple[str, TaskProperties]]) -> ShardedTaskTracker:
+    """Returns a tracker holding ``tasks`` spread over every shard of ``layout``, all of them due for a write."""
+    task_tracker = ShardedTaskTracker(folder, layout)
+    task_tracker.shards = {shard: {} for shard in range(layout['count'])}
+    for task_id, task in tasks:
+        task_tracker.shards[shard_of(task_id, layout)][task_id] = task
+    task_tracker.dirty_shards = set(task_tracker.shards)
+    return task_tracker
+
+
+def open_sharded(path: str) -> ShardedTaskTracker:
+    folder = shards_path(path)
+    layout = read_layout(folder)
+    if layout is None:
+        # The first open splits an existing json database, ids sequence included.
+        source = open_json(path)
+        os.makedirs(folder, exist_ok=True)
+        task_tracker = split_tasks(folder, get_layout(), source.items())
+        task_tracker.meta = source.meta
+        write_meta(task_tracker, folder)
+        write_shards(task_tracker)
+        return task_tracker
+    task_tracker = ShardedTaskTracker(folder, layout)
+    task_tracker.meta = read_meta(folder)
+    return task_tracker
+
+
+def save_sharded(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    if not isinstance(task_tracker, ShardedTaskTracker):
+        folder = shards_path(path)
+        os.makedirs(folder, exist_ok=True)
+        current = read_layout(folder)
+        layout = get_layout() if current is None else {**current, 'generation': current['generation'] + 1, 'sizes': {}}
+        sharded = split_tasks(folder, layout, (task_tracker or {}).items())
+        if current is not None:
+            sharded.stale_files = [shard_file(folder, current, shard) for shard in range(current['count'])]
+        if isinstance(task_tracker, TaskTracker):
+            sharded.meta = task_tracker.meta
+        task_tracker = sharded
+    write_meta(task_tracker, task_tracker.folder)
+    write_shards(task_tracker)
@@ -0,0 +1,183 @@
+import os
+import json
+import sqlite3
+from typing import Iterator, Optional
+
+try:
+    from .models import STATUS, TaskProperties, TaskTracker, LazyTaskTracker
+except ImportError:
+    from models import STATUS, TaskProperties, TaskTracker, LazyTaskTracker
+
+SQLITE_SUFFIX = '.sqlite3'
+
+TASK_COLUMNS = ('task_id', 'description', 'status', 'createdAt', 'updatedAt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    description TEXT,
+    status TEXT NOT NULL,
+    createdAt TEXT NOT NULL,
+    updatedAt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (createdAt);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks (updatedAt);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT_TASK = """
+INSERT INTO tasks (task_id, description, status, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (task_id) DO UPDATE SET
+    description = excluded.description,
+    status = excluded.status,
+    createdAt = excluded.createdAt,
+    updatedAt = excluded.updatedAt
+"""
+
+UPSERT_META = 'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)'
+
+
+def _row_to_task(row: tuple) -> TaskProperties:
+    return dict(zip(TASK_COLUMNS, row))
+
+
+def _task_to_row(task_id: str, task: TaskProperties) -> tuple:
+    return (task_id, task['description'], task['status'], task['createdAt'], task['updatedAt'])
+
+
+class SqliteTaskTracker(LazyTaskTracker):
+    """TaskTracker backed by a sqlite table.
+
+    Only the tasks that were looked up are cached in the dict itself. Every change is written
+    through to the open transaction, which ``save_sqlite`` commits.
+    """
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        super().__init__()
+        self.connection = connection
+        self.meta = {key: json.loads(value) for key, value in connection.execute('SELECT key, value FROM meta')}
+
+    def _select(self, task_id: str) -> Optional[TaskProperties]:
+        row = self.connection.execute(
+            f'SELECT {", ".join(TASK_COLUMNS)} FROM tasks WHERE task_id = ?', (task_id,)
+        ).fetchone()
+        return _row_to_task(row) if row else None
+
+    def _write(self, task_id: str) -> None:
+        if dict.__contains__(self, task_id):
+            self.connection.execute(UPSERT_TASK, _task_to_row(task_id, dict.__getitem__(self, task_id)))
+        else:
+            self.connection.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+
+    def __getitem__(self, task_id: str) -> TaskProperties:
+        if dict.__contains__(self, task_id):
+            return dict.__getitem__(self, task_id)
+        task = self._select(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        dict.__setitem__(self, task_id, task)
+        return task
+
+    def __setitem__(self, task_id: str, task: TaskProperties) -> None:
+        dict.__setitem__(self, task_id, task)
+        self._write(task_id)
+
+    def __delitem__(self, task_id: str) -> None:
+        if task_id not in self:
+            raise KeyError(task_id)
+        dict.pop(self, task_id, None)
+        self._write(task_id)
+
+    def __contains__(self, task_id: object) -> bool:
+        if dict.__contains__(self, task_id):
+            return True
+        return self.connection.execute('SELECT 1 FROM tasks WHERE task_id = ?', (task_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (task_id,) in self.connection.execute('SELECT task_id FROM tasks ORDER BY rowid'):
+            yield task_id
+
+    def mark_dirty(self, task_id: str) -> None:
+        super().mark_dirty(task_id)
+        self._write(task_id)
+
+    def save_meta(self) -> None:
+        self.connection.executemany(UPSERT_META, ((key, json.dumps(value)) for key, value in self.meta.items()))
+
+    def items(self) -> Iterator[tuple[str, TaskProperties]]:
+        return self._select_many()
+
+    def tasks(self, status: Optional[STATUS] = None) -> Iterator[TaskProperties]:
+        for _, task in self._select_many(status):
+            yield task
+
+    def _select_many(self, status: Optional[STATUS] = None) -> Iterator[tuple[str, TaskProperties]]:
+        query = f'SELECT {", ".join(TASK_COLUMNS)} FROM tasks'
+        params: tuple = ()
+        if status:
+            query += ' WHERE status = ?'
+            params = (status,)
+        for row in self.connection.execute(query + ' ORDER BY rowid', params):
+            task_id = row[0]
+            if dict.__contains__(self, task_id):
+                yield task_id, dict.__getitem__(self, task_id)
+            else:
+                yield task_id, _row_to_task(row)
+
+
+def sqlite_path(path: str) -> str:
+    return os.path.splitext(path)[0] + SQLITE_SUFFIX
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """Copies every task of a json database into a sqlite database and returns how many were copied."""
+    try:
+        from .storage import open_json
+    except ImportError:
+        from storage import open_json
+
+    task_tracker = open_json(json_path)
+    if 'last_id' not in task_tracker.meta:
+        task_tracker.meta['last_id'] = max(map(int, task_tracker.keys()), default=0)
+    tmp_path = f'{db_path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with sqlite3.connect(tmp_path) as connection:
+        connection.executescript(SCHEMA)
+        connection.executemany(UPSERT_TASK, (_task_to_row(task_id, task) for task_id, task in task_tracker.items()))
+        connection.executemany(UPSERT_META, ((key, json.dumps(value)) for key, value in task_tracker.meta.items()))
+    connection.close()
+    os.replace(tmp_path, db_path)
+    return len(task_tracker)
+
+
+def open_sqlite(path: str) -> SqliteTaskTracker:
+    db_path = sqlite_path(path)
+    if not os.path.exists(db_path) and os.path.exists(path):
+        migrate_json_to_sqlite(path, db_path)
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return SqliteTaskTracker(connection)
+
+
+def save_sqlite(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    if isinstance(task_tracker, SqliteTaskTracker):
+        task_tracker.save_meta()
+        task_tracker.connection.commit()
+        task_tracker.dirty.clear()
+        return
+
+    with sqlite3.connect(sqlite_path(path)) as connection:
+        connection.executescript(SCHEMA)
+        connection.execute('DELETE FROM tasks')
+        connection.executemany(UPSERT_TASK, (_task_to_row(task_id, task) for task_id, task in (task_tracker or {}).items()))
+        if isinstance(task_tracker, TaskTracker):
+            connection.executemany(UPSERT_META, ((key, json.dumps(value)) for key, value in task_tracker.meta.items()))
+    connection.close()
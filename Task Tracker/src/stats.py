@@ -0,0 +1,50 @@
+from typing import Iterable, Mapping, Optional, TypedDict
+
+try:
+    from .models import STATUS_NAMES, TaskProperties
+except ImportError:
+    from models import STATUS_NAMES, TaskProperties
+
+STATS_KEY = 'stats'
+
+class TaskStats(TypedDict):
+    status: dict[str, int]
+    created: dict[str, int]
+    updated: dict[str, int]
+
+
+def empty_stats() -> TaskStats:
+    return {'status': {status: 0 for status in STATUS_NAMES}, 'created': {}, 'updated': {}}
+
+
+def _bump(histogram: dict[str, int], day: str, delta: int) -> None:
+    count = histogram.get(day, 0) + delta
+    if count:
+        histogram[day] = count
+    else:
+        histogram.pop(day, None)
+
+
+def count_task(stats: TaskStats, task: Mapping, delta: int) -> None:
+    """Adds ``delta`` to the counters a task falls in: its status, its creation day and its last update day."""
+    stats['status'][task['status']] = stats['status'].get(task['status'], 0) + delta
+    _bump(stats['created'], task['createdAt'][:10], delta)
+    _bump(stats['updated'], task['updatedAt'][:10], delta)
+
+
+def build_stats(tasks: Iterable[TaskProperties]) -> TaskStats:
+    stats = empty_stats()
+    for task in tasks:
+        count_task(stats, task, 1)
+    return stats
+
+
+def apply_change(stats: TaskStats, before: Optional[Mapping], after: Optional[Mapping]) -> None:
+    if before is not None:
+        count_task(stats, before, -1)
+    if after is not None:
+        count_task(stats, after, 1)
+
+
+def total(stats: TaskStats) -> int:
+    return sum(stats['status'].values())
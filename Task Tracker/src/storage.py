@@ -0,0 +1,352 @@
+import os
+import json
+import importlib
+from typing import Any, Callable, Iterable, Iterator, NotRequired, Optional, TypedDict
+
+try:
+    from .models import TaskTracker, CompactTaskTracker, LazyTaskTracker, TaskProperties, validate_task
+    from .profiling import phase
+    from .serializer import decode, decode_tasks, encode
+except ImportError:
+    from models import TaskTracker, CompactTaskTracker, LazyTaskTracker, TaskProperties, validate_task
+    from profiling import phase
+    from serializer import decode, decode_tasks, encode
+
+DEFAULT_BACKEND = 'json'
+DEFAULT_MODEL = 'dict'
+MODELS = ('dict', 'compact')
+
+WAL_SUFFIX = '.wal'
+META_SUFFIX = '.meta'
+WAL_MIN_COMPACT_BYTES = 1 << 20
+STREAM_CHUNK_SIZE = 1 << 16
+
+class StorageBackendProperties(TypedDict):
+    open: Callable[[str], TaskTracker]
+    open_readonly: NotRequired[Callable[[str], TaskTracker]]
+    save: Callable[[Optional[dict[str, TaskProperties]], str], None]
+    help: str
+
+
+def storage_backends() -> dict[str, StorageBackendProperties]:
+    return {
+        'json': {
+            'open': open_json,
+            'open_readonly': open_json_stream,
+            'save': save_json,
+            'help': 'Single json file rewritten on every save'
+        },
+        'wal': {
+            'open': open_wal,
+            'save': save_wal,
+            'help': 'Json snapshot plus an append-only log of changed tasks'
+        },
+        'sqlite': {
+            'open': open_sqlite,
+            'save': save_sqlite,
+            'help': 'Sqlite table indexed by status and timestamps, migrated from tasks.json on first use'
+        },
+        'binary': {
+            'open': open_binary,
+            'save': save_binary,
+            'help': 'Memory-mapped fixed-width records patched in place, migrated from tasks.json on first use'
+        },
+        'sharded': {
+            'open': open_sharded,
+            'save': save_sharded,
+            'help': 'Tasks split over shard files by id hash or range, only the shards touched are rewritten'
+        }
+    }
+
+
+# The sqlite, binary and sharded backends are imported on first use: sqlite3, mmap and
+# concurrent.futures would otherwise slow down the start of every command, whichever backend it uses.
+
+def _store_module(name: str) -> Any:
+    return importlib.import_module(f'{__package__}.{name}' if __package__ else name)
+
+
+def open_sqlite(path: str) -> TaskTracker:
+    return _store_module('sqlite_store').open_sqlite(path)
+
+
+def save_sqlite(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    _store_module('sqlite_store').save_sqlite(task_tracker, path)
+
+
+def open_binary(path: str) -> TaskTracker:
+    return _store_module('binary_store').open_binary(path)
+
+
+def save_binary(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    _store_module('binary_store').save_binary(task_tracker, path)
+
+
+def open_sharded(path: str) -> TaskTracker:
+    return _store_module('shard_store').open_sharded(path)
+
+
+def save_sharded(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    _store_module('shard_store').save_sharded(task_tracker, path)
+
+
+def backend_name(backend: Optional[str] = None) -> str:
+    return backend or os.environ.get('TASKI_BACKEND') or DEFAULT_BACKEND
+
+
+def get_backend(backend: Optional[str] = None) -> StorageBackendProperties:
+    backends = storage_backends()
+    name = backend_name(backend)
+    if name not in backends:
+        raise ValueError(f"Storage backend only accepts following args -> {tuple(backends)}")
+    return backends[name]
+
+
+def get_model(model: Optional[str] = None) -> str:
+    model = model or os.environ.get('TASKI_MODEL') or DEFAULT_MODEL
+    if model not in MODELS:
+        raise ValueError(f"Model only accepts following args -> {MODELS}")
+    return model
+
+
+def _fsync_write(path: str, data: str | bytes, mode: str) -> None:
+    if isinstance(data, bytes):
+        file = open(path, mode + 'b')
+    else:
+        file = open(path, mode, encoding='utf-8')
+    with file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _write_atomic(data: str | bytes, path: str) -> None:
+    tmp_path = f'{path}.tmp'
+    _fsync_write(tmp_path, data, 'w')
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    """Writes the whole tracker next to ``path`` and renames it into place, so readers never see half a file."""
+    with phase('save.serialize'):
+        data = encode(task_tracker)
+    with phase('save.write'):
+        _write_atomic(data, path)
+
+
+def read_meta(path: str) -> dict:
+    try:
+        with open(path + META_SUFFIX, 'rb') as meta_file:
+            return decode(meta_file.read())
+    except FileNotFoundError:
+        return {}
+
+
+def write_meta(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    # Written before the tasks themselves: a crash in between can only skip ids, never hand one out twice.
+    if isinstance(task_tracker, TaskTracker) and task_tracker.meta:
+        _write_atomic(encode(task_tracker.meta, compact=True), path + META_SUFFIX)
+
+
+def open_json(path: str, model: Optional[str] = None) -> TaskTracker:
+    compact = get_model(model) == 'compact'
+    try:
+        with phase('open.read'), open(path, 'rb') as js_file:
+            data = js_file.read()
+    except FileNotFoundError:
+        data = b'{}'
+    # Tasks are validated, and turned into slotted objects for the compact model, while they are decoded.
+    with phase('open.decode'):
+        task_tracker = decode_tasks(data, compact)
+    task_tracker = CompactTaskTracker(task_tracker) if compact else TaskTracker(task_tracker)
+    task_tracker.meta = read_meta(path)
+    return task_tracker
+
+
+def iter_json_tasks(path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[tuple[str, TaskProperties]]:
+    """Yields ``(task_id, task)`` pairs of a json database while reading it ``chunk_size`` characters at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as js_file:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def _fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = js_file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return not eof
+
+        def _skip_ws() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or not _fill():
+                    return buffer[pos:pos + 1]
+
+        def _expect(chars: str) -> str:
+            nonlocal pos
+            char = _skip_ws()
+            if not char or char not in chars:
+                raise json.JSONDecodeError(f'Expecting one of {chars!r}', buffer, pos)
+            pos += 1
+            return char
+
+        def _value() -> Any:
+            nonlocal pos
+            _skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The value is cut by the end of the buffer unless there is nothing left to read.
+                    if eof or not _fill():
+                        raise
+                    continue
+                pos = end
+                return value
+
+        _expect('{')
+        if _skip_ws() == '}':
+            return
+        while True:
+            task_id = _value()
+            if not isinstance(task_id, str):
+                raise json.JSONDecodeError('Expecting property name', buffer, pos)
+            _expect(':')
+            task = _value()
+            validate_task(task)
+            yield task_id, task
+            if _expect(',}') == '}':
+                return
+
+
+class JsonStreamTaskTracker(LazyTaskTracker):
+    """Read-only TaskTracker that parses tasks from the json database while they are iterated.
+
+    Peak memory does not depend on the size of the database, which suits commands that only read it.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.meta = read_meta(path)
+
+    def items(self) -> Iterator[tuple[str, TaskProperties]]:
+        if not os.path.exists(self.path):
+            return iter(())
+        return iter_json_tasks(self.path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def __contains__(self, task_id: object) -> bool:
+        return any(key == task_id for key in self)
+
+    def __getitem__(self, task_id: str) -> TaskProperties:
+        for key, task in self.items():
+            if key == task_id:
+                return task
+        raise KeyError(task_id)
+
+    def tasks_by_id(self, task_ids: Iterable[str]) -> Iterator[TaskProperties]:
+        # One pass over the file for all of them, keeping only the requested tasks.
+        task_ids = list(task_ids)
+        wanted = set(task_ids)
+        found = {task_id: task for task_id, task in self.items() if task_id in wanted}
+        for task_id in task_ids:
+            if task_id in found:
+                yield found[task_id]
+
+    def _read_only(self, *args, **kwargs) -> None:
+        raise TypeError(f'{type(self).__name__} is read-only')
+
+    __setitem__ = __delitem__ = pop = update = setdefault = clear = _read_only
+
+
+def open_json_stream(path: str) -> JsonStreamTaskTracker:
+    return JsonStreamTaskTracker(path)
+
+
+def save_json(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    write_meta(task_tracker, path)
+    write_snapshot(task_tracker, path)
+    if isinstance(task_tracker, TaskTracker):
+        task_tracker.dirty.clear()
+
+
+def _replay_wal(task_tracker: TaskTracker, wal_path: str) -> None:
+    try:
+        with open(wal_path, 'r', encoding='utf-8', newline='\n') as wal:
+            lines = wal.readlines()
+    except FileNotFoundError:
+        return
+
+    valid_bytes = 0
+    for line_no, line in enumerate(lines):
+        if not line.endswith('\n'):
+            # A crash while appending leaves an unterminated record, which is dropped on recovery.
+            break
+        try:
+            record = decode(line)
+        except json.JSONDecodeError as exc:
+            if line_no == len(lines) - 1:
+                break
+            raise ValueError(f'Corrupted record {line_no + 1} in {wal_path}') from exc
+        if record['op'] == 'put':
+            validate_task(record['task'])
+            task_tracker[record['task_id']] = record['task']
+        elif record['op'] == 'del':
+            task_tracker.pop(record['task_id'], None)
+        elif record['op'] == 'meta':
+            task_tracker.meta.update(record['meta'])
+        else:
+            raise ValueError(f"Unknown operation in {wal_path}: {record['op']}")
+        valid_bytes += len(line.encode('utf-8'))
+
+    if valid_bytes < os.path.getsize(wal_path):
+        with open(wal_path, 'r+b') as wal:
+            wal.truncate(valid_bytes)
+
+
+def open_wal(path: str) -> TaskTracker:
+    task_tracker = open_json(path)
+    _replay_wal(task_tracker, path + WAL_SUFFIX)
+    return task_tracker
+
+
+def compact_wal(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    write_meta(task_tracker, path)
+    write_snapshot(task_tracker, path)
+    # Replaying a stale log over the new snapshot is harmless, so a crash before this truncation loses nothing.
+    _fsync_write(path + WAL_SUFFIX, '', 'w')
+    if isinstance(task_tracker, TaskTracker):
+        task_tracker.dirty.clear()
+
+
+def save_wal(task_tracker: Optional[dict[str, TaskProperties]], path: str) -> None:
+    wal_path = path + WAL_SUFFIX
+    if not isinstance(task_tracker, TaskTracker):
+        compact_wal(task_tracker, path)
+        return
+    if not task_tracker.dirty and not task_tracker.meta_dirty:
+        return
+
+    records = []
+    for task_id in sorted(task_tracker.dirty):
+        if task_id in task_tracker:
+            records.append(encode({'op': 'put', 'task_id': task_id, 'task': task_tracker[task_id]}, compact=True))
+        else:
+            records.append(encode({'op': 'del', 'task_id': task_id}, compact=True))
+    if task_tracker.meta:
+        records.append(encode({'op': 'meta', 'meta': task_tracker.meta}, compact=True))
+    _fsync_write(wal_path, b''.join(record + b'\n' for record in records), 'a')
+    task_tracker.dirty.clear()
+    task_tracker.meta_dirty = False
+
+    snapshot_size = os.path.getsize(path) if os.path.exists(path) else 0
+    if os.path.getsize(wal_path) > max(WAL_MIN_COMPACT_BYTES, snapshot_size):
+        compact_wal(task_tracker, path)
@@ -1,30 +1,154 @@
 import os
+import io
+import sys
 import json
+import time
+import itertools as it
+from contextlib import nullcontext, redirect_stdout, redirect_stderr
 from datetime import datetime
-from argparse import ArgumentParser
-from pprint import pprint
-from typing import Optional, Literal, Callable, TypedDict, get_args
-
-JSON_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'task_tracker_db')
-
-STATUS = Literal['todo', 'in-progress', 'done']
-
-class TaskProperties(TypedDict):
-    task_id: str
-    description: Optional[str]
-    status: STATUS
-    createdAt: str
-    updatedAt: str
+from argparse import SUPPRESS, ArgumentParser
+from typing import Any, Iterable, Iterator, NotRequired, Optional, Callable, TextIO, TypedDict, get_args
+
+# csv, heapq and random are imported by the few functions using them: scripts run taski thousands
+# of times and every module imported up front is paid on each run.
+
+try:
+    from .config import JSON_DB_PATH
+    from .models import STATUS, TaskProperties, TaskTracker, iso_to_micros
+    from .storage import backend_name, get_backend
+    from .locking import ConflictError, lock_store, read_version, write_version
+    from .index_store import fetch_tasks, load_index, load_time_index, log_changes
+    from .stats import STATS_KEY, TaskStats, apply_change, build_stats, total
+    from .server import DaemonResponse, daemon_running, forward, serve, socket_path, stop_daemon
+    from .journal import JournalRecord, last_undoable, read_journal, record_change, state_at, write_journal
+    from . import profiling
+except ImportError:
+    from config import JSON_DB_PATH
+    from models import STATUS, TaskProperties, TaskTracker, iso_to_micros
+    from storage import backend_name, get_backend
+    from locking import ConflictError, lock_store, read_version, write_version
+    from index_store import fetch_tasks, load_index, load_time_index, log_changes
+    from stats import STATS_KEY, TaskStats, apply_change, build_stats, total
+    from server import DaemonResponse, daemon_running, forward, serve, socket_path, stop_daemon
+    from journal import JournalRecord, last_undoable, read_journal, record_change, state_at, write_journal
+    import profiling
+
+BATCH_FORMATS = ('lines', 'jsonl', 'csv')
+
+LIST_FORMATS = ('table', 'jsonl', 'csv')
+LIST_SORT_FIELDS = ('createdAt', 'updatedAt')
+LIST_FIELDS = ('task_id', 'description', 'status', 'createdAt', 'updatedAt')
+LIST_COLUMN_WIDTHS = {'task_id': 8, 'status': 11, 'createdAt': 26, 'updatedAt': 26, 'description': 40}
+LIST_BUFFER_ROWS = 1_000
+
+STATS_FORMATS = ('table', 'json')
+HISTORY_FORMATS = ('table', 'jsonl')
+
+SAVE_RETRIES = 20
+RETRY_BACKOFF = 0.005
 
 class SupportedQueryArgs(TypedDict, total=False):
     name_or_flags: list[str]
     help: str
     nargs: str
+    dest: str
+    choices: tuple
+    default: Any
+    type: type
+    action: str
 
 class SupportedQueryProperties(TypedDict):
     target: Callable
     help: str
     args: list[SupportedQueryArgs]
+    readonly: NotRequired[bool | Callable[[dict], bool]]
+    saves_itself: NotRequired[bool]
+
+class BatchReport(TypedDict):
+    succeeded: int
+    failed: list[str]
+
+BATCH_FILE_ARGS: list[SupportedQueryArgs] = [
+    {
+        'name_or_flags': ['--file'],
+        'help': 'Read items from a file, "-" reads stdin',
+        'dest': 'file_path'
+    },
+    {
+        'name_or_flags': ['--format'],
+        'help': 'Format of the items, guessed from the file extension by default',
+        'dest': 'file_format',
+        'choices': BATCH_FORMATS
+    }
+]
+
+# Arguments naming files, which the daemon resolves against the working directory of the client.
+PATH_ARGS = ('file_path',)
+
+
+LIST_ARGS: list[SupportedQueryArgs] = [
+    {
+        'name_or_flags': ['--status'],
+        'help': 'status of tasks you want to see',
+        'nargs': '?'
+    },
+    {
+        'name_or_flags': ['--format'],
+        'help': 'Output format',
+        'dest': 'output_format',
+        'choices': LIST_FORMATS,
+        'default': 'table'
+    },
+    {
+        'name_or_flags': ['--limit'],
+        'help': 'Show at most this many tasks',
+        'type': int
+    },
+    {
+        'name_or_flags': ['--offset'],
+        'help': 'Skip this many tasks first',
+        'type': int,
+        'default': 0
+    },
+    {
+        'name_or_flags': ['--sort-by'],
+        'help': 'Sort tasks by a timestamp, oldest first',
+        'choices': LIST_SORT_FIELDS
+    },
+    {
+        'name_or_flags': ['--fields'],
+        'help': f'Comma separated fields to show, any of {",".join(LIST_FIELDS)}'
+    },
+    {
+        'name_or_flags': ['--created-after'],
+        'help': 'Only tasks created after this ISO timestamp'
+    },
+    {
+        'name_or_flags': ['--created-before'],
+        'help': 'Only tasks created before this ISO timestamp'
+    },
+    {
+        'name_or_flags': ['--updated-since'],
+        'help': 'Only tasks updated at or after this ISO timestamp, oldest change first'
+    }
+]
+
+
+GLOBAL_ARGS: list[SupportedQueryArgs] = [
+    {
+        'name_or_flags': ['--profile'],
+        'help': 'Print the time spent in each phase of the command and the store file sizes to stderr',
+        'action': 'store_true'
+    },
+    {
+        'name_or_flags': ['--profile-output'],
+        'help': 'Append the timings as a json line to this metrics file'
+    },
+    {
+        'name_or_flags': ['--profile-dump'],
+        'help': 'Write a cProfile dump of the command to this file'
+    }
+]
 
 
 def supported_queries() -> dict[str, SupportedQueryProperties]:
@@ -72,34 +196,209 @@ def supported_queries() -> dict[str, SupportedQueryProperties]:
         'list': {
             'target': list_tasks,
             'help': 'Lists tasks by status or all',
+            'readonly': True,
+            'args': LIST_ARGS
+        },
+        'search': {
+            'target': search_tasks,
+            'help': 'Find tasks by words of their description',
+            'readonly': True,
+            'args': [
+                {
+                    'name_or_flags': ['terms'],
+                    'help': 'Words every task must contain; OR separates alternatives and a trailing * matches prefixes',
+                    'nargs': '+'
+                },
+                {
+                    'name_or_flags': ['--status'],
+                    'help': 'Only find tasks with this status',
+                    'choices': get_args(STATUS)
+                },
+                {
+                    'name_or_flags': ['--format'],
+                    'help': 'Output format',
+                    'dest': 'output_format',
+                    'choices': LIST_FORMATS,
+                    'default': 'table'
+                },
+                {
+                    'name_or_flags': ['--limit'],
+                    'help': 'Show at most this many tasks',
+                    'type': int
+                }
+            ]
+        },
+        'stats': {
+            'target': stats_tasks,
+            'help': 'Count tasks by status and by day from the stored counters',
+            'readonly': lambda args: not args['rebuild'],
+            'args': [
+                {
+                    'name_or_flags': ['--format'],
+                    'help': 'Output format',
+                    'dest': 'output_format',
+                    'choices': STATS_FORMATS,
+                    'default': 'table'
+                },
+                {
+                    'name_or_flags': ['--check'],
+                    'help': 'Recount every task and fail when the stored counters differ',
+                    'action': 'store_true'
+                },
+                {
+                    'name_or_flags': ['--rebuild'],
+                    'help': 'Recount every task and store the result',
+                    'action': 'store_true'
+                }
+            ]
+        },
+        'import': {
+            'target': import_tasks,
+            'help': 'Add many tasks at once',
+            'args': [
+                {
+                    'name_or_flags': ['descriptions'],
+                    'help': 'Descriptions of tasks, read from stdin when none are given',
+                    'nargs': '*'
+                },
+                *BATCH_FILE_ARGS
+            ]
+        },
+        'bulk-update': {
+            'target': bulk_update_tasks,
+            'help': 'Update many tasks at once',
             'args': [
+                {
+                    'name_or_flags': ['task_ids'],
+                    'help': 'ids of tasks you want to update, read from stdin when none are given',
+                    'nargs': '*'
+                },
                 {
                     'name_or_flags': ['--status'],
-                    'help': 'status of tasks you want to see',
+                    'help': 'Update status of the tasks',
                     'nargs': '?'
+                },
+                {
+                    'name_or_flags': ['--description'],
+                    'help': 'Update description of the tasks',
+                    'nargs': '?'
+                },
+                *BATCH_FILE_ARGS
+            ]
+        },
+        'serve': {
+            'target': serve_tasks,
+            'help': 'Keep tasks in memory and serve other taski calls over a unix socket',
+            'saves_itself': True,
+            'args': [
+                {
+                    'name_or_flags': ['--stop'],
+                    'help': 'Stop the running daemon',
+                    'action': 'store_true'
+                }
+            ]
+        },
+        'bulk-delete': {
+            'target': bulk_delete_tasks,
+            'help': 'Delete many tasks at once',
+            'args': [
+                {
+                    'name_or_flags': ['task_ids'],
+                    'help': 'ids of tasks you want to delete, read from stdin when none are given',
+                    'nargs': '*'
+                },
+                *BATCH_FILE_ARGS
+            ]
+        },
+        'history': {
+            'target': history_tasks,
+            'help': 'Show every change made to a task',
+            'readonly': True,
+            'args': [
+                {
+                    'name_or_flags': ['task_id'],
+                    'help': 'id of the task'
+                },
+                {
+                    'name_or_flags': ['--format'],
+                    'help': 'Output format',
+                    'dest': 'output_format',
+                    'choices': HISTORY_FORMATS,
+                    'default': 'table'
+                }
+            ]
+        },
+        'undo': {
+            'target': undo_tasks,
+            'help': 'Take back the last command that changed tasks',
+            'args': []
+        },
+        'at': {
+            'target': at_tasks,
+            'help': 'Run a read-only command on the tasks as they were at a point in time',
+            'readonly': True,
+            'args': [
+                {
+                    'name_or_flags': ['timestamp'],
+                    'help': 'ISO timestamp to go back to'
+                },
+                {
+                    'name_or_flags': ['query'],
+                    'help': 'Command to run',
+                    'choices': ('list',)
+                },
+                *LIST_ARGS
+            ]
+        },
+        'rebalance': {
+            'target': rebalance_tasks,
+            'help': 'Spread the tasks of the sharded backend over a new number of shard files',
+            'args': [
+                {
+                    'name_or_flags': ['--shards'],
+                    'help': 'Number of shard files',
+                    'type': int,
+                    'required': True
+                },
+                {
+                    'name_or_flags': ['--scheme'],
+                    'help': 'Pick the shard of a task by a hash of its id or by its id range, the current scheme by default',
+                    'choices': ('hash', 'range')
+                },
+                {
+                    'name_or_flags': ['--range-size'],
+                    'help': 'Ids per shard for the range scheme',
+                    'type': int
                 }
             ]
         }
     }
 
 
-def get_queries(sup_queries: dict[str, SupportedQueryProperties]) -> tuple[dict, Callable]:
+def get_queries(sup_queries: dict[str, SupportedQueryProperties], argv: Optional[list[str]]=None) -> tuple[dict, Callable]:
     parser = ArgumentParser(
         prog='taski',
         description='Handy tool for handling tasks'
     )
+    # Profiling options are taken out of argv before parsing, they are only listed here for the help.
+    for arg in GLOBAL_ARGS:
+        kwargs = {key: value for key, value in arg.items() if key != 'name_or_flags'}
+        parser.add_argument(*arg['name_or_flags'], default=SUPPRESS, **kwargs)
 
     sub_parser = parser.add_subparsers(title='commands', dest='command', required=True)
 
+    # A known command only needs its own subparser; anything else gets all of them for the help and errors.
+    selected = argv[0] if argv else None
+    if selected in sup_queries:
+        sup_queries = {selected: sup_queries[selected]}
+
     for name, prop in sup_queries.items():
         s_pars = sub_parser.add_parser(name, help=prop['help'])
         for arg in prop['args']:
-            kwargs = {'help' : arg['help']}
-            if 'nargs' in arg:
-                kwargs['nargs'] = arg['nargs']
+            kwargs = {key: value for key, value in arg.items() if key != 'name_or_flags'}
             s_pars.add_argument(*arg['name_or_flags'], **kwargs)
 
-    args = vars(parser.parse_args())
+    args = vars(parser.parse_args(argv))
     queries = sup_queries[args.pop('command')]['target']
 
     return args, queries
@@ -109,38 +408,99 @@ def create_db_dir(folder_name: str=JSON_DB_PATH) -> None:
     os.makedirs(folder_name, exist_ok=True)
 
 
-def open_task_db(file_name: str ='tasks.json', folder_name: str=JSON_DB_PATH) -> dict[str, TaskProperties]:
+def open_task_db(file_name: str ='tasks.json', folder_name: str=JSON_DB_PATH, backend: Optional[str]=None, readonly: bool=False) -> dict[str, TaskProperties]:
+    storage = get_backend(backend)
     create_db_dir(folder_name)
-    try:
-        with open(f'{folder_name}/{file_name}', 'r', encoding='utf-8') as js_file:
-            task_tracker = json.load(js_file)
-            required_fields = {'task_id', 'description', 'status', 'createdAt', 'updatedAt'}
-            for task in task_tracker.values():
-                if not required_fields.issubset(task):
-                    raise ValueError(f"Missing required fields in task: {task}")
-    except FileNotFoundError:
-        task_tracker = {}
+    opener = storage.get('open_readonly', storage['open']) if readonly else storage['open']
+    path = f'{folder_name}/{file_name}'
+    with lock_store(path, exclusive=False):
+        task_tracker = opener(path)
+        if isinstance(task_tracker, TaskTracker):
+            task_tracker.version = read_version(path)
+            task_tracker.source = (path, backend_name(backend))
     return task_tracker
 
 
-def save_to_task_db(task_tracker: Optional[dict[str, TaskProperties]] = None, file_name: str='tasks.json', folder_name: str=JSON_DB_PATH) -> None:
-    with open(f'{folder_name}/{file_name}', 'w', encoding='utf-8') as js_file:
-        json.dump(task_tracker, js_file, indent=4)
+def save_to_task_db(task_tracker: Optional[dict[str, TaskProperties]] = None, file_name: str='tasks.json', folder_name: str=JSON_DB_PATH, backend: Optional[str]=None) -> None:
+    """Saves the tracker under an exclusive lock and bumps the store version.
+
+    A tracker saved back unchanged to the store it was opened from writes nothing at all.
+    Raises ConflictError, without writing anything, when another writer saved since the tracker was opened.
+    """
+    path = f'{folder_name}/{file_name}'
+    if isinstance(task_tracker, TaskTracker) and not task_tracker.changed() and task_tracker.source == (path, backend_name(backend)):
+        return
+    with lock_store(path):
+        version = read_version(path)
+        expected = getattr(task_tracker, 'version', None)
+        if expected is not None and expected != version:
+            raise ConflictError(f'{path} changed since it was opened (version {expected}, now {version})')
+        get_backend(backend)['save'](task_tracker, path)
+        write_version(path, version + 1)
+        if isinstance(task_tracker, TaskTracker):
+            task_tracker.version = version + 1
+            task_tracker.dirty.clear()
+            task_tracker.meta_dirty = False
+            with profiling.phase('save.journal'):
+                write_journal(task_tracker, path, version + 1)
+            with profiling.phase('save.indexes'):
+                log_changes(task_tracker, path, version + 1)
+
+
+def update_task_db(apply: Callable[[dict[str, TaskProperties]], Any], file_name: str='tasks.json', folder_name: str=JSON_DB_PATH, backend: Optional[str]=None, retries: int=SAVE_RETRIES) -> Any:
+    """Opens the database, applies ``apply`` to it and saves it, starting over when another writer got there first."""
+    for attempt in range(retries):
+        task_tracker = open_task_db(file_name, folder_name, backend)
+        result = apply(task_tracker)
+        try:
+            save_to_task_db(task_tracker, file_name, folder_name, backend)
+            return result
+        except ConflictError:
+            if attempt == retries - 1:
+                raise
+            import random
+            time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** min(attempt, 6)))
+
+
+def _mark_dirty(task_tracker: dict[str, TaskProperties], task_id: str) -> None:
+    if isinstance(task_tracker, TaskTracker):
+        task_tracker.mark_dirty(task_id)
+
+
+def _track_change(task_tracker: dict[str, TaskProperties], task_id: str, before: Optional[TaskProperties], after: Optional[TaskProperties], undoes: Optional[int]=None) -> None:
+    """Keeps the indexes, the stored counters and the journal in step with a task going from ``before`` to ``after``."""
+    if not isinstance(task_tracker, TaskTracker):
+        return
+    record_change(task_tracker, task_id, before, after, undoes)
+    task_tracker.index_changes[task_id] = after
+    if STATS_KEY in task_tracker.meta:
+        apply_change(task_tracker.meta[STATS_KEY], before, after)
+    else:
+        # Stores written before the counters existed pay for one scan, which already includes this change.
+        task_tracker.meta[STATS_KEY] = build_stats(task_tracker.tasks())
+
 
-def add_task(task_tracker: dict[str, TaskProperties], description: str) -> dict[str, TaskProperties]:
+def add_task(task_tracker: dict[str, TaskProperties], description: str, status: STATUS='todo') -> dict[str, TaskProperties]:
     if not isinstance(task_tracker, dict):
         raise TypeError("Task Tracker should not be empty and should be dict")
     if not description or not isinstance(description, str):
         raise TypeError("Description should not be empty and should be a string")
+    if status not in get_args(STATUS):
+        raise ValueError(f"Status only accepts following args -> {get_args(STATUS)}")
     creation_date = datetime.now().isoformat()
-    task_id = str(max(map(int, task_tracker.keys()), default=0) + 1)
+    if isinstance(task_tracker, TaskTracker):
+        task_id = task_tracker.allocate_id()
+    else:
+        task_id = str(max(map(int, task_tracker.keys()), default=0) + 1)
     task_tracker[task_id] ={
         'task_id': task_id,
         'description': description,
-        'status': 'todo',
+        'status': status,
         'createdAt': creation_date,
         'updatedAt': creation_date
     }
+    _mark_dirty(task_tracker, task_id)
+    _track_change(task_tracker, task_id, None, task_tracker[task_id])
     return task_tracker
 
 
@@ -150,9 +510,11 @@ def delete_task(task_tracker: dict[str, TaskProperties], task_id: str) -> dict[s
     if not task_id or not isinstance(task_id, str):
         raise TypeError("Task id should not be be empty and should be a string")
     try:
-        del task_tracker[task_id]
+        task = task_tracker.pop(task_id)
     except KeyError as exc:
         raise KeyError(f'Task id {task_id} not found') from exc
+    _mark_dirty(task_tracker, task_id)
+    _track_change(task_tracker, task_id, task, None)
     return task_tracker
 
 
@@ -169,38 +531,425 @@ def update_task(task_tracker: dict[str, TaskProperties], task_id: str, descripti
         if status not in get_args(STATUS):
             raise ValueError(f"Status only accepts following args -> {get_args(STATUS)}")
 
+        before = dict(task_tracker[task_id])
         if description is not None:
             task_tracker[task_id]['description'] = description
         if status:
             task_tracker[task_id]['status'] = status
         task_tracker[task_id]['updatedAt'] = datetime.now().isoformat()
+        _mark_dirty(task_tracker, task_id)
+        _track_change(task_tracker, task_id, before, task_tracker[task_id])
     except KeyError as exc:
         raise KeyError(f'Task id {task_id} not found') from exc
     return task_tracker
 
 
-def list_tasks(task_tracker: dict[str, TaskProperties], status: Optional[STATUS]=None) -> None:
+def _iter_tasks(task_tracker: dict[str, TaskProperties], status: Optional[STATUS]=None) -> Iterator[TaskProperties]:
+    if isinstance(task_tracker, TaskTracker):
+        return task_tracker.tasks(status)
+    return (task for task in task_tracker.values() if not status or task['status'] == status)
+
+
+def _select_tasks(tasks: Iterable[TaskProperties], limit: Optional[int]=None, offset: int=0, sort_by: Optional[str]=None) -> Iterator[TaskProperties]:
+    stop = None if limit is None else offset + limit
+    if sort_by:
+        import heapq
+        key = lambda task: task[sort_by]
+        # A page only needs its own slice ordered, so keep a bounded heap instead of sorting everything.
+        tasks = heapq.nsmallest(stop, tasks, key=key) if stop is not None else sorted(tasks, key=key)
+    return it.islice(tasks, offset, stop)
+
+
+def _format_cell(value: Any, width: Optional[int]=None) -> str:
+    cell = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+    return cell.ljust(width) if width else cell
+
+
+def write_tasks(tasks: Iterable[TaskProperties], output_format: str='table', fields: tuple[str, ...]=LIST_FIELDS) -> None:
+    """Streams tasks to stdout, flushing every ``LIST_BUFFER_ROWS`` rows so memory stays flat."""
+    buffer = io.StringIO()
+
+    if output_format == 'csv':
+        import csv
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(fields)
+    elif output_format == 'table':
+        widths = [LIST_COLUMN_WIDTHS[field] for field in fields[:-1]] + [None]
+        buffer.write('  '.join(_format_cell(field, width) for field, width in zip(fields, widths)).rstrip() + '\n')
+
+    for row_no, task in enumerate(tasks, start=1):
+        if output_format == 'jsonl':
+            buffer.write(json.dumps({field: task[field] for field in fields}, ensure_ascii=False) + '\n')
+        elif output_format == 'csv':
+            writer.writerow([task[field] for field in fields])
+        else:
+            buffer.write('  '.join(_format_cell(task[field], width) for field, width in zip(fields, widths)).rstrip() + '\n')
+        if row_no % LIST_BUFFER_ROWS == 0:
+            sys.stdout.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+
+    sys.stdout.write(buffer.getvalue())
+    sys.stdout.flush()
+
+
+def _tasks_in_range(task_tracker: dict[str, TaskProperties], created_after: Optional[str]=None, created_before: Optional[str]=None, updated_since: Optional[str]=None) -> Iterator[TaskProperties]:
+    index = load_time_index(_store_path(task_tracker), task_tracker)
+    after = iso_to_micros(created_after) if created_after else None
+    before = iso_to_micros(created_before) if created_before else None
+
+    if updated_since:
+        task_ids = index.between('updatedAt', iso_to_micros(updated_since), include_after=True)
+        if after is not None or before is not None:
+            created = set(index.between('createdAt', after, before))
+            task_ids = (task_id for task_id in task_ids if task_id in created)
+    else:
+        task_ids = index.between('createdAt', after, before)
+    return fetch_tasks(index, task_tracker, task_ids)
+
+
+def list_tasks(task_tracker: dict[str, TaskProperties], status: Optional[STATUS]=None, output_format: str='table', limit: Optional[int]=None, offset: int=0, sort_by: Optional[str]=None, fields: Optional[str]=None, created_after: Optional[str]=None, created_before: Optional[str]=None, updated_since: Optional[str]=None) -> None:
     if isinstance(task_tracker, dict):
         if status in get_args(STATUS) or status is None:
-            for _, task in task_tracker.items():
-                if not status:
-                    pprint(task, sort_dicts=False)
-                elif task['status'] == status:
-                    pprint(task, sort_dicts=False)
+            if output_format not in LIST_FORMATS:
+                raise ValueError(f"Format only accepts following args -> {LIST_FORMATS}")
+            if sort_by is not None and sort_by not in LIST_SORT_FIELDS:
+                raise ValueError(f"Sort by only accepts following args -> {LIST_SORT_FIELDS}")
+            if (limit is not None and limit < 0) or offset < 0:
+                raise ValueError('Limit and offset should not be negative')
+            selected_fields = tuple(field.strip() for field in fields.split(',')) if fields else LIST_FIELDS
+            if not set(selected_fields).issubset(LIST_FIELDS):
+                raise ValueError(f"Fields only accepts following args -> {LIST_FIELDS}")
+
+            if created_after or created_before or updated_since:
+                # The time index narrows the tasks down first, so only the ones in range are read from the index database.
+                tasks = _tasks_in_range(task_tracker, created_after, created_before, updated_since)
+                if status:
+                    tasks = (task for task in tasks if task['status'] == status)
+            else:
+                tasks = _iter_tasks(task_tracker, status)
+            write_tasks(_select_tasks(tasks, limit, offset, sort_by), output_format, selected_fields)
         else:
             raise ValueError(f"Status only accepts following args -> {get_args(STATUS)}")
     else:
         raise TypeError(f'List tasks accepts a dict got: {task_tracker}')
 
 
-def main() -> None:
+def search_tasks(task_tracker: dict[str, TaskProperties], terms: list[str], status: Optional[STATUS]=None, output_format: str='table', limit: Optional[int]=None) -> None:
+    if not isinstance(task_tracker, dict):
+        raise TypeError(f'Search tasks accepts a dict got: {task_tracker}')
+    if status is not None and status not in get_args(STATUS):
+        raise ValueError(f"Status only accepts following args -> {get_args(STATUS)}")
+    if output_format not in LIST_FORMATS:
+        raise ValueError(f"Format only accepts following args -> {LIST_FORMATS}")
+    if limit is not None and limit < 0:
+        raise ValueError('Limit should not be negative')
+
+    index = load_index(_store_path(task_tracker), task_tracker)
+    task_ids = sorted(index.search(terms, status), key=lambda task_id: (len(task_id), task_id))[:limit]
+    write_tasks(fetch_tasks(index, task_tracker, task_ids), output_format)
 
-    task_manager = open_task_db()
-    args, queries = get_queries(sup_queries=supported_queries())
 
-    queries(task_manager, **args)
+def stats_tasks(task_tracker: dict[str, TaskProperties], output_format: str='table', check: bool=False, rebuild: bool=False) -> TaskStats:
+    if not isinstance(task_tracker, dict):
+        raise TypeError(f'Stats accepts a dict got: {task_tracker}')
+    if output_format not in STATS_FORMATS:
+        raise ValueError(f"Format only accepts following args -> {STATS_FORMATS}")
+
+    meta = task_tracker.meta if isinstance(task_tracker, TaskTracker) else {}
+    stats = meta.get(STATS_KEY)
+    if stats is None or check or rebuild:
+        counted = build_stats(_iter_tasks(task_tracker))
+        if check and stats is not None and stats != counted:
+            raise ValueError('Stored counters do not match the tasks, run stats --rebuild')
+        if rebuild and isinstance(task_tracker, TaskTracker):
+            task_tracker.meta[STATS_KEY] = counted
+            task_tracker.meta_dirty = True
+        stats = counted
+
+    if output_format == 'json':
+        print(json.dumps({**stats, 'total': total(stats)}))
+    else:
+        for status, count in stats['status'].items():
+            print(f'{status:<12}{count}')
+        print(f'{"total":<12}{total(stats)}')
+        if stats['created'] or stats['updated']:
+            print(f'\n{"day":<12}{"created":<10}updated')
+            for day in sorted(set(stats['created']) | set(stats['updated'])):
+                print(f'{day:<12}{stats["created"].get(day, 0):<10}{stats["updated"].get(day, 0)}')
+    return stats
+
+
+def _read_batch(items: Optional[list[str]], key: str, file_path: Optional[str]=None, file_format: Optional[str]=None) -> Iterator[Any]:
+    """Yields one record per batch item, or the parsing error of an item that could not be read."""
+    if items and items != ['-']:
+        for item in items:
+            yield {key: item}
+        return
+
+    if not file_format:
+        extension = os.path.splitext(file_path or '')[1].lower()
+        file_format = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension, 'lines')
+
+    if file_path and file_path != '-':
+        batch_file = open(file_path, 'r', encoding='utf-8', newline='')
+    else:
+        batch_file = sys.stdin
 
-    save_to_task_db(task_manager)
+    try:
+        if file_format == 'csv':
+            import csv
+            yield from csv.DictReader(batch_file)
+            return
+        for line in batch_file:
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+            if file_format == 'lines':
+                yield {key: line}
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield exc
+    finally:
+        if batch_file is not sys.stdin:
+            batch_file.close()
+
+
+def _record_id(record: dict) -> Any:
+    task_id = record.get('task_id')
+    return str(task_id) if isinstance(task_id, int) and not isinstance(task_id, bool) else task_id
+
+
+def _apply_batch(records: Iterable[Any], apply: Callable[[dict], None]) -> BatchReport:
+    report: BatchReport = {'succeeded': 0, 'failed': []}
+    for item_no, record in enumerate(records, start=1):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise TypeError(f'Item should be an object got: {record}')
+            apply(record)
+            report['succeeded'] += 1
+        except (KeyError, TypeError, ValueError) as exc:
+            report['failed'].append(f'item {item_no}: {exc}')
+            print(f'item {item_no}: {exc}', file=sys.stderr)
+    print(f"{report['succeeded']} succeeded, {len(report['failed'])} failed")
+    return report
+
+
+def import_tasks(task_tracker: dict[str, TaskProperties], descriptions: Optional[list[str]]=None, file_path: Optional[str]=None, file_format: Optional[str]=None) -> BatchReport:
+    if not isinstance(task_tracker, dict):
+        raise TypeError("Task Tracker should not be empty and should be dict")
+
+    def _import(record: dict) -> None:
+        add_task(task_tracker, record.get('description'), record.get('status') or 'todo')
+
+    return _apply_batch(_read_batch(descriptions, 'description', file_path, file_format), _import)
+
+
+def bulk_update_tasks(task_tracker: dict[str, TaskProperties], task_ids: Optional[list[str]]=None, status: Optional[STATUS]=None, description: Optional[str]=None, file_path: Optional[str]=None, file_format: Optional[str]=None) -> BatchReport:
+    if not isinstance(task_tracker, dict):
+        raise TypeError("Task Tracker should not be empty and should be dict")
+
+    def _update(record: dict) -> None:
+        task_id = _record_id(record)
+        if task_id not in task_tracker:
+            raise KeyError(f'Task id {task_id} not found')
+        task = task_tracker[task_id]
+        update_task(
+            task_tracker,
+            task_id,
+            record.get('description') or description or task['description'],
+            record.get('status') or status or task['status']
+        )
+
+    return _apply_batch(_read_batch(task_ids, 'task_id', file_path, file_format), _update)
+
+
+def bulk_delete_tasks(task_tracker: dict[str, TaskProperties], task_ids: Optional[list[str]]=None, file_path: Optional[str]=None, file_format: Optional[str]=None) -> BatchReport:
+    if not isinstance(task_tracker, dict):
+        raise TypeError("Task Tracker should not be empty and should be dict")
+
+    def _delete(record: dict) -> None:
+        delete_task(task_tracker, _record_id(record))
+
+    return _apply_batch(_read_batch(task_ids, 'task_id', file_path, file_format), _delete)
+
+
+def _run_daemon_command(task_tracker: dict[str, TaskProperties], argv: list[str], stdin: Optional[TextIO]=None, cwd: Optional[str]=None) -> DaemonResponse:
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    # Commands run one at a time, so swapping the process-wide stdin for the client's is safe.
+    daemon_stdin, sys.stdin = sys.stdin, stdin if stdin is not None else io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            args, queries = get_queries(supported_queries(), argv)
+            if queries is serve_tasks:
+                raise ValueError('The taski daemon is already running')
+            for key in PATH_ARGS:
+                if cwd and args.get(key) not in (None, '-'):
+                    args[key] = os.path.join(cwd, args[key])
+            queries(task_tracker, **args)
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+        except Exception as exc:
+            # A failing command must not take the daemon down, it is reported to the client instead.
+            print(f'{type(exc).__name__}: {exc}', file=sys.stderr)
+            code = 1
+        finally:
+            sys.stdin = daemon_stdin
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': code}
+
+
+def _store_path(task_tracker: dict[str, TaskProperties]) -> str:
+    source = getattr(task_tracker, 'source', None)
+    return source[0] if source else f'{JSON_DB_PATH}/tasks.json'
+
+
+def _describe_change(record: JournalRecord) -> tuple[str, str]:
+    if record['before'] is None:
+        return 'add', f"{record['after']['description']!r} {record['after']['status']}"
+    if record['after'] is None:
+        return 'delete', f"{record['before']['description']!r} {record['before']['status']}"
+    changes = (f"{field} {record['before'][field]!r} -> {record['after'][field]!r}" for field in record['after'] if field != 'updatedAt')
+    return 'update', ', '.join(changes)
+
+
+def history_tasks(task_tracker: dict[str, TaskProperties], task_id: str, output_format: str='table') -> list[JournalRecord]:
+    if output_format not in HISTORY_FORMATS:
+        raise ValueError(f"Format only accepts following args -> {HISTORY_FORMATS}")
+    records = list(read_journal(_store_path(task_tracker), task_id=task_id))
+    if not records:
+        print(f'No history for task {task_id}', file=sys.stderr)
+    for record in records:
+        if output_format == 'jsonl':
+            print(json.dumps(record))
+            continue
+        operation, changes = _describe_change(record)
+        if 'undoes' in record:
+            operation += ' (undo)'
+        print(f"{record['at']:<28}{operation:<16}{changes}")
+    return records
+
+
+def undo_tasks(task_tracker: dict[str, TaskProperties]) -> Optional[int]:
+    """Reverts every change of the newest transaction in the journal that was not undone yet."""
+    if not isinstance(task_tracker, TaskTracker):
+        raise TypeError(f'Undo accepts a TaskTracker got: {task_tracker}')
+    txn, records = last_undoable(_store_path(task_tracker))
+    if txn is None:
+        print('Nothing to undo', file=sys.stderr)
+        return None
+    for record in reversed(records):
+        task_id = record['id']
+        current = task_tracker.get(task_id)
+        before = None if current is None else dict(current)
+        if record['before'] is None:
+            if current is None:
+                continue
+            del task_tracker[task_id]
+            after = None
+        elif record['after'] is None:
+            after = task_tracker[task_id] = dict(record['before'])
+        elif current is None:
+            # Deleted by a later command, there is nothing left to revert.
+            continue
+        else:
+            after = task_tracker[task_id] = {**before, **record['before']}
+        _mark_dirty(task_tracker, task_id)
+        _track_change(task_tracker, task_id, before, after, undoes=txn)
+    print(f"Undid {len(records)} changes made at {records[0]['at']}")
+    return txn
+
+
+def at_tasks(task_tracker: dict[str, TaskProperties], timestamp: str, query: str='list', **kwargs: Any) -> None:
+    """Runs ``query`` on the tasks rebuilt as they were at ``timestamp``."""
+    if query != 'list':
+        raise ValueError("At only accepts following args -> ('list',)")
+    list_tasks(TaskTracker(state_at(_store_path(task_tracker), timestamp)), **kwargs)
+
+
+def rebalance_tasks(task_tracker: dict[str, TaskProperties], shards: int, scheme: Optional[str]=None, range_size: Optional[int]=None) -> None:
+    if not hasattr(task_tracker, 'layout'):
+        raise ValueError('Rebalance only works with the sharded backend, set TASKI_BACKEND=sharded')
+    try:
+        from .shard_store import get_layout
+    except ImportError:
+        from shard_store import get_layout
+
+    layout = get_layout(shards, scheme or task_tracker.layout['scheme'], range_size or task_tracker.layout['range_size'])
+    task_tracker.rebalance(layout)
+    print(f"Rebalanced {len(task_tracker)} tasks into {layout['count']} {layout['scheme']} shards")
+
+
+def serve_tasks(task_tracker: dict[str, TaskProperties], stop: bool=False) -> None:
+    path = socket_path(JSON_DB_PATH)
+    if stop:
+        if not stop_daemon(path):
+            print('No taski daemon is running', file=sys.stderr)
+        return
+
+    if daemon_running(path):
+        raise OSError(f'A taski daemon is already listening on {path}')
+
+    # The daemon keeps the store locked while it runs: commands that bypass it wait for it to stop
+    # instead of saving changes its copy would then overwrite.
+    store_path = _store_path(task_tracker)
+    with lock_store(store_path):
+        if read_version(store_path) != getattr(task_tracker, 'version', None):
+            # Saved to between opening the store and locking it.
+            task_tracker = open_task_db()
+        serve(
+            path,
+            run_command=lambda argv, stdin, cwd: _run_daemon_command(task_tracker, argv, stdin, cwd),
+            save=lambda: save_to_task_db(task_tracker),
+            is_dirty=lambda: not isinstance(task_tracker, TaskTracker) or task_tracker.changed()
+        )
+
+
+def main(argv: Optional[list[str]]=None) -> None:
+
+    argv = sys.argv[1:] if argv is None else argv
+    trace, argv = profiling.start(argv, JSON_DB_PATH)
+    if trace is None:
+        if forward(JSON_DB_PATH, argv):
+            return
+        _run(argv)
+        return
+    try:
+        _run(argv)
+    except BaseException as exc:
+        profiling.finish(exc)
+        raise
+    profiling.finish()
+
+
+def _run(argv: list[str]) -> None:
+    sup_queries = supported_queries()
+    with profiling.phase('parse'):
+        args, queries = get_queries(sup_queries=sup_queries, argv=argv)
+    query = next(prop for prop in sup_queries.values() if prop['target'] is queries)
+    readonly = query.get('readonly', False)
+    if callable(readonly):
+        readonly = readonly(args)
+    saves_itself = query.get('saves_itself', False)
+
+    # Commands hold the store lock from the first read to the last write, so concurrent runs queue
+    # up instead of losing each other's updates. The daemon locks the store itself, for as long as it runs.
+    create_db_dir()
+    store_lock = nullcontext() if saves_itself else lock_store(f'{JSON_DB_PATH}/tasks.json', exclusive=not readonly)
+    with store_lock:
+        with profiling.phase('open'):
+            task_manager = open_task_db(readonly=readonly)
+
+        with profiling.phase('query'):
+            queries(task_manager, **args)
+
+        if not readonly and not saves_itself:
+            with profiling.phase('save'):
+                save_to_task_db(task_manager)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,28 @@
+"""Startup-optimized launcher for taski.
+
+Running ``taski.py`` as a script compiles it on every call, while importing it reuses the cached
+bytecode. Commands a ``taski serve`` daemon is listening for are forwarded before taski is even imported.
+"""
+import sys
+
+try:
+    from .config import JSON_DB_PATH
+    from .server import forward
+except ImportError:
+    from config import JSON_DB_PATH
+    from server import forward
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    if forward(JSON_DB_PATH, argv):
+        return
+    try:
+        from .taski import main as taski_main
+    except ImportError:
+        from taski import main as taski_main
+    taski_main(argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+from bisect import bisect_left, insort
+from typing import Iterator, Optional
+
+try:
+    from .models import TaskProperties, iso_to_micros
+except ImportError:
+    from models import TaskProperties, iso_to_micros
+
+TIME_FIELDS = ('createdAt', 'updatedAt')
+
+
+class TimeIndex:
+    """Task ids sorted by ``createdAt`` and by ``updatedAt``, as ``(microseconds, task_id)`` pairs.
+
+    Range queries bisect to their first entry and then only walk the matching ones. ``index_store``
+    persists it; this in-memory one serves trackers that were not opened from a store.
+    """
+
+    def __init__(self, entries: Optional[dict[str, list[tuple[int, str]]]] = None) -> None:
+        self.entries = entries if entries is not None else {field: [] for field in TIME_FIELDS}
+
+    def add(self, task_id: str, task: TaskProperties) -> None:
+        # New and updated tasks carry the latest timestamps, so this almost always appends.
+        for field in TIME_FIELDS:
+            insort(self.entries[field], (iso_to_micros(task[field]), task_id))
+
+    def remove(self, task_id: str, task: TaskProperties) -> None:
+        for field in TIME_FIELDS:
+            entries = self.entries[field]
+            entry = (iso_to_micros(task[field]), task_id)
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+
+    def between(self, field: str, after: Optional[int] = None, before: Optional[int] = None, include_after: bool = False) -> Iterator[str]:
+        """Yields the ids of tasks whose ``field`` lies after ``after`` and before ``before``, oldest first."""
+        for _, task_id in self._range(field, after, before, include_after):
+            yield task_id
+
+    def _range(self, field: str, after: Optional[int], before: Optional[int], include_after: bool) -> Iterator[tuple[int, str]]:
+        entries = self.entries[field]
+        if after is None:
+            start = 0
+        elif include_after:
+            start = bisect_left(entries, (after,))
+        else:
+            # Every pair at exactly ``after`` sorts after ``(after,)`` but before ``(after + 1,)``.
+            start = bisect_left(entries, (after + 1,))
+        stop = len(entries) if before is None else bisect_left(entries, (before,))
+        for position in range(start, stop):
+            yield entries[position]
+
+
+def build_time_index(task_tracker: dict[str, TaskProperties]) -> TimeIndex:
+    entries: dict[str, list[tuple[int, str]]] = {field: [] for field in TIME_FIELDS}
+    for task_id, task in task_tracker.items():
+        for field in TIME_FIELDS:
+            entries[field].append((iso_to_micros(task[field]), task_id))
+    for field_entries in entries.values():
+        field_entries.sort()
+    return TimeIndex(entries)
@@ -0,0 +1,31 @@
+import json
+import subprocess
+import os
+
+
+def _run(args, tmp_path, stdin=None):
+    return subprocess.run(
+        ['python', 'Task Tracker/src/taski.py', *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, 'TASKI_DB_PATH': str(tmp_path)}
+    )
+
+def test_bulk_commands(tmp_path):
+    result = _run(['import'], tmp_path, stdin=''.join(f'task {i}\n' for i in range(100)))
+    assert result.returncode == 0
+    assert '100 succeeded, 0 failed' in result.stdout
+
+    result = _run(['bulk-update', '--status', 'done', '5', '6', '500'], tmp_path)
+    assert '2 succeeded, 1 failed' in result.stdout
+    assert 'item 3' in result.stderr
+
+    result = _run(['bulk-delete', '-'], tmp_path, stdin='1\n2\n3\n')
+    assert '3 succeeded, 0 failed' in result.stdout
+
+    tasks = json.loads((tmp_path / 'tasks.json').read_text())
+    assert len(tasks) == 97
+    assert tasks['5']['status'] == 'done'
+    assert tasks['7']['status'] == 'todo'
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+
+
+def _suite(*args):
+    return subprocess.run(
+        [sys.executable, 'Task Tracker/benchmarks/suite.py', '--sizes', '200', '--runs', '1', *args],
+        capture_output=True,
+        text=True,
+        check=False
+    )
+
+def test_suite_reports_and_compares(tmp_path):
+    output = tmp_path / 'results.json'
+    assert _suite('--output', str(output)).returncode == 0
+    results = json.loads(output.read_text())
+    benchmarks = results['benchmarks']['json/200']
+    assert {'open', 'save', 'add', 'update', 'delete', 'list', 'list_status', 'cli_add'} <= set(benchmarks)
+    assert all(result['seconds'] > 0 and result['peak_rss_kb'] > 0 for result in benchmarks.values())
+
+    assert _suite('--baseline', str(output), '--threshold', '1000').returncode == 0
+
+    for result in benchmarks.values():
+        result['seconds'] /= 1000
+    output.write_text(json.dumps(results))
+    regressed = _suite('--baseline', str(output))
+    assert regressed.returncode == 1
+    assert 'Regression json/200 open' in regressed.stderr
@@ -1,3 +1,5 @@
+import os
+import sys
 from src.taski import open_task_db
 import subprocess
 import pytest
@@ -24,4 +26,20 @@ def test_cli_missing_argument(query):
         check=False
     )
     assert result.returncode != 0
-    assert "the following arguments are required" in result.stderr
\ No newline at end of file
+    assert "the following arguments are required" in result.stderr
+def _store_files(folder):
+    return {entry.name: (entry.stat().st_mtime_ns, entry.stat().st_size) for entry in os.scandir(folder)}
+
+@pytest.mark.parametrize('backend', ('json', 'wal', 'sharded'))
+def test_read_only_commands_do_not_write(tmp_path, backend):
+    env = {**os.environ, 'TASKI_DB_PATH': str(tmp_path), 'TASKI_BACKEND': backend, 'TASKI_NO_DAEMON': '1'}
+    for description in ('Buy groceries', 'Cook dinner'):
+        subprocess.run([sys.executable, 'Task Tracker/src/taski.py', 'add', description], env=env, check=True)
+    # The first search builds the search index, later ones only read it.
+    subprocess.run([sys.executable, 'Task Tracker/src/taski.py', 'search', 'groceries'], env=env, stdout=subprocess.DEVNULL, check=True)
+    before = _store_files(tmp_path)
+    for args in (['list'], ['list', '--status', 'todo'], ['search', 'dinner'], ['stats']):
+        subprocess.run([sys.executable, 'Task Tracker/src/taski.py', *args], env=env, stdout=subprocess.DEVNULL, check=True)
+    # A failing change must not touch the store either.
+    subprocess.run([sys.executable, 'Task Tracker/src/taski.py', 'delete', '42'], env=env, capture_output=True, check=False)
+    assert _store_files(tmp_path) == before
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from multiprocessing import get_context
+
+from src.taski import add_task, open_task_db, update_task_db
+
+WORKERS = 8
+ADDS_PER_WORKER = 25
+CLI_RUNS = 10
+
+
+def _add_many(folder, worker):
+    for i in range(ADDS_PER_WORKER):
+        update_task_db(lambda task_tracker: add_task(task_tracker, f'worker {worker} task {i}'), folder_name=folder)
+
+def _cli_add(folder, worker):
+    for i in range(CLI_RUNS):
+        subprocess.run(
+            [sys.executable, 'Task Tracker/src/taski.py', 'add', f'cli {worker} task {i}'],
+            capture_output=True,
+            check=True,
+            env={**os.environ, 'TASKI_DB_PATH': folder, 'TASKI_NO_DAEMON': '1'}
+        )
+
+def test_parallel_writers_lose_nothing(tmp_path):
+    folder = str(tmp_path)
+    ctx = get_context('fork')
+    processes = [ctx.Process(target=_add_many, args=(folder, worker)) for worker in range(WORKERS)]
+    processes += [ctx.Process(target=_cli_add, args=(folder, worker)) for worker in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    tasks = json.loads((tmp_path / 'tasks.json').read_text())
+    expected = WORKERS * ADDS_PER_WORKER + 2 * CLI_RUNS
+    assert len(tasks) == expected
+    assert len({task['description'] for task in tasks.values()}) == expected
+    assert len(open_task_db(folder_name=folder)) == expected
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.server import request_daemon, socket_path
+
+
+def _env(tmp_path):
+    return {**os.environ, 'TASKI_DB_PATH': str(tmp_path)}
+
+def _run(args, tmp_path, **kwargs):
+    return subprocess.run(
+        [sys.executable, os.path.abspath('Task Tracker/src/taski.py'), *args],
+        capture_output=True,
+        text=True,
+        check=False,
+        env=_env(tmp_path),
+        **kwargs
+    )
+
+def _start_daemon(tmp_path):
+    daemon = subprocess.Popen([sys.executable, 'Task Tracker/src/taski.py', 'serve'], env=_env(tmp_path))
+    sock = tmp_path / 'taski.sock'
+    for _ in range(100):
+        if sock.exists():
+            break
+        time.sleep(0.05)
+    assert sock.exists()
+    return daemon
+
+def _stop_daemon(daemon, tmp_path):
+    assert _run(['serve', '--stop'], tmp_path).returncode == 0
+    assert daemon.wait(timeout=10) == 0
+
+def test_no_daemon(tmp_path):
+    assert request_daemon(socket_path(str(tmp_path)), ['list']) is None
+
+def test_daemon_serves_and_saves(tmp_path):
+    daemon = _start_daemon(tmp_path)
+    try:
+        assert _run(['add', 'Buy groceries'], tmp_path).returncode == 0
+        assert _run(['update', '1', '--description', 'Buy groceries', '--status', 'done'], tmp_path).returncode == 0
+        result = _run(['list', '--format', 'jsonl'], tmp_path)
+        assert json.loads(result.stdout)['status'] == 'done'
+
+        result = _run(['delete', '42'], tmp_path)
+        assert result.returncode == 1
+        assert 'KeyError' in result.stderr
+
+        _stop_daemon(daemon, tmp_path)
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+
+    assert not (tmp_path / 'taski.sock').exists()
+    tasks = json.loads((tmp_path / 'tasks.json').read_text())
+    assert tasks['1']['description'] == 'Buy groceries'
+    assert tasks['1']['status'] == 'done'
+
+def test_daemon_reads_client_stdin_and_paths(tmp_path):
+    daemon = _start_daemon(tmp_path)
+    try:
+        result = _run(['import'], tmp_path, input='a\nb\n')
+        assert result.stdout == '2 succeeded, 0 failed\n'
+        work = tmp_path / 'work'
+        work.mkdir()
+        (work / 'items.txt').write_text('c\n')
+        result = _run(['import', '--file', 'items.txt'], tmp_path, cwd=work)
+        assert result.stdout == '1 succeeded, 0 failed\n'
+        result = _run(['list', '--format', 'jsonl'], tmp_path)
+        assert [json.loads(line)['description'] for line in result.stdout.splitlines()] == ['a', 'b', 'c']
+        # Commands that do not read stdin leave it alone.
+        assert _run(['add', 'd'], tmp_path, input='ignored').returncode == 0
+        _stop_daemon(daemon, tmp_path)
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+
+def test_commands_bypassing_the_daemon_wait_for_it(tmp_path):
+    daemon = _start_daemon(tmp_path)
+    try:
+        assert _run(['add', 'a'], tmp_path).returncode == 0
+        bypass = subprocess.Popen(
+            [sys.executable, 'Task Tracker/src/taski.py', 'add', 'b'],
+            env={**_env(tmp_path), 'TASKI_NO_DAEMON': '1'}
+        )
+        time.sleep(1)
+        assert bypass.poll() is None
+        _stop_daemon(daemon, tmp_path)
+        assert bypass.wait(timeout=10) == 0
+    finally:
+        if daemon.poll() is None:
+            daemon.kill()
+
+    tasks = json.loads((tmp_path / 'tasks.json').read_text())
+    assert {task_id: task['description'] for task_id, task in tasks.items()} == {'1': 'a', '2': 'b'}
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import pytest
+
+HEAVY_MODULES = {'sqlite3', 'mmap', 'socketserver', 'threading', 'csv', 'socket'}
+
+
+def _imported(args, tmp_path, entry='taski.py'):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', f'Task Tracker/src/{entry}', *args],
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, 'TASKI_DB_PATH': str(tmp_path), 'TASKI_NO_DAEMON': '1'}
+    )
+    return {line.split('|')[-1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')}
+
+@pytest.mark.parametrize('entry', ['taski.py', 'taski_cli.py'])
+@pytest.mark.parametrize('args', [['--help'], ['delete', '--help'], ['add', 'task'], ['list']])
+def test_commands_skip_heavy_imports(tmp_path, args, entry):
+    assert not HEAVY_MODULES & _imported(args, tmp_path, entry)
+
+def test_help_does_not_open_the_database(tmp_path):
+    _imported(['list', '--help'], tmp_path)
+    assert not os.listdir(tmp_path)
+
+def test_launcher_runs_commands(tmp_path):
+    env = {**os.environ, 'TASKI_DB_PATH': str(tmp_path), 'TASKI_NO_DAEMON': '1'}
+    subprocess.run([sys.executable, 'Task Tracker/src/taski_cli.py', 'add', 'Buy groceries'], env=env, check=True)
+    result = subprocess.run([sys.executable, 'Task Tracker/src/taski_cli.py', 'list'], env=env, capture_output=True, text=True, check=True)
+    assert 'Buy groceries' in result.stdout
+
+def test_profile_reports_phases(tmp_path):
+    env = {**os.environ, 'TASKI_DB_PATH': str(tmp_path)}
+    result = subprocess.run([sys.executable, 'Task Tracker/src/taski_cli.py', 'add', 'Buy groceries', '--profile'], env=env, capture_output=True, text=True, check=True)
+    for name in ('parse', 'open', 'query', 'save', 'tasks.json'):
+        assert name in result.stderr
@@ -0,0 +1,84 @@
+import io
+import sys
+import json
+import pytest
+from src.models import TaskTracker
+from src.taski import import_tasks, bulk_update_tasks, bulk_delete_tasks, add_task
+from ..conftest import make_task_tracker
+
+
+def test_import_tasks_from_args(capsys):
+    task_tracker = TaskTracker()
+    report = import_tasks(task_tracker, ['first', 'second', 'third'])
+    assert report == {'succeeded': 3, 'failed': []}
+    assert [task['description'] for task in task_tracker.values()] == ['first', 'second', 'third']
+    assert task_tracker.dirty == {'1', '2', '3'}
+    assert '3 succeeded, 0 failed' in capsys.readouterr().out
+
+def test_import_tasks_from_stdin(monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('first\n\nsecond\n'))
+    task_tracker = TaskTracker()
+    import_tasks(task_tracker)
+    assert len(task_tracker) == 2
+    assert task_tracker['2']['description'] == 'second'
+
+def test_import_tasks_from_jsonl(tmp_path, capsys):
+    batch_file = tmp_path / 'tasks.jsonl'
+    batch_file.write_text('\n'.join((
+        json.dumps({'description': 'done task', 'status': 'done'}),
+        '{ not valid json }',
+        json.dumps({'description': 'todo task'}),
+        json.dumps({'description': 'bad status', 'status': 'test'}),
+        json.dumps(['not', 'an', 'object']),
+    )))
+    task_tracker = TaskTracker()
+    report = import_tasks(task_tracker, file_path=str(batch_file))
+
+    assert report['succeeded'] == 2
+    assert [failure.split(':')[0] for failure in report['failed']] == ['item 2', 'item 4', 'item 5']
+    assert task_tracker['1']['status'] == 'done'
+    assert task_tracker['2']['status'] == 'todo'
+    assert 'item 2' in capsys.readouterr().err
+
+def test_import_tasks_from_csv(tmp_path):
+    batch_file = tmp_path / 'tasks.csv'
+    batch_file.write_text('description,status\nfirst,in-progress\n"with, comma",\n')
+    task_tracker = TaskTracker()
+    import_tasks(task_tracker, file_path=str(batch_file))
+    assert task_tracker['1']['status'] == 'in-progress'
+    assert task_tracker['2']['description'] == 'with, comma'
+    assert task_tracker['2']['status'] == 'todo'
+
+def test_bulk_update_tasks():
+    task_tracker = TaskTracker(make_task_tracker(10, rnd_desc=True))
+    before = task_tracker['3']['description']
+    report = bulk_update_tasks(task_tracker, ['1', '3', '42'], status='done')
+    assert report['succeeded'] == 2
+    assert len(report['failed']) == 1
+    assert task_tracker['1']['status'] == task_tracker['3']['status'] == 'done'
+    assert task_tracker['3']['description'] == before
+    assert task_tracker['2']['status'] == 'todo'
+
+def test_bulk_update_tasks_per_item_values(tmp_path):
+    batch_file = tmp_path / 'updates.csv'
+    batch_file.write_text('task_id,status,description\n1,done,\n2,,new description\n')
+    task_tracker = TaskTracker(make_task_tracker(5))
+    bulk_update_tasks(task_tracker, file_path=str(batch_file), status='in-progress')
+    assert task_tracker['1']['status'] == 'done'
+    assert task_tracker['2']['status'] == 'in-progress'
+    assert task_tracker['2']['description'] == 'new description'
+
+def test_bulk_delete_tasks(monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('{"task_id": 1}\n{"task_id": "7"}\n{"task_id": "7"}\n'))
+    task_tracker = TaskTracker(make_task_tracker(10))
+    report = bulk_delete_tasks(task_tracker, ['-'], file_format='jsonl')
+    assert report['succeeded'] == 2
+    assert len(report['failed']) == 1
+    assert '1' not in task_tracker and '7' not in task_tracker
+    assert len(task_tracker) == 8
+
+def test_add_task_with_status():
+    task_tracker = add_task({}, 'already done', 'done')
+    assert task_tracker['1']['status'] == 'done'
+    with pytest.raises(ValueError):
+        add_task({}, 'test', 'test')
@@ -0,0 +1,116 @@
+import pytest
+from src import binary_store
+from src.binary_store import BinaryTaskTracker, binary_path, write_binary
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+def _reopen(tmp_path):
+    return open_task_db(TEST_FILE_PATH, str(tmp_path), backend='binary')
+
+@pytest.fixture
+def binary_tracker(tmp_path):
+    task_tracker = _reopen(tmp_path)
+    yield task_tracker
+    task_tracker.close()
+
+def test_binary_crud(tmp_path, binary_tracker):
+    assert isinstance(binary_tracker, BinaryTaskTracker)
+    for desc in ('first', 'second', 'third', 'zażółć'):
+        add_task(binary_tracker, desc)
+    update_task(binary_tracker, '2', 'second updated', 'done')
+    delete_task(binary_tracker, '1')
+    assert len(binary_tracker) == 3
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+
+    reopened = _reopen(tmp_path)
+    assert list(reopened) == ['2', '3', '4']
+    assert reopened == binary_tracker
+    assert reopened['4']['description'] == 'zażółć'
+    assert reopened['2']['status'] == 'done'
+    add_task(reopened, 'fifth')
+    assert '5' in reopened
+    reopened.close()
+
+def test_binary_update_patches_in_place(tmp_path, binary_tracker):
+    for i in range(10):
+        add_task(binary_tracker, f'task {i}')
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    heap_end = binary_tracker.heap_end
+
+    update_task(binary_tracker, '3', 'task 2', 'done')
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    assert binary_tracker.heap_end == heap_end
+
+    update_task(binary_tracker, '3', 'a longer description', 'in-progress')
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    assert binary_tracker.heap_end == heap_end + len('a longer description')
+
+    reopened = _reopen(tmp_path)
+    assert reopened['3']['description'] == 'a longer description'
+    assert reopened['3']['status'] == 'in-progress'
+    assert reopened['3']['updatedAt'] == binary_tracker['3']['updatedAt']
+    reopened.close()
+
+def test_binary_unsaved_changes_are_discarded(tmp_path, binary_tracker):
+    add_task(binary_tracker, 'saved')
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    add_task(binary_tracker, 'not saved')
+    delete_task(binary_tracker, '1')
+    assert list(binary_tracker) == ['2']
+
+    reopened = _reopen(tmp_path)
+    assert list(reopened) == ['1']
+    reopened.close()
+
+def test_binary_grows_record_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(binary_store, 'INITIAL_CAPACITY', 4)
+    task_tracker = _reopen(tmp_path)
+    for batch in range(3):
+        for i in range(3):
+            add_task(task_tracker, f'task {batch}-{i}')
+        save_to_task_db(task_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    assert task_tracker.capacity >= 9
+    task_tracker.close()
+
+    reopened = _reopen(tmp_path)
+    assert len(reopened) == 9
+    assert reopened['9']['description'] == 'task 2-2'
+    reopened.close()
+
+def test_binary_list_by_status(capsys, tmp_path, binary_tracker):
+    for desc in ('todo task', 'done task', 'other todo task'):
+        add_task(binary_tracker, desc)
+    save_to_task_db(binary_tracker, TEST_FILE_PATH, str(tmp_path), backend='binary')
+    update_task(binary_tracker, '2', 'done task', 'done')
+
+    assert [task['task_id'] for task in binary_tracker.tasks('todo')] == ['1', '3']
+    list_tasks(binary_tracker, 'done')
+    out, _ = capsys.readouterr()
+    assert 'done task' in out
+    assert 'todo task' not in out
+
+def test_binary_migrates_json(tmp_path):
+    task_tracker = make_task_tracker(20, rnd_desc=True, rnd_status=True)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, str(tmp_path))
+    reopened = _reopen(tmp_path)
+    assert len(reopened) == 20
+    for task_id, task in task_tracker.items():
+        assert reopened[task_id]['description'] == task['description']
+        assert reopened[task_id]['status'] == task['status']
+        assert reopened[task_id]['createdAt'] == task['createdAt']
+    reopened.close()
+
+def test_binary_not_a_task_database(tmp_path):
+    (tmp_path / 'test_db.bin').write_bytes(b'not a task database'.ljust(128, b'\0'))
+    with pytest.raises(ValueError):
+        _reopen(tmp_path)
+
+def test_write_binary_none_description(tmp_path):
+    task_tracker = make_task_tracker(2)
+    task_tracker['1']['description'] = None
+    bin_path = binary_path(str(tmp_path / TEST_FILE_PATH))
+    write_binary(task_tracker, bin_path)
+    reopened = BinaryTaskTracker(bin_path)
+    assert reopened['1']['description'] is None
+    reopened.close()
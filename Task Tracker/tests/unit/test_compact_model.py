@@ -0,0 +1,86 @@
+import json
+import tracemalloc
+import pytest
+from src.models import Task, CompactTaskTracker
+from src.storage import open_json
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks
+from ..conftest import make_task, make_task_tracker, TEST_FILE_PATH
+
+
+def test_task_reads_like_a_dict():
+    task_dict = make_task(status='in-progress')['1']
+    task = Task.from_dict(task_dict)
+    assert task == task_dict
+    assert dict(task) == task_dict
+    assert list(task) == list(task_dict)
+    assert task['status'] == 'in-progress'
+    assert not hasattr(task, '__dict__')
+
+def test_task_writes_like_a_dict():
+    task = Task.from_dict(make_task()['1'])
+    task['status'] = 'done'
+    task['updatedAt'] = '2030-01-02T03:04:05.000006'
+    assert task.status_code == 2
+    assert task['updatedAt'] == '2030-01-02T03:04:05.000006'
+    with pytest.raises(KeyError):
+        task['test'] = 'test'
+    with pytest.raises(TypeError):
+        del task['status']
+
+def test_task_invalid_status():
+    with pytest.raises(ValueError):
+        Task.from_dict(make_task(status='test')['1'])
+
+def test_task_functions_on_compact_tracker(capsys):
+    task_tracker = CompactTaskTracker(make_task_tracker(10))
+    add_task(task_tracker, 'new task')
+    update_task(task_tracker, '3', 'updated', 'done')
+    delete_task(task_tracker, '4')
+    assert all(isinstance(task, Task) for task in task_tracker.values())
+    assert task_tracker['10']['description'] == 'new task'
+    assert [task['task_id'] for task in task_tracker.tasks('done')] == ['3']
+
+    list_tasks(task_tracker, 'done', output_format='jsonl')
+    assert json.loads(capsys.readouterr().out)['description'] == 'updated'
+
+@pytest.mark.parametrize('backend', ('json', 'wal'))
+def test_compact_model_round_trip(tmp_path, monkeypatch, backend):
+    monkeypatch.setenv('TASKI_MODEL', 'compact')
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend=backend)
+    assert isinstance(task_tracker, CompactTaskTracker)
+    for desc in ('first', 'second'):
+        add_task(task_tracker, desc)
+    update_task(task_tracker, '2', 'second', 'done')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend=backend)
+
+    monkeypatch.setenv('TASKI_MODEL', 'dict')
+    reopened = open_task_db(TEST_FILE_PATH, folder, backend=backend)
+    assert reopened == {task_id: dict(task) for task_id, task in task_tracker.items()}
+
+def test_compact_model_missing_fields(tmp_path):
+    save_to_task_db(make_task_tracker(5, fields_to_miss=['status']), TEST_FILE_PATH, str(tmp_path))
+    with pytest.raises(ValueError):
+        open_json(str(tmp_path / TEST_FILE_PATH), 'compact')
+
+def test_unknown_model(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_MODEL', 'test')
+    with pytest.raises(ValueError):
+        open_task_db(TEST_FILE_PATH, str(tmp_path))
+
+def _loaded_size(folder, model, monkeypatch):
+    monkeypatch.setenv('TASKI_MODEL', model)
+    tracemalloc.start()
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(task_tracker) == 2_000
+    return size
+
+def test_compact_model_memory(tmp_path, monkeypatch):
+    task_tracker = {}
+    for _ in range(2_000):
+        add_task(task_tracker, 'that is a test description')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, str(tmp_path))
+
+    assert _loaded_size(str(tmp_path), 'compact', monkeypatch) < _loaded_size(str(tmp_path), 'dict', monkeypatch) * 0.6
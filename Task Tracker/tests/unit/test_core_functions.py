@@ -124,7 +124,7 @@ def test_list_tasks_status(capsys, tracker_len, status, rnd_status):
 def test_supported_queries():
     queries = supported_queries()
 
-    assert set(queries.keys()) == {'add', 'delete', 'update', 'list'}
+    assert set(queries.keys()) == {'add', 'delete', 'update', 'list', 'import', 'bulk-update', 'bulk-delete', 'serve', 'search', 'stats', 'rebalance', 'history', 'undo', 'at'}
 
     add_query = queries['add']
     assert add_query['target'] == add_task
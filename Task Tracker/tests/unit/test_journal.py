@@ -0,0 +1,87 @@
+import os
+from datetime import datetime
+import pytest
+from src import journal
+from src.journal import diff, journal_path, read_journal, snapshots_path, state_at
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, history_tasks, undo_tasks, at_tasks
+from ..conftest import TEST_FILE_PATH
+
+
+def _command(folder, apply):
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    apply(task_tracker)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    return task_tracker
+
+def _tasks(folder):
+    return {task_id: dict(task) for task_id, task in open_task_db(TEST_FILE_PATH, folder).items()}
+
+def test_diff_keeps_changed_fields():
+    before = {'task_id': '1', 'description': 'a', 'status': 'todo', 'createdAt': 'x', 'updatedAt': 'y'}
+    assert diff(before, {**before, 'status': 'done'}) == ({'status': 'todo'}, {'status': 'done'})
+    assert diff(None, before) == (None, before)
+
+def test_history(tmp_path, capsys):
+    folder = str(tmp_path)
+    _command(folder, lambda tracker: add_task(tracker, 'first'))
+    _command(folder, lambda tracker: add_task(tracker, 'second'))
+    _command(folder, lambda tracker: update_task(tracker, '1', 'changed', 'done'))
+    _command(folder, lambda tracker: delete_task(tracker, '1'))
+    capsys.readouterr()
+
+    records = history_tasks(open_task_db(TEST_FILE_PATH, folder), '1')
+    assert [(record['before'] is None, record['after'] is None) for record in records] == [(True, False), (False, False), (False, True)]
+    assert records[1]['after'].keys() == {'description', 'status', 'updatedAt'}
+    out = capsys.readouterr().out
+    assert "status 'todo' -> 'done'" in out
+
+def test_undo_reverts_commands_in_turn(tmp_path, capsys):
+    folder = str(tmp_path)
+    _command(folder, lambda tracker: add_task(tracker, 'first'))
+    states = [_tasks(folder)]
+    _command(folder, lambda tracker: (update_task(tracker, '1', 'changed', 'done'), add_task(tracker, 'second')))
+    states.append(_tasks(folder))
+    _command(folder, lambda tracker: delete_task(tracker, '1'))
+
+    for state in reversed(states):
+        _command(folder, undo_tasks)
+        assert _tasks(folder) == state
+    _command(folder, undo_tasks)
+    assert _tasks(folder) == {}
+    _command(folder, undo_tasks)
+    assert 'Nothing to undo' in capsys.readouterr().err
+
+def test_state_at_replays_from_latest_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_SNAPSHOT_BYTES', '600')
+    folder = str(tmp_path)
+    path = os.path.join(folder, TEST_FILE_PATH)
+    checkpoints = []
+    for number in range(12):
+        _command(folder, lambda tracker: add_task(tracker, f'task {number}'))
+        if number % 3 == 0:
+            _command(folder, lambda tracker: update_task(tracker, '1', f'renamed {number}', 'in-progress'))
+        checkpoints.append((datetime.now().isoformat(), _tasks(folder)))
+    assert len(os.listdir(snapshots_path(path))) > 2
+
+    offsets = []
+    monkeypatch.setattr(journal, 'read_journal', lambda path, offset=0, task_id=None: offsets.append(offset) or read_journal(path, offset, task_id))
+    for timestamp, tasks in checkpoints:
+        assert state_at(path, timestamp) == tasks
+    assert offsets[-1] > 0
+    assert state_at(path, '2000-01-01') == {}
+
+def test_at_lists_past_tasks(tmp_path, capsys):
+    folder = str(tmp_path)
+    _command(folder, lambda tracker: add_task(tracker, 'first'))
+    timestamp = datetime.now().isoformat()
+    _command(folder, lambda tracker: update_task(tracker, '1', 'renamed', 'done'))
+    capsys.readouterr()
+    at_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), timestamp, 'list', output_format='jsonl')
+    out = capsys.readouterr().out
+    assert 'first' in out and 'renamed' not in out
+
+def test_journal_can_be_turned_off(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_JOURNAL', 'off')
+    folder = str(tmp_path)
+    _command(folder, lambda tracker: add_task(tracker, 'first'))
+    assert not os.path.exists(journal_path(os.path.join(folder, TEST_FILE_PATH)))
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+import pytest
+from src import taski
+from src.taski import list_tasks, add_task, update_task
+from src.models import TaskTracker
+from ..conftest import make_task_tracker
+
+
+@pytest.fixture
+def task_tracker():
+    task_tracker = TaskTracker()
+    for i in range(20):
+        add_task(task_tracker, f'task {i}')
+    for task_id in ('15', '3', '8'):
+        update_task(task_tracker, task_id, f'updated {task_id}', 'done')
+    return task_tracker
+
+def test_list_tasks_jsonl(capsys, task_tracker):
+    list_tasks(task_tracker, output_format='jsonl')
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 20
+    assert json.loads(lines[0]) == task_tracker['1']
+
+def test_list_tasks_csv(capsys, task_tracker):
+    list_tasks(task_tracker, 'done', output_format='csv', fields='task_id,status')
+    rows = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert rows == [['task_id', 'status'], ['3', 'done'], ['8', 'done'], ['15', 'done']]
+
+def test_list_tasks_table(capsys):
+    task_tracker = make_task_tracker(3)
+    task_tracker['1']['description'] = 'multi\nline'
+    list_tasks(task_tracker)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 4
+    assert lines[0].split() == ['task_id', 'description', 'status', 'createdAt', 'updatedAt']
+    assert 'multi\\nline' in lines[2]
+
+@pytest.mark.parametrize(
+    ['limit', 'offset', 'expected'],
+    [
+        (5, 0, ['1', '2', '3', '4', '5']),
+        (3, 18, ['19', '20']),
+        (None, 17, ['18', '19', '20']),
+        (0, 0, []),
+    ]
+)
+def test_list_tasks_pagination(capsys, task_tracker, limit, offset, expected):
+    list_tasks(task_tracker, output_format='jsonl', limit=limit, offset=offset, fields='task_id')
+    assert [json.loads(line)['task_id'] for line in capsys.readouterr().out.splitlines()] == expected
+
+def test_list_tasks_sort_by(capsys, task_tracker):
+    list_tasks(task_tracker, output_format='jsonl', sort_by='updatedAt', limit=3, offset=17, fields='task_id')
+    assert [json.loads(line)['task_id'] for line in capsys.readouterr().out.splitlines()] == ['15', '3', '8']
+
+def test_list_tasks_flushes_in_chunks(monkeypatch, capsys, task_tracker):
+    monkeypatch.setattr(taski, 'LIST_BUFFER_ROWS', 3)
+    writes = []
+    monkeypatch.setattr(taski.sys.stdout, 'write', writes.append)
+    list_tasks(task_tracker, output_format='jsonl')
+    assert len(writes) == 7
+    assert sum(chunk.count('\n') for chunk in writes) == 20
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [
+        {'output_format': 'xml'},
+        {'sort_by': 'description'},
+        {'fields': 'task_id,test'},
+        {'limit': -1},
+        {'offset': -1},
+    ]
+)
+def test_list_tasks_invalid_options(task_tracker, kwargs):
+    with pytest.raises(ValueError):
+        list_tasks(task_tracker, **kwargs)
@@ -0,0 +1,55 @@
+import pytest
+from src.locking import ConflictError, lock_store, read_version
+from src.taski import open_task_db, save_to_task_db, add_task, update_task_db
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+def test_save_bumps_version(tmp_path):
+    folder = str(tmp_path)
+    path = f'{folder}/{TEST_FILE_PATH}'
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    assert task_tracker.version == 0
+    for description in ('first', 'second'):
+        add_task(task_tracker, description)
+        save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    assert read_version(path) == 2
+    assert task_tracker.version == 2
+    # Saving it again unchanged leaves the store alone.
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    assert read_version(path) == 2
+
+def test_stale_save_is_rejected(tmp_path):
+    folder = str(tmp_path)
+    save_to_task_db(make_task_tracker(3), TEST_FILE_PATH, folder)
+    first = open_task_db(TEST_FILE_PATH, folder)
+    second = open_task_db(TEST_FILE_PATH, folder)
+    add_task(first, 'first')
+    add_task(second, 'second')
+    save_to_task_db(first, TEST_FILE_PATH, folder)
+    with pytest.raises(ConflictError):
+        save_to_task_db(second, TEST_FILE_PATH, folder)
+    assert [task['description'] for task in open_task_db(TEST_FILE_PATH, folder).values()][-1] == 'first'
+
+def test_update_task_db_retries_on_conflict(tmp_path):
+    folder = str(tmp_path)
+    attempts = []
+
+    def _apply(task_tracker):
+        attempts.append(task_tracker.version)
+        if len(attempts) == 1:
+            # Another writer sneaks in between this open and its save.
+            other = open_task_db(TEST_FILE_PATH, folder)
+            add_task(other, 'sneaked in')
+            save_to_task_db(other, TEST_FILE_PATH, folder)
+        add_task(task_tracker, 'retried')
+
+    update_task_db(_apply, TEST_FILE_PATH, folder)
+    assert attempts == [0, 1]
+    assert len(open_task_db(TEST_FILE_PATH, folder)) == 2
+
+def test_lock_is_reentrant(tmp_path):
+    path = f'{tmp_path}/{TEST_FILE_PATH}'
+    with lock_store(path):
+        with lock_store(path, exclusive=False):
+            with lock_store(path):
+                pass
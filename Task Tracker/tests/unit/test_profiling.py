@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+from src import profiling
+
+
+@pytest.fixture(autouse=True)
+def no_trace_env(monkeypatch):
+    for env in (profiling.TRACE_ENV, profiling.TRACE_FILE_ENV, profiling.PROFILE_DUMP_ENV):
+        monkeypatch.delenv(env, raising=False)
+    yield
+    profiling.finish()
+
+def test_phases_are_free_when_disabled(tmp_path):
+    trace, argv = profiling.start(['list', '--status', 'todo'], str(tmp_path))
+    assert trace is None
+    assert argv == ['list', '--status', 'todo']
+    assert profiling.phase('open') is profiling.phase('save')
+
+def test_options_are_stripped(tmp_path):
+    trace, argv = profiling.start(['--profile', 'add', 'task', '--profile-output', str(tmp_path / 'm.jsonl')], str(tmp_path))
+    assert argv == ['add', 'task']
+    assert trace.report
+    assert trace.output == str(tmp_path / 'm.jsonl')
+
+def test_record_is_appended_to_metrics_file(tmp_path, capsys):
+    (tmp_path / 'tasks.json').write_text('{}')
+    output = tmp_path / 'metrics.jsonl'
+    for _ in range(2):
+        profiling.start(['list', f'--profile-output={output}'], str(tmp_path))
+        with profiling.phase('open'):
+            pass
+        with profiling.phase('open'):
+            pass
+        profiling.finish()
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]['command'] == 'list'
+    assert list(records[0]['phases']) == ['open']
+    assert records[0]['files']['before'] == {'tasks.json': 2}
+    assert capsys.readouterr().err == ''
+
+def test_env_enables_report_and_dump(tmp_path, monkeypatch, capsys):
+    dump = tmp_path / 'taski.prof'
+    monkeypatch.setenv(profiling.TRACE_ENV, '1')
+    monkeypatch.setenv(profiling.PROFILE_DUMP_ENV, str(dump))
+    profiling.start(['stats'], str(tmp_path))
+    with profiling.phase('query'):
+        sum(range(1000))
+    record = profiling.finish(ValueError('broken'))
+    assert record['error'] == 'ValueError: broken'
+    assert os.path.getsize(dump) > 0
+    err = capsys.readouterr().err
+    assert 'taski profile: stats' in err
+    assert 'query' in err
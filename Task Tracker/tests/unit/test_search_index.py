@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import pytest
+from src import index_store
+from src.index_store import index_db_path, index_log_path, load_index
+from src.search_index import SearchIndex, build_index, tokenize
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, search_tasks
+from ..conftest import TEST_FILE_PATH
+
+
+def _task(description, status='todo'):
+    return {'task_id': '', 'description': description, 'status': status, 'createdAt': '', 'updatedAt': ''}
+
+@pytest.fixture
+def index():
+    return build_index({
+        '1': _task('Buy groceries and milk'),
+        '2': _task('Buy a birthday present', 'done'),
+        '3': _task('Cook dinner', 'in-progress'),
+        '4': _task(None)
+    })
+
+def test_tokenize():
+    assert tokenize('Buy-groceries, buy MILK!') == {'buy', 'groceries', 'milk'}
+    assert tokenize(None) == set()
+
+@pytest.mark.parametrize('terms, expected', [
+    (['buy'], {'1', '2'}),
+    (['buy', 'milk'], {'1'}),
+    (['buy', 'AND', 'milk'], {'1'}),
+    (['milk', 'OR', 'cook'], {'1', '3'}),
+    (['gro*'], {'1'}),
+    (['b*'], {'1', '2'}),
+    (['*'], {'1', '2', '3', '4'}),
+    (['nothing'], set()),
+    (['buy', 'nothing', 'OR', 'dinner'], {'3'})
+])
+def test_search(index, terms, expected):
+    assert index.search(terms) == expected
+
+def test_search_status(index):
+    assert index.search(['buy'], status='done') == {'2'}
+
+def test_index_follows_mutations(tmp_path, capsys):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    add_task(task_tracker, 'Buy groceries')
+    add_task(task_tracker, 'Walk the dog')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    search_tasks(task_tracker, ['groceries'], output_format='jsonl')
+    # Changes not saved yet are laid over the stored index.
+    update_task(task_tracker, '1', 'Buy bread', 'done')
+    delete_task(task_tracker, '2')
+    add_task(task_tracker, 'Bake bread')
+    capsys.readouterr()
+    index = load_index(f'{folder}/{TEST_FILE_PATH}', task_tracker)
+    assert index.search(['groceries']) == set()
+    assert index.search(['bread']) == {'1', '3'}
+    assert index.search(['bread'], status='done') == {'1'}
+    assert index.search(['dog']) == set()
+    search_tasks(task_tracker, ['bread'], output_format='jsonl')
+    assert [json.loads(line)['description'] for line in capsys.readouterr().out.splitlines()] == ['Buy bread', 'Bake bread']
+
+def test_writers_only_log_changes(tmp_path, monkeypatch, capsys):
+    folder = str(tmp_path)
+    monkeypatch.setattr('src.taski.JSON_DB_PATH', folder)
+    path = f'{folder}/tasks.json'
+    task_tracker = open_task_db(folder_name=folder)
+    add_task(task_tracker, 'Buy groceries')
+    save_to_task_db(task_tracker, folder_name=folder)
+    # No index is kept until something searches.
+    assert not os.path.exists(index_db_path(path)) and not os.path.exists(index_log_path(path))
+    search_tasks(open_task_db(folder_name=folder, readonly=True), ['groc*'], output_format='jsonl')
+    assert os.path.exists(index_db_path(path))
+
+    task_tracker = open_task_db(folder_name=folder)
+    add_task(task_tracker, 'Cook dinner')
+    save_to_task_db(task_tracker, folder_name=folder)
+    assert json.loads(open(index_log_path(path)).read()) == {'version': 2, 'tasks': {'2': task_tracker['2']}}
+
+    def _no_rebuild(*args, **kwargs):
+        raise AssertionError('index should not be rebuilt')
+
+    capsys.readouterr()
+    monkeypatch.setattr(index_store, '_rebuild', _no_rebuild)
+    search_tasks(open_task_db(folder_name=folder, readonly=True), ['dinner'], output_format='jsonl')
+    assert json.loads(capsys.readouterr().out)['description'] == 'Cook dinner'
+    # The replayed log is emptied.
+    assert os.path.getsize(index_log_path(path)) == 0
+
+def test_stale_index_is_rebuilt(tmp_path, capsys):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    add_task(task_tracker, 'Buy groceries')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    search_tasks(task_tracker, ['groceries'], output_format='jsonl')
+    # A save that did not log its changes leaves the index one version behind.
+    save_to_task_db({'1': dict(task_tracker['1'], description='Cook dinner')}, TEST_FILE_PATH, folder)
+    capsys.readouterr()
+    search_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), ['dinner'], output_format='jsonl')
+    assert json.loads(capsys.readouterr().out)['description'] == 'Cook dinner'
+
+def test_index_rebuilt_with_unsaved_changes_is_not_reused(tmp_path, capsys):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    add_task(task_tracker, 'Buy groceries')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    update_task(task_tracker, '1', 'Cook dinner')
+    # Built while "Cook dinner" was not saved, which it never is.
+    search_tasks(task_tracker, ['dinner'], output_format='jsonl')
+    capsys.readouterr()
+    search_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), ['groceries'], output_format='jsonl')
+    assert json.loads(capsys.readouterr().out)['description'] == 'Buy groceries'
+
+def test_search_is_fast():
+    index = SearchIndex()
+    for task_id in range(100_000):
+        index.add(str(task_id), _task(f'task number {task_id} about topic{task_id % 1000}'))
+    index.search(['topic9*'])
+    start = time.perf_counter()
+    for _ in range(10):
+        assert len(index.search(['topic42', 'OR', 'topic43'])) == 200
+        assert len(index.search(['number', 'topic999*'])) == 100
+    assert (time.perf_counter() - start) / 10 < 0.01
+
+def test_search_uses_the_store_it_was_opened_from(tmp_path, monkeypatch, capsys):
+    default, other = tmp_path / 'default', tmp_path / 'other'
+    for folder, description in ((default, 'apple pie'), (other, 'banana split')):
+        task_tracker = open_task_db(folder_name=str(folder))
+        add_task(task_tracker, description)
+        save_to_task_db(task_tracker, folder_name=str(folder))
+    monkeypatch.setattr('src.taski.JSON_DB_PATH', str(default))
+
+    search_tasks(open_task_db(folder_name=str(other), readonly=True), ['banana'], output_format='jsonl')
+    assert json.loads(capsys.readouterr().out)['description'] == 'banana split'
+    search_tasks(open_task_db(folder_name=str(other), readonly=True), ['apple'], output_format='jsonl')
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,63 @@
+import json
+import pytest
+from src import serializer
+from src.models import TASK_FIELDS, Task
+from src.storage import open_json, save_json
+from ..conftest import make_task_tracker
+
+SERIALIZERS = [
+    name for name, props in serializer.serializers().items()
+    if props['module'] is None or serializer._module(props['module']) is not None
+]
+
+
+@pytest.mark.parametrize('name', SERIALIZERS)
+@pytest.mark.parametrize('compact', (False, True))
+def test_round_trip(name, compact):
+    task_tracker = make_task_tracker(5)
+    data = serializer.encode(task_tracker, compact=compact, serializer=name)
+    assert json.loads(data) == task_tracker
+    assert serializer.decode_tasks(data, serializer=name) == task_tracker
+
+@pytest.mark.parametrize('name', SERIALIZERS)
+def test_compact_output_is_smaller(name):
+    task_tracker = make_task_tracker(5)
+    assert len(serializer.encode(task_tracker, compact=True, serializer=name)) < len(serializer.encode(task_tracker, compact=False, serializer=name))
+
+@pytest.mark.parametrize('name', SERIALIZERS)
+@pytest.mark.parametrize('data', (b'', b'{ not valid json }', b'{"1": {"task_id": "1"'))
+def test_corrupt_data_raises_decode_error(name, data):
+    with pytest.raises(json.JSONDecodeError):
+        serializer.decode_tasks(data, serializer=name)
+
+@pytest.mark.parametrize('name', SERIALIZERS)
+@pytest.mark.parametrize('tasks', ({'1': {'task_id': '1'}}, {'1': 'task'}, {'1': {}}, []))
+def test_invalid_tasks_raise_value_error(name, tasks):
+    with pytest.raises(ValueError):
+        serializer.decode_tasks(json.dumps(tasks).encode(), serializer=name)
+
+@pytest.mark.parametrize('name', SERIALIZERS)
+def test_compact_model_decodes_to_tasks(name):
+    task_tracker = make_task_tracker(3)
+    tasks = serializer.decode_tasks(serializer.encode(task_tracker, serializer=name), compact_model=True, serializer=name)
+    assert all(isinstance(task, Task) for task in tasks.values())
+    assert {task_id: dict(task) for task_id, task in tasks.items()} == {
+        task_id: {field: task[field] for field in TASK_FIELDS} for task_id, task in task_tracker.items()
+    }
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        serializer.get_serializer('pickle')
+
+def test_unknown_style(monkeypatch):
+    monkeypatch.setenv('TASKI_JSON_STYLE', 'tabs')
+    with pytest.raises(ValueError):
+        serializer.get_style()
+
+def test_compact_style_store(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_JSON_STYLE', 'compact')
+    path = str(tmp_path / 'tasks.json')
+    task_tracker = make_task_tracker(3)
+    save_json(task_tracker, path)
+    assert '\n' not in (tmp_path / 'tasks.json').read_text()
+    assert open_json(path) == task_tracker
@@ -0,0 +1,97 @@
+import os
+import pytest
+from src import shard_store
+from src.shard_store import ShardedTaskTracker, get_layout, shard_of, shards_path
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks, rebalance_tasks
+from ..conftest import TEST_FILE_PATH
+
+
+def _store(folder, size=40):
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    for number in range(size):
+        add_task(task_tracker, f'task {number}')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='sharded')
+    return task_tracker
+
+def _shard_files(folder):
+    shards_folder = shards_path(os.path.join(folder, TEST_FILE_PATH))
+    return {name: os.stat(os.path.join(shards_folder, name)).st_mtime_ns for name in os.listdir(shards_folder) if name != shard_store.MANIFEST_FILE}
+
+def test_layout_from_env(monkeypatch):
+    monkeypatch.setenv('TASKI_SHARDS', '3')
+    monkeypatch.setenv('TASKI_SHARD_SCHEME', 'range')
+    layout = get_layout()
+    assert (layout['count'], layout['scheme']) == (3, 'range')
+    monkeypatch.setenv('TASKI_SHARD_SCHEME', 'modulo')
+    with pytest.raises(ValueError):
+        get_layout()
+
+def test_shard_of():
+    hashed = get_layout(4, 'hash')
+    assert {shard_of(str(task_id), hashed) for task_id in range(100)} == {0, 1, 2, 3}
+    ranged = get_layout(3, 'range', 10)
+    assert [shard_of(task_id, ranged) for task_id in ('1', '15', '25', '1000')] == [0, 1, 2, 2]
+
+def test_point_operations_touch_one_shard(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    _store(folder)
+    before = _shard_files(folder)
+    assert len(before) == shard_store.DEFAULT_SHARDS
+
+    reads = []
+    read_shard = shard_store._read_shard
+    monkeypatch.setattr(shard_store, '_read_shard', lambda path: reads.append(path) or read_shard(path))
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    update_task(task_tracker, '7', 'updated', 'done')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='sharded')
+    assert len(reads) == 1
+
+    after = _shard_files(folder)
+    assert sum(before[name] != after[name] for name in before) == 1
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    delete_task(task_tracker, '8')
+    assert task_tracker['7']['status'] == 'done'
+    assert len(task_tracker) == 39
+
+@pytest.mark.parametrize('pool', ['thread', 'process'])
+def test_list_reads_every_shard_in_id_order(tmp_path, monkeypatch, capsys, pool):
+    monkeypatch.setenv('TASKI_SHARD_POOL', pool)
+    folder = str(tmp_path)
+    _store(folder)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded', readonly=True)
+    assert list(task_tracker) == [str(task_id) for task_id in range(1, 41)]
+    list_tasks(task_tracker, output_format='jsonl')
+    assert len(capsys.readouterr().out.splitlines()) == 40
+
+def test_rebalance(tmp_path, capsys):
+    folder = str(tmp_path)
+    tasks = dict(_store(folder).items())
+    old_files = _shard_files(folder)
+
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    rebalance_tasks(task_tracker, 3, 'range', 15)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='sharded')
+    assert 'Rebalanced 40 tasks into 3 range shards' in capsys.readouterr().out
+
+    new_files = _shard_files(folder)
+    assert len(new_files) == 3
+    assert not set(old_files) & set(new_files)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    assert isinstance(task_tracker, ShardedTaskTracker)
+    assert dict(task_tracker.items()) == tasks
+    assert task_tracker.meta['last_id'] == 40
+
+def test_rebalance_needs_sharded_backend(tmp_path):
+    with pytest.raises(ValueError):
+        rebalance_tasks(open_task_db(TEST_FILE_PATH, str(tmp_path)), 4)
+
+def test_migrates_json_store(tmp_path):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    for number in range(5):
+        add_task(task_tracker, f'task {number}')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+
+    sharded = open_task_db(TEST_FILE_PATH, folder, backend='sharded')
+    assert dict(sharded.items()) == dict(task_tracker.items())
+    assert add_task(sharded, 'after migration') and '6' in sharded
@@ -0,0 +1,80 @@
+import sqlite3
+import pytest
+from src.sqlite_store import SqliteTaskTracker, sqlite_path, migrate_json_to_sqlite
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+@pytest.fixture
+def sqlite_tracker(tmp_path):
+    task_tracker = open_task_db(TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+    yield task_tracker
+    task_tracker.connection.close()
+
+def test_open_sqlite_creates_indexes(tmp_path, sqlite_tracker):
+    assert isinstance(sqlite_tracker, SqliteTaskTracker)
+    with sqlite3.connect(sqlite_path(str(tmp_path / TEST_FILE_PATH))) as connection:
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_tasks_status', 'idx_tasks_created', 'idx_tasks_updated'} <= indexes
+
+def test_sqlite_crud(tmp_path, sqlite_tracker):
+    for desc in ('first', 'second', 'third'):
+        add_task(sqlite_tracker, desc)
+    update_task(sqlite_tracker, '2', 'second updated', 'done')
+    delete_task(sqlite_tracker, '1')
+    save_to_task_db(sqlite_tracker, TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+
+    reopened = open_task_db(TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+    assert list(reopened.keys()) == ['2', '3']
+    assert reopened['2']['description'] == 'second updated'
+    assert reopened['2']['status'] == 'done'
+    assert len(reopened) == 2
+    reopened.connection.close()
+
+def test_sqlite_unsaved_changes_are_discarded(tmp_path, sqlite_tracker):
+    add_task(sqlite_tracker, 'not saved')
+    sqlite_tracker.connection.rollback()
+    reopened = open_task_db(TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+    assert len(reopened) == 0
+    reopened.connection.close()
+
+def test_sqlite_delete_missing_task(sqlite_tracker):
+    add_task(sqlite_tracker, 'only task')
+    with pytest.raises(KeyError):
+        delete_task(sqlite_tracker, '2')
+    with pytest.raises(KeyError):
+        update_task(sqlite_tracker, '2', 'test', 'done')
+
+def test_sqlite_list_by_status(capsys, sqlite_tracker):
+    for desc in ('todo task', 'done task', 'other todo task'):
+        add_task(sqlite_tracker, desc)
+    update_task(sqlite_tracker, '2', 'done task', 'done')
+
+    assert [task['task_id'] for task in sqlite_tracker.tasks('todo')] == ['1', '3']
+    list_tasks(sqlite_tracker, 'done')
+    out, _ = capsys.readouterr()
+    assert 'done task' in out
+    assert 'todo task' not in out
+
+def test_migrate_json_to_sqlite(tmp_path):
+    folder = str(tmp_path)
+    save_to_task_db(make_task_tracker(20, rnd_desc=True), TEST_FILE_PATH, folder)
+    json_tracker = open_task_db(TEST_FILE_PATH, folder)
+
+    sqlite_tracker = open_task_db(TEST_FILE_PATH, folder, backend='sqlite')
+    assert len(sqlite_tracker) == 20
+    assert sqlite_tracker['7']['description'] == json_tracker['7']['description']
+    sqlite_tracker.connection.close()
+
+    assert migrate_json_to_sqlite(str(tmp_path / TEST_FILE_PATH), str(tmp_path / 'copy.sqlite3')) == 20
+
+def test_sqlite_deleted_ids_are_not_reused(tmp_path, sqlite_tracker):
+    for desc in ('first', 'second'):
+        add_task(sqlite_tracker, desc)
+    delete_task(sqlite_tracker, '2')
+    save_to_task_db(sqlite_tracker, TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+
+    reopened = open_task_db(TEST_FILE_PATH, str(tmp_path), backend='sqlite')
+    add_task(reopened, 'third')
+    assert list(reopened) == ['1', '3']
+    reopened.connection.close()
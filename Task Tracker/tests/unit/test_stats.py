@@ -0,0 +1,67 @@
+import json
+import pytest
+from src import storage
+from src.stats import STATS_KEY, build_stats, total
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, stats_tasks
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+def _mutated(folder):
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    for description in ('a', 'b', 'c'):
+        add_task(task_tracker, description)
+    update_task(task_tracker, '1', 'a', 'done')
+    update_task(task_tracker, '2', 'b', 'in-progress')
+    delete_task(task_tracker, '3')
+    return task_tracker
+
+def test_counters_follow_mutations(tmp_path):
+    task_tracker = _mutated(str(tmp_path))
+    stats = task_tracker.meta[STATS_KEY]
+    assert stats == build_stats(task_tracker.tasks())
+    assert stats['status'] == {'todo': 0, 'in-progress': 1, 'done': 1}
+    assert total(stats) == 2
+    assert sum(stats['created'].values()) == 2
+
+@pytest.mark.parametrize('backend', ['json', 'wal', 'sqlite', 'binary', 'sharded'])
+def test_counters_are_persisted(tmp_path, monkeypatch, backend):
+    monkeypatch.setenv('TASKI_BACKEND', backend)
+    folder = str(tmp_path)
+    task_tracker = _mutated(folder)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    reopened = open_task_db(TEST_FILE_PATH, folder, readonly=True)
+    assert reopened.meta[STATS_KEY]['status'] == {'todo': 0, 'in-progress': 1, 'done': 1}
+
+def test_stats_reads_counters_without_scanning(tmp_path, monkeypatch, capsys):
+    folder = str(tmp_path)
+    save_to_task_db(_mutated(folder), TEST_FILE_PATH, folder)
+
+    def _no_scan(*args, **kwargs):
+        raise AssertionError('stats should not parse tasks')
+
+    monkeypatch.setattr(storage, 'iter_json_tasks', _no_scan)
+    stats_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), output_format='json')
+    assert json.loads(capsys.readouterr().out)['total'] == 2
+
+def test_check_and_rebuild(tmp_path, capsys):
+    folder = str(tmp_path)
+    save_to_task_db(_mutated(folder), TEST_FILE_PATH, folder)
+    # A save that does not maintain the counters leaves them behind the tasks.
+    save_to_task_db(make_task_tracker(5), TEST_FILE_PATH, folder)
+
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    with pytest.raises(ValueError):
+        stats_tasks(task_tracker, check=True)
+    stats = stats_tasks(task_tracker, rebuild=True)
+    assert total(stats) == 5
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    assert total(stats_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), check=True)) == 5
+
+def test_rebuild_is_persisted_by_wal(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_BACKEND', 'wal')
+    folder = str(tmp_path)
+    save_to_task_db(make_task_tracker(3), TEST_FILE_PATH, folder)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    stats_tasks(task_tracker, rebuild=True)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    assert total(open_task_db(TEST_FILE_PATH, folder).meta[STATS_KEY]) == 3
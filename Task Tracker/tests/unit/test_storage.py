@@ -0,0 +1,120 @@
+import json
+import pytest
+from src import storage
+from src.models import TaskTracker
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+def test_open_task_db_returns_task_tracker(tmp_path):
+    save_to_task_db(make_task_tracker(5), TEST_FILE_PATH, str(tmp_path))
+    task_tracker = open_task_db(TEST_FILE_PATH, str(tmp_path))
+    assert isinstance(task_tracker, TaskTracker)
+    assert not task_tracker.dirty
+
+def test_mutations_mark_dirty():
+    task_tracker = TaskTracker(make_task_tracker(5))
+    add_task(task_tracker, 'new task')
+    update_task(task_tracker, '1', 'updated', 'done')
+    delete_task(task_tracker, '2')
+    assert task_tracker.dirty == {'5', '1', '2'}
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        open_task_db(TEST_FILE_PATH, str(tmp_path), backend='test')
+
+def test_backend_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv('TASKI_BACKEND', 'wal')
+    task_tracker = open_task_db(TEST_FILE_PATH, str(tmp_path))
+    add_task(task_tracker, 'env backend')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, str(tmp_path))
+    assert (tmp_path / (TEST_FILE_PATH + storage.WAL_SUFFIX)).exists()
+    assert not (tmp_path / TEST_FILE_PATH).exists()
+
+def test_wal_appends_only_changes(tmp_path):
+    folder = str(tmp_path)
+    save_to_task_db(make_task_tracker(100), TEST_FILE_PATH, folder, backend='wal')
+    snapshot = (tmp_path / TEST_FILE_PATH).read_text()
+
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='wal')
+    add_task(task_tracker, 'added')
+    update_task(task_tracker, '3', 'updated', 'done')
+    delete_task(task_tracker, '4')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='wal')
+
+    assert (tmp_path / TEST_FILE_PATH).read_text() == snapshot
+    records = (tmp_path / (TEST_FILE_PATH + storage.WAL_SUFFIX)).read_text().splitlines()
+    assert [json.loads(record)['op'] for record in records] == ['put', 'put', 'del', 'meta']
+
+    reopened = open_task_db(TEST_FILE_PATH, folder, backend='wal')
+    assert reopened == task_tracker
+    assert '4' not in reopened
+    assert reopened['3']['status'] == 'done'
+
+def test_wal_ignores_torn_record(tmp_path):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='wal')
+    add_task(task_tracker, 'survives')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='wal')
+
+    wal_path = tmp_path / (TEST_FILE_PATH + storage.WAL_SUFFIX)
+    with open(wal_path, 'a', encoding='utf-8') as wal:
+        wal.write('{"op": "put", "task": {"task_id": "2", "descr')
+
+    reopened = open_task_db(TEST_FILE_PATH, folder, backend='wal')
+    assert list(reopened) == ['1']
+    add_task(reopened, 'after crash')
+    save_to_task_db(reopened, TEST_FILE_PATH, folder, backend='wal')
+    assert set(open_task_db(TEST_FILE_PATH, folder, backend='wal')) == {'1', '2'}
+
+def test_wal_corrupted_record_in_the_middle(tmp_path):
+    wal_path = tmp_path / (TEST_FILE_PATH + storage.WAL_SUFFIX)
+    wal_path.write_text('{ not valid json }\n{"op": "del", "task_id": "1"}\n')
+    with pytest.raises(ValueError):
+        open_task_db(TEST_FILE_PATH, str(tmp_path), backend='wal')
+
+def test_wal_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'WAL_MIN_COMPACT_BYTES', 0)
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend='wal')
+    for i in range(10):
+        add_task(task_tracker, f'task {i}')
+        save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend='wal')
+
+    wal_lines = (tmp_path / (TEST_FILE_PATH + storage.WAL_SUFFIX)).read_text().splitlines()
+    wal_records = [line for line in wal_lines if json.loads(line)['op'] != 'meta']
+    assert len(json.loads((tmp_path / TEST_FILE_PATH).read_text())) + len(wal_records) == 10
+    assert len(wal_records) < 10
+    assert open_task_db(TEST_FILE_PATH, folder, backend='wal') == task_tracker
+
+def test_allocate_id_uses_persisted_sequence():
+    task_tracker = TaskTracker(make_task_tracker(5))
+    task_tracker.meta['last_id'] = 41
+    add_task(task_tracker, 'answer')
+    assert '42' in task_tracker
+    assert task_tracker.meta['last_id'] == 42
+
+def test_allocate_id_without_sequence():
+    task_tracker = TaskTracker(make_task_tracker(5))
+    add_task(task_tracker, 'first allocation')
+    assert '5' in task_tracker
+    assert task_tracker.meta['last_id'] == 5
+
+def test_allocate_id_skips_existing_ids():
+    task_tracker = TaskTracker(make_task_tracker(5))
+    task_tracker.meta['last_id'] = 2
+    assert task_tracker.allocate_id() == '5'
+
+@pytest.mark.parametrize('backend', ('json', 'wal'))
+def test_deleted_ids_are_not_reused(tmp_path, backend):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder, backend=backend)
+    for desc in ('first', 'second', 'third'):
+        add_task(task_tracker, desc)
+    delete_task(task_tracker, '3')
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder, backend=backend)
+
+    reopened = open_task_db(TEST_FILE_PATH, folder, backend=backend)
+    add_task(reopened, 'fourth')
+    assert list(reopened) == ['1', '2', '4']
+    assert (tmp_path / (TEST_FILE_PATH + storage.META_SUFFIX)).exists() == (backend == 'json')
@@ -0,0 +1,68 @@
+import json
+import tracemalloc
+import pytest
+from src.storage import iter_json_tasks, JsonStreamTaskTracker
+from src.taski import open_task_db, save_to_task_db, list_tasks
+from ..conftest import make_task_tracker, TEST_FILE_PATH
+
+
+@pytest.mark.parametrize('indent', (None, 4))
+@pytest.mark.parametrize('chunk_size', (1, 7, 1 << 16))
+def test_iter_json_tasks(tmp_path, indent, chunk_size):
+    task_tracker = make_task_tracker(50, rnd_desc=True, rnd_status=True)
+    task_tracker['3']['description'] = 'escaped "quotes", {braces} and \\n\n newlines'
+    file = tmp_path / TEST_FILE_PATH
+    file.write_text(json.dumps(task_tracker, indent=indent))
+    assert dict(iter_json_tasks(str(file), chunk_size)) == task_tracker
+
+@pytest.mark.parametrize('content', ('{}', '  {\n}\n'))
+def test_iter_json_tasks_empty(tmp_path, content):
+    file = tmp_path / TEST_FILE_PATH
+    file.write_text(content)
+    assert list(iter_json_tasks(str(file))) == []
+
+@pytest.mark.parametrize('content', (
+    '{ not valid json }',
+    '{"1": {"task_id": "1"',
+    '["1"]',
+    '{"1" {}}',
+    '',
+))
+def test_iter_json_tasks_corrupted(tmp_path, content):
+    file = tmp_path / TEST_FILE_PATH
+    file.write_text(content)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_tasks(str(file), 4))
+
+def test_iter_json_tasks_missing_fields(tmp_path):
+    save_to_task_db(make_task_tracker(5, fields_to_miss=['status']), TEST_FILE_PATH, str(tmp_path))
+    with pytest.raises(ValueError):
+        list(iter_json_tasks(str(tmp_path / TEST_FILE_PATH)))
+
+def test_iter_json_tasks_memory_is_flat(tmp_path):
+    save_to_task_db(make_task_tracker(5_000, rnd_desc=True), TEST_FILE_PATH, str(tmp_path))
+    file = tmp_path / TEST_FILE_PATH
+
+    tracemalloc.start()
+    count = sum(1 for _ in iter_json_tasks(str(file), 4096))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == 5_000
+    assert peak < file.stat().st_size / 10
+
+def test_open_task_db_readonly(tmp_path, capsys):
+    save_to_task_db(make_task_tracker(10, status='done'), TEST_FILE_PATH, str(tmp_path))
+    task_tracker = open_task_db(TEST_FILE_PATH, str(tmp_path), readonly=True)
+    assert isinstance(task_tracker, JsonStreamTaskTracker)
+    assert len(task_tracker) == 10
+    assert '3' in task_tracker
+    assert task_tracker['3']['status'] == 'done'
+
+    list_tasks(task_tracker, 'done', output_format='jsonl')
+    assert len(capsys.readouterr().out.splitlines()) == 10
+    with pytest.raises(TypeError):
+        task_tracker['11'] = {}
+
+def test_open_task_db_readonly_missing_file(tmp_path):
+    assert len(open_task_db(TEST_FILE_PATH, str(tmp_path), readonly=True)) == 0
@@ -0,0 +1,107 @@
+import json
+import time
+import pytest
+from src.models import iso_to_micros, micros_to_iso
+from src.index_store import load_time_index
+from src.storage import JsonStreamTaskTracker
+from src.time_index import TimeIndex, build_time_index
+from src.taski import open_task_db, save_to_task_db, add_task, update_task, delete_task, list_tasks
+from ..conftest import TEST_FILE_PATH
+
+
+def _task(created, updated=None):
+    return {'task_id': '', 'description': 'x', 'status': 'todo', 'createdAt': micros_to_iso(created), 'updatedAt': micros_to_iso(updated or created)}
+
+@pytest.fixture
+def index():
+    return build_time_index({str(i): _task(i * 10, i * 10 + 5) for i in range(1, 6)})
+
+def test_between(index):
+    assert list(index.between('createdAt')) == ['1', '2', '3', '4', '5']
+    assert list(index.between('createdAt', after=20)) == ['3', '4', '5']
+    assert list(index.between('createdAt', after=20, include_after=True)) == ['2', '3', '4', '5']
+    assert list(index.between('createdAt', before=30)) == ['1', '2']
+    assert list(index.between('updatedAt', after=25, before=50)) == ['3', '4']
+
+def test_remove(index):
+    index.remove('3', _task(30, 35))
+    index.remove('3', _task(30, 35))
+    assert list(index.between('createdAt')) == ['1', '2', '4', '5']
+
+def test_index_follows_mutations(tmp_path):
+    folder = str(tmp_path)
+    path = f'{folder}/{TEST_FILE_PATH}'
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    for description in ('a', 'b', 'c'):
+        add_task(task_tracker, description)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    assert list(load_time_index(path, task_tracker).between('createdAt')) == ['1', '2', '3']
+    # Changes not saved yet are laid over the stored index.
+    update_task(task_tracker, '1', 'a', 'done')
+    delete_task(task_tracker, '2')
+    index = load_time_index(path, task_tracker)
+    assert list(index.between('updatedAt')) == ['3', '1']
+    assert list(index.between('createdAt')) == ['1', '3']
+
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    reopened = open_task_db(TEST_FILE_PATH, folder, readonly=True)
+    assert list(load_time_index(path, reopened).between('createdAt', after=0)) == ['1', '3']
+    assert list(load_time_index(path, reopened).between('updatedAt', after=iso_to_micros(task_tracker['1']['updatedAt']), include_after=True)) == ['1']
+
+@pytest.mark.parametrize('filters, expected', [
+    ({'created_after': '2024-01-02'}, ['3', '4']),
+    ({'created_before': '2024-01-02'}, ['1']),
+    ({'created_after': '2024-01-01', 'created_before': '2024-01-03'}, ['2', '3']),
+    ({'updated_since': '2024-02-01'}, ['4', '1']),
+    ({'updated_since': '2024-02-01', 'created_before': '2024-01-02'}, ['1'])
+])
+def test_list_time_filters(filters, expected, capsys):
+    task_tracker = {
+        '1': {'task_id': '1', 'description': 'a', 'status': 'todo', 'createdAt': '2024-01-01T00:00:00', 'updatedAt': '2024-03-01T00:00:00'},
+        '2': {'task_id': '2', 'description': 'b', 'status': 'todo', 'createdAt': '2024-01-02T00:00:00', 'updatedAt': '2024-01-02T00:00:00'},
+        '3': {'task_id': '3', 'description': 'c', 'status': 'todo', 'createdAt': '2024-01-02T12:00:00', 'updatedAt': '2024-01-02T12:00:00'},
+        '4': {'task_id': '4', 'description': 'd', 'status': 'todo', 'createdAt': '2024-01-03T00:00:00', 'updatedAt': '2024-02-01T00:00:00'}
+    }
+    list_tasks(task_tracker, output_format='jsonl', fields='task_id', **filters)
+    assert [json.loads(line)['task_id'] for line in capsys.readouterr().out.splitlines()] == expected
+
+def test_range_query_is_fast():
+    index = TimeIndex()
+    for task_id in range(200_000):
+        index.add(str(task_id), _task(task_id * 1_000))
+    start = time.perf_counter()
+    for _ in range(100):
+        assert len(list(index.between('updatedAt', after=199_990 * 1_000, include_after=True))) == 10
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+def test_list_time_filters_use_the_store_it_was_opened_from(tmp_path, monkeypatch, capsys):
+    default, other = tmp_path / 'default', tmp_path / 'other'
+    for folder, description in ((other, 'banana split'), (default, 'apple pie')):
+        task_tracker = open_task_db(folder_name=str(folder))
+        add_task(task_tracker, description)
+        save_to_task_db(task_tracker, folder_name=str(folder))
+    between = task_tracker['1']['createdAt']
+    monkeypatch.setattr('src.taski.JSON_DB_PATH', str(default))
+
+    list_tasks(open_task_db(folder_name=str(other), readonly=True), output_format='jsonl', created_before=between)
+    assert [json.loads(line)['description'] for line in capsys.readouterr().out.splitlines()] == ['banana split']
+    list_tasks(open_task_db(folder_name=str(other), readonly=True), output_format='jsonl', created_after=between)
+    assert capsys.readouterr().out == ''
+
+def test_list_time_filters_read_tasks_from_the_index(tmp_path, monkeypatch, capsys):
+    folder = str(tmp_path)
+    task_tracker = open_task_db(TEST_FILE_PATH, folder)
+    for description in ('a', 'b'):
+        add_task(task_tracker, description)
+    save_to_task_db(task_tracker, TEST_FILE_PATH, folder)
+    since = task_tracker['2']['updatedAt']
+    # The first range query builds the index database from the store.
+    list_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), output_format='jsonl', updated_since=since)
+
+    def _no_stream(*args, **kwargs):
+        raise AssertionError('the store should not be streamed')
+
+    monkeypatch.setattr(JsonStreamTaskTracker, 'items', _no_stream)
+    monkeypatch.setattr(JsonStreamTaskTracker, 'tasks_by_id', _no_stream)
+    list_tasks(open_task_db(TEST_FILE_PATH, folder, readonly=True), output_format='jsonl', updated_since=since)
+    assert [json.loads(line)['description'] for line in capsys.readouterr().out.splitlines()] == ['b', 'b']